@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+Local server for claude-chat-viewer.html, backed by per-transcript indexes.
+
+Opened from disk, the viewer reads each session .jsonl whole and renders
+every message, which freezes the tab on multi-hundred-MB transcripts, and
+it reads every file just to list the projects. Served by this script it
+asks for one page of messages at a time instead:
+
+    GET /                      the viewer
+    GET /api/projects          project directories (stat only, no reads)
+    GET /api/sessions?project=P
+    GET /api/messages?project=P&session=S&offset=0&limit=200
+                       [&type=user|assistant|system][&tool=Edit][&q=text]
+                       [&since=ISO][&until=ISO]
+
+Each transcript gets an index: one fixed-size record per line with its byte
+offset and length, timestamp, message type, flags (meta, tool use, tool
+result, error), cwd and the tools it used. Filtering by type, tool or time
+only touches the index; a text search reads just the candidate lines; a
+page is sent as the raw JSON lines, without re-encoding them.
+
+Transcripts are append-only, so an index is extended from where it left
+off when the file grows, and rebuilt only if the file shrinks. Indexes are
+kept in ~/.cache/claude-hooks/transcripts: new records are appended to
+`<key>.idx` and the small tables go in `<key>.json` beside it.
+
+Usage:
+    claude-chat-server.py [--port 8765] [--projects ~/.claude/projects]
+    claude-chat-server.py index FILE.jsonl    # Build or update one index
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+import threading
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+VIEWER = Path(__file__).resolve().parent / "claude-chat-viewer.html"
+DEFAULT_PROJECTS = Path.home() / ".claude" / "projects"
+CACHE_DIR = Path.home() / ".cache" / "claude-hooks" / "transcripts"
+
+INDEX_VERSION = 3
+# offset, length, timestamp (ms), type, flags, cwd, tools bitmask
+RECORD = struct.Struct("<QIqBBHQ")
+
+FLAG_META = 1
+FLAG_TOOL_USE = 2
+FLAG_TOOL_RESULT = 4
+FLAG_ERROR = 8
+
+# Types the viewer never shows; they don't count towards totals either.
+HIDDEN_TYPES = ("file-history-snapshot",)
+
+# Tools past the 63rd distinct name share the last bit.
+MAX_TOOL_BITS = 64
+
+DEFAULT_PAGE = 200
+MAX_PAGE = 2000
+
+# Filtered slices kept per server, so paging doesn't re-scan.
+SLICE_CACHE_SIZE = 32
+
+
+def _timestamp_ms(value) -> int:
+    if not isinstance(value, str) or not value:
+        return 0
+    try:
+        return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() * 1000)
+    except ValueError:
+        return 0
+
+
+class TranscriptIndex:
+    """Byte-offset and metadata index of one transcript."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.size = 0
+        self.mtime_ns = 0
+        # Bytes of the file covered; a trailing partial line is not.
+        self.indexed = 0
+        self.types: list[str] = []
+        self.tools: list[str] = []
+        self.cwds: list[str] = []
+        self.records = bytearray()
+        # Bytes of records already in the cache file.
+        self._saved = 0
+        # tool_use id -> tool name for uses whose result hasn't been seen.
+        self._tool_ids: dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.records) // RECORD.size
+
+    @property
+    def cache_file(self) -> Path:
+        key = hashlib.sha1(str(self.path.resolve()).encode()).hexdigest()[:16]
+        return CACHE_DIR / f"{key}.idx"
+
+    @property
+    def header_file(self) -> Path:
+        return self.cache_file.with_suffix(".json")
+
+    @classmethod
+    def load(cls, path: Path) -> "TranscriptIndex":
+        """The index from disk, extended to the current end of the file."""
+        index = cls(path)
+        try:
+            header = json.loads(index.header_file.read_bytes())
+            if header.get("version") == INDEX_VERSION and header.get("path") == str(path):
+                with open(index.cache_file, "rb") as f:
+                    # Records past the header's count were appended by a
+                    # save that didn't finish; they are rewritten.
+                    records = f.read(header["records"])
+                if len(records) == header["records"]:
+                    index.size = header["size"]
+                    index.mtime_ns = header["mtime_ns"]
+                    index.indexed = header["indexed"]
+                    index.types = header["types"]
+                    index.tools = header["tools"]
+                    index.cwds = header["cwds"]
+                    index._tool_ids = header["tool_ids"]
+                    index.records = bytearray(records)
+                    index._saved = len(records)
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        index.refresh()
+        return index
+
+    def refresh(self) -> bool:
+        """Bring the index up to date; returns True if it changed."""
+        st = os.stat(self.path)
+        if st.st_size == self.size and st.st_mtime_ns == self.mtime_ns:
+            return False
+        if st.st_size < self.indexed:
+            self.__init__(self.path)
+        self._scan(self.indexed)
+        self.size, self.mtime_ns = st.st_size, st.st_mtime_ns
+        self._save()
+        return True
+
+    def _code(self, table: list[str], value: str, limit: int) -> int:
+        try:
+            return table.index(value)
+        except ValueError:
+            if len(table) >= limit:
+                return limit - 1
+            table.append(value)
+            return len(table) - 1
+
+    def _scan(self, start: int):
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Still being written.
+                length = len(line)
+                if line.strip():
+                    record = self._record(offset, line)
+                    if record is not None:
+                        self.records += record
+                offset += length
+            self.indexed = offset
+
+    def _record(self, offset: int, line: bytes) -> bytes | None:
+        try:
+            msg = json.loads(line)
+        except ValueError:
+            return None
+        if not isinstance(msg, dict):
+            return None
+
+        flags = FLAG_META if msg.get("isMeta") else 0
+        tools = 0
+        content = (msg.get("message") or {}).get("content") if isinstance(msg.get("message"), dict) else None
+        if isinstance(content, list):
+            for item in content:
+                if not isinstance(item, dict):
+                    continue
+                name = None
+                if item.get("type") == "tool_use":
+                    flags |= FLAG_TOOL_USE
+                    name = item.get("name") or "?"
+                    self._tool_ids[item.get("id", "")] = name
+                elif item.get("type") == "tool_result":
+                    flags |= FLAG_TOOL_RESULT
+                    if item.get("is_error"):
+                        flags |= FLAG_ERROR
+                    name = self._tool_ids.pop(item.get("tool_use_id", ""), None)
+                if name:
+                    tools |= 1 << self._code(self.tools, name, MAX_TOOL_BITS)
+
+        return RECORD.pack(
+            offset,
+            len(line),
+            _timestamp_ms(msg.get("timestamp")),
+            self._code(self.types, str(msg.get("type") or msg.get("role") or "unknown"), 256),
+            flags,
+            self._code(self.cwds, str(msg.get("cwd") or ""), 65536),
+            tools,
+        )
+
+    def _save(self):
+        """Append the new records, then rewrite the header that covers them."""
+        header = {
+            "version": INDEX_VERSION,
+            "path": str(self.path),
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "indexed": self.indexed,
+            "types": self.types,
+            "tools": self.tools,
+            "cwds": self.cwds,
+            # Results appended later still need their tool_use's name.
+            "tool_ids": self._tool_ids,
+            "records": len(self.records),
+        }
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_file, "a+b") as f:
+                end = f.seek(0, os.SEEK_END)
+                if end < self._saved:
+                    self._saved = 0  # Cache file lost records; start over.
+                if end != self._saved:
+                    f.truncate(self._saved)
+                f.write(self.records[self._saved:])
+            self._saved = len(self.records)
+            tmp = self.header_file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(header))
+            os.replace(tmp, self.header_file)
+        except OSError:
+            pass
+
+    def snapshot(self) -> "TranscriptIndex":
+        """A copy to read from while refresh() may extend this index.
+
+        Resizing the records bytearray while select() iterates it raises
+        BufferError, and the tables grow in place, so readers work on a
+        copy taken under the library lock.
+        """
+        copy = TranscriptIndex(self.path)
+        copy.size, copy.mtime_ns, copy.indexed = self.size, self.mtime_ns, self.indexed
+        copy.types = list(self.types)
+        copy.tools = list(self.tools)
+        copy.cwds = list(self.cwds)
+        copy.records = bytes(self.records)
+        return copy
+
+    def select(
+        self,
+        type_: str | None = None,
+        tool: str | None = None,
+        since: int = 0,
+        until: int = 0,
+        query: str | None = None,
+    ) -> list[int]:
+        """Positions of the visible messages matching every filter, in order."""
+        hidden = {self.types.index(t) for t in HIDDEN_TYPES if t in self.types}
+        type_code = self.types.index(type_) if type_ in self.types else None
+        if type_ and type_code is None:
+            return []
+        tool_bit = 1 << self.tools.index(tool) if tool in self.tools else None
+        if tool and tool_bit is None:
+            return []
+
+        selected = []
+        for n, (_, _, ts, code, flags, _, tools) in enumerate(RECORD.iter_unpack(self.records)):
+            if code in hidden or flags & FLAG_META:
+                continue
+            if type_code is not None and code != type_code:
+                continue
+            if tool_bit is not None and not tools & tool_bit:
+                continue
+            if (since and ts < since) or (until and ts > until):
+                continue
+            selected.append(n)
+
+        if query:
+            needle = query.lower().encode()
+            with open(self.path, "rb") as f:
+                selected = [n for n in selected if needle in self._read(f, n).lower()]
+        return selected
+
+    def _read(self, f, n: int) -> bytes:
+        offset, length = RECORD.unpack_from(self.records, n * RECORD.size)[:2]
+        f.seek(offset)
+        return f.read(length)
+
+    def lines(self, positions: list[int]) -> list[bytes]:
+        with open(self.path, "rb") as f:
+            return [self._read(f, n).rstrip(b"\r\n") for n in positions]
+
+    def visible_count(self) -> int:
+        return len(self.select())
+
+
+class Library:
+    """Projects directory plus the indexes and filtered slices in memory."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.lock = threading.Lock()
+        self.indexes: dict[Path, TranscriptIndex] = {}
+        self.slices: dict[tuple, list[int]] = {}
+
+    def projects(self) -> list[dict]:
+        projects = []
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if not entry.is_dir() or not entry.name.startswith("-"):
+                    continue
+                count, modified = 0, 0.0
+                with os.scandir(entry.path) as files:
+                    for f in files:
+                        if f.name.endswith(".jsonl") and f.is_file():
+                            count += 1
+                            modified = max(modified, f.stat().st_mtime)
+                if count:
+                    projects.append({
+                        "id": entry.name,
+                        "name": entry.name.lstrip("-").replace("-", "/"),
+                        "sessionCount": count,
+                        "lastModified": int(modified * 1000),
+                    })
+        return sorted(projects, key=lambda p: -p["lastModified"])
+
+    def _project_dir(self, project: str) -> Path:
+        if not project or "/" in project or project in (".", ".."):
+            raise FileNotFoundError(project)
+        path = self.root / project
+        if not path.is_dir():
+            raise FileNotFoundError(project)
+        return path
+
+    def sessions(self, project: str) -> list[dict]:
+        sessions = []
+        for f in self._project_dir(project).glob("*.jsonl"):
+            st = f.stat()
+            sessions.append({"id": f.name, "size": st.st_size, "modified": int(st.st_mtime * 1000)})
+        return sorted(sessions, key=lambda s: -s["modified"])
+
+    def index(self, project: str, session: str) -> TranscriptIndex:
+        """A snapshot of the session's index, brought up to date first."""
+        if "/" in session or not session.endswith(".jsonl"):
+            raise FileNotFoundError(session)
+        path = self._project_dir(project) / session
+        if not path.is_file():
+            raise FileNotFoundError(session)
+        with self.lock:
+            index = self.indexes.get(path)
+            if index is None:
+                index = self.indexes[path] = TranscriptIndex.load(path)
+            elif index.refresh():
+                self.slices = {k: v for k, v in self.slices.items() if k[0] != path}
+            return index.snapshot()
+
+    def messages(self, project: str, session: str, params: dict) -> bytes:
+        index = self.index(project, session)
+        offset = max(0, int(params.get("offset", 0)))
+        limit = min(MAX_PAGE, max(1, int(params.get("limit", DEFAULT_PAGE))))
+        filters = (
+            params.get("type") or None,
+            params.get("tool") or None,
+            _timestamp_ms(params.get("since")),
+            _timestamp_ms(params.get("until")),
+            params.get("q") or None,
+        )
+
+        key = (index.path, len(index)) + filters
+        with self.lock:
+            selected = self.slices.get(key)
+        if selected is None:
+            selected = index.select(*filters)
+            with self.lock:
+                if len(self.slices) >= SLICE_CACHE_SIZE:
+                    self.slices.pop(next(iter(self.slices)))
+                self.slices[key] = selected
+        all_key = (index.path, len(index), None, None, 0, 0, None)
+        with self.lock:
+            total = self.slices.get(all_key)
+        total = len(total) if total is not None else len(index.select())
+
+        page = selected[offset:offset + limit]
+        end = offset + len(page)
+        meta = {
+            "total": total,
+            "matched": len(selected),
+            "offset": offset,
+            "next": end if end < len(selected) else None,
+            "tools": index.tools,
+            "types": [t for t in index.types if t not in HIDDEN_TYPES],
+        }
+        # Splice the raw lines in rather than decoding and re-encoding them.
+        head = json.dumps(meta)[:-1].encode()
+        return head + b', "messages": [' + b",".join(index.lines(page)) + b"]}"
+
+
+def make_handler(library: Library):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: bytes, content_type: str):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, data, status: int = HTTPStatus.OK):
+            self._send(status, json.dumps(data).encode(), "application/json")
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            try:
+                if url.path in ("/", "/claude-chat-viewer.html"):
+                    self._send(HTTPStatus.OK, VIEWER.read_bytes(), "text/html; charset=utf-8")
+                elif url.path == "/api/projects":
+                    self._json(library.projects())
+                elif url.path == "/api/sessions":
+                    self._json(library.sessions(params.get("project", "")))
+                elif url.path == "/api/messages":
+                    body = library.messages(params.get("project", ""), params.get("session", ""), params)
+                    self._send(HTTPStatus.OK, body, "application/json")
+                else:
+                    self._json({"error": "not found"}, HTTPStatus.NOT_FOUND)
+            except FileNotFoundError:
+                self._json({"error": "not found"}, HTTPStatus.NOT_FOUND)
+            except ValueError as e:
+                self._json({"error": str(e)}, HTTPStatus.BAD_REQUEST)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve claude-chat-viewer.html with indexed transcripts.")
+    parser.add_argument("command", nargs="?", choices=["serve", "index"], default="serve")
+    parser.add_argument("file", nargs="?", type=Path, help="Transcript to index")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--projects", type=Path, default=DEFAULT_PROJECTS)
+    args = parser.parse_args()
+
+    if args.command == "index":
+        if args.file is None:
+            parser.error("index needs a transcript file")
+        index = TranscriptIndex.load(args.file)
+        print(f"{args.file}: {len(index)} lines, {index.visible_count()} visible messages, "
+              f"{len(index.tools)} tool(s), index {index.cache_file}")
+        return
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(Library(args.projects)))
+    print(f"Serving {args.projects} at http://127.0.0.1:{args.port}/", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
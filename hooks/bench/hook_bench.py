@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the hooks in this directory.
+
+Generates synthetic projects (a git repo with .sessions/ and .tasks/ trees)
+at several scales, then runs each hook the way Claude Code does: a fresh
+process per event with a recorded payload (payloads.json) on stdin.
+
+Every sample is split into interpreter startup and hook work. Startup is
+measured separately by running the bare interpreter (`python3 -c ''`,
+`bash -c :`) the same number of times; work is a sample's wall time minus
+the median startup of its interpreter.
+
+Scales:
+    small    10 task files,     1 KB session file
+    medium   1,000 task files,  1 MB session file
+    large    10,000 task files, 50 MB session file
+
+Usage:
+    hook_bench.py                                # small + medium, table
+    hook_bench.py --scale large --runs 50
+    hook_bench.py --hooks session_context,hook_client_daemon
+    hook_bench.py --save baseline.json           # Record a baseline
+    hook_bench.py --compare baseline.json        # Exit 1 on regressions
+
+Before timing anything, the indexed and streamed session readers are
+checked to agree (session_store.py compare) on each scale's active session
+and on the crafted files in bench/sessions/; a mismatch fails the run.
+
+Generated trees are kept in ~/.cache/claude-hooks/bench/<scale> and reused
+across runs (--regenerate to rebuild them). Hooks run with HOME pointed at
+the scale directory so their caches never touch the real ones.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+HOOKS_DIR = BENCH_DIR.parent
+PAYLOADS_FILE = BENCH_DIR / "payloads.json"
+# Session files with the delimiter edge cases the readers must agree on.
+SESSION_FIXTURES = BENCH_DIR / "sessions"
+WORK_ROOT = Path.home() / ".cache" / "claude-hooks" / "bench"
+
+BASELINE_VERSION = 1
+
+# A hook regresses when its work p50 or p95 grows by more than the threshold
+# and by at least this many milliseconds (sub-millisecond noise is ignored).
+NOISE_FLOOR_MS = 1.0
+
+
+@dataclass
+class Scale:
+    tasks: int
+    session_bytes: int
+    # Extra registered sessions (other branches / paused) next to the active one.
+    other_sessions: int
+
+
+SCALES = {
+    "small": Scale(tasks=10, session_bytes=1024, other_sessions=0),
+    "medium": Scale(tasks=1000, session_bytes=1024 * 1024, other_sessions=5),
+    "large": Scale(tasks=10_000, session_bytes=50 * 1024 * 1024, other_sessions=20),
+}
+
+
+@dataclass
+class BenchHook:
+    name: str
+    command: list[str]
+    payload: str
+    interpreter: str  # "python3" or "bash"
+    env: dict[str, str] | None = None
+
+
+def _py(path: str, *args: str) -> list[str]:
+    return [sys.executable, str(HOOKS_DIR / path), *args]
+
+
+def _sh(path: str) -> list[str]:
+    return ["bash", str(HOOKS_DIR / path)]
+
+
+HOOKS = [
+    BenchHook("ultrathink", _py("ultrathink_hook.py"), "prompt_continue", "python3"),
+    BenchHook("context_enhancer", _py("userpromptsubmit/context_enhancer.py"), "prompt_review", "python3"),
+    BenchHook("session_context", _py("userpromptsubmit/session_context.py"), "prompt_short", "python3"),
+    BenchHook("hook_client_fallback", _py("hook_client.py", "UserPromptSubmit"), "prompt_review", "python3",
+              env={"CLAUDE_HOOKD_AUTOSTART": "0", "CLAUDE_HOOKD_SOCKET": "{work}/no-daemon.sock"}),
+    BenchHook("hook_client_daemon", _py("hook_client.py", "UserPromptSubmit"), "prompt_review", "python3",
+              env={"CLAUDE_HOOKD_AUTOSTART": "0", "CLAUDE_HOOKD_SOCKET": "{work}/hookd.sock"}),
+    BenchHook("hook_client_fast_path", _py("hook_client.py", "UserPromptSubmit"), "prompt_plain", "python3",
+              env={"CLAUDE_HOOKD_AUTOSTART": "0", "CLAUDE_HOOKD_SOCKET": "{work}/no-daemon.sock"}),
+    BenchHook("sensitive_file_guard", _sh("pretooluse/sensitive_file_guard.sh"), "edit_go", "bash"),
+    BenchHook("task_workflow_guard", _sh("pretooluse/task_workflow_guard.sh"), "edit_go", "bash"),
+    BenchHook("go_format_check", _sh("pretooluse/go_format_check.sh"), "edit_go", "bash"),
+    BenchHook("git_status_refresh", _sh("posttooluse/git_status_refresh.sh"), "post_edit", "bash"),
+    BenchHook("load_project_context", _sh("sessionstart/load_project_context.sh"), "session_start", "bash"),
+    BenchHook("save_important_context", _sh("precompact/save_important_context.sh"), "pre_compact", "bash"),
+]
+
+STARTUP_COMMANDS = {
+    "python3": [sys.executable, "-c", ""],
+    "bash": ["bash", "-c", ":"],
+}
+
+
+# --- Synthetic trees ---------------------------------------------------------
+
+def _session_text(session_id: str, shortname: str, branch: str, size: int, rng: random.Random) -> str:
+    head = f"""---
+id: {session_id}
+shortname: {shortname}
+status: active
+task_ids:
+  - {session_id}-task
+created_at: 2025-01-15T10:00:00Z
+updated_at: 2025-01-15T14:30:00Z
+compaction_count: 2
+git_branch: {branch}
+git_last_commit: abc123f
+---
+
+# Session: {shortname}
+
+## TL;DR (Read This First)
+Fixing race condition in sweep trigger. Found root cause in sweeper.go:245.
+Currently implementing mutex fix. Next: complete mutex, add tests.
+
+## Context
+**Objective**: Fix race condition causing intermittent sweep failures
+
+**Key Context** (survives compaction):
+- Race condition: state check before lock acquisition
+- Lock ordering: chain_watcher -> sweeper (not reverse!)
+- Test command: `go test -v -run TestSweepTrigger ./itest`
+
+## Progress
+- [x] Reproduce bug in test (2025-01-15T10:30)
+- [x] Identify root cause (2025-01-15T11:00)
+- [ ] Implement fix          <- CURRENT
+- [ ] Add regression test
+
+## Decisions
+"""
+    tail = """
+## Blockers
+- None currently
+
+## Next Steps
+1. Complete mutex implementation in sweeper.go
+2. Add regression test
+"""
+    # Long sessions grow their append-only logs; pad Decisions to the size.
+    parts = [head]
+    remaining = size - len(head) - len(tail)
+    n = 1
+    while remaining > 0:
+        entry = (
+            f"### {n}. Decision {n} (2025-01-15T12:{n % 60:02d})\n"
+            f"**Context**: {' '.join(rng.choice(_WORDS) for _ in range(12))}\n"
+            f"**Choice**: option {rng.randint(1, 3)}\n\n"
+        )
+        parts.append(entry)
+        remaining -= len(entry)
+        n += 1
+    parts.append(tail)
+    return "".join(parts)
+
+
+_WORDS = "htlc sweep channel lock mutex fee peer block chain watcher resolver state".split()
+
+_STATUSES = ["ready", "ready", "ready", "blocked", "in_progress"]
+
+
+def _task_text(n: int, status: str) -> str:
+    return f"""---
+id: task-{n:05d}
+title: Synthetic task {n}
+status: {status}
+priority: P{n % 4}
+size: M
+---
+
+# Synthetic task {n}
+
+## Description
+Benchmark fixture.
+"""
+
+
+def generate(scale_name: str, regenerate: bool = False) -> Path:
+    """Create (or reuse) the project tree for one scale and return its path."""
+    scale = SCALES[scale_name]
+    root = WORK_ROOT / scale_name
+    project = root / "project"
+    marker = root / "scale.json"
+    if not regenerate and marker.exists() and json.loads(marker.read_text()) == asdict(scale):
+        return root
+
+    shutil.rmtree(root, ignore_errors=True)
+    (root / "home").mkdir(parents=True)
+    project.mkdir()
+    rng = random.Random(scale_name)
+
+    subprocess.run(["git", "init", "-q", "-b", "feat/bench"], cwd=project, check=True)
+    (project / "sweep").mkdir()
+    (project / "sweep" / "sweeper.go").write_text("package sweep\n\nfunc Sweep() {}\n")
+    subprocess.run(["git", "add", "sweep"], cwd=project, check=True)
+    subprocess.run(
+        ["git", "-c", "user.name=bench", "-c", "user.email=bench@localhost",
+         "commit", "-q", "-m", "bench fixture"],
+        cwd=project, check=True,
+    )
+    (project / "sweep" / "sweeper.go").write_text("package sweep\n\nfunc Sweep()  {}\n")
+
+    tasks = project / ".tasks" / "active"
+    tasks.mkdir(parents=True)
+    for n in range(scale.tasks):
+        # Spread tasks over subdirectories like a real backlog.
+        sub = tasks / f"group-{n % 20:02d}"
+        sub.mkdir(exist_ok=True)
+        status = "ready" if n == 0 else rng.choice(_STATUSES)
+        (sub / f"task-{n:05d}.md").write_text(_task_text(n, status))
+
+    active = project / ".sessions" / "active"
+    active.mkdir(parents=True)
+    sessions = [("bench-session", "feat/bench", scale.session_bytes)]
+    sessions += [(f"other-{i}", f"feat/other-{i}", 4096) for i in range(scale.other_sessions)]
+    registry = {}
+    for shortname, branch, size in sessions:
+        session_id = f"0000-{shortname}"
+        path = active / f"{shortname}.md"
+        path.write_text(_session_text(session_id, shortname, branch, size, rng))
+        registry[session_id] = {
+            "shortname": shortname,
+            "path": str(path.relative_to(project)),
+            "cwd": str(project),
+            "branch": branch,
+            "status": "active",
+            "updated_at": "2025-01-15T14:30:00Z",
+        }
+        journal = project / ".sessions" / "journal" / session_id
+        journal.mkdir(parents=True)
+        (journal / "progress.md").write_text(
+            f"---\nsession_id: {session_id}\nlast_updated: 2025-01-15T14:30:00Z\n"
+            f"compaction_count: 2\n---\n\n# Quick Resume: {shortname}\n"
+        )
+    (project / ".sessions" / "registry.json").write_text(
+        json.dumps({"version": 1, "sessions": registry}, indent=2)
+    )
+
+    marker.write_text(json.dumps(asdict(scale)))
+    return root
+
+
+# --- Measurement -------------------------------------------------------------
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    return {f"p{p}": round(percentile(samples, p), 3) for p in (50, 95, 99)}
+
+
+def _time_command(command: list[str], stdin: bytes, cwd: Path, env: dict[str, str]) -> float:
+    start = time.perf_counter()
+    subprocess.run(command, input=stdin, cwd=cwd, env=env,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def _hook_env(root: Path, hook: BenchHook) -> dict[str, str]:
+    env = dict(os.environ, HOME=str(root / "home"))
+    for key, value in (hook.env or {}).items():
+        env[key] = value.format(work=root)
+    return env
+
+
+def _start_daemon(root: Path) -> subprocess.Popen:
+    env = dict(os.environ, HOME=str(root / "home"), CLAUDE_HOOKD_SOCKET=str(root / "hookd.sock"))
+    proc = subprocess.Popen(
+        [sys.executable, str(HOOKS_DIR / "lib" / "hookd.py"), "serve"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 5
+    while not (root / "hookd.sock").exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return proc
+
+
+def bench_scale(root: Path, hooks: list[BenchHook], runs: int, warmup: int) -> dict:
+    payloads = json.loads(PAYLOADS_FILE.read_text())
+    project = root / "project"
+    env = dict(os.environ, HOME=str(root / "home"))
+
+    startup = {}
+    for interpreter, command in STARTUP_COMMANDS.items():
+        if any(h.interpreter == interpreter for h in hooks):
+            samples = [_time_command(command, b"", project, env) for _ in range(warmup + runs)][warmup:]
+            startup[interpreter] = samples
+
+    daemon = None
+    if any(h.name == "hook_client_daemon" for h in hooks):
+        daemon = _start_daemon(root)
+
+    results = {}
+    try:
+        for hook in hooks:
+            payload = payloads[hook.payload]
+            payload["cwd"] = str(project)
+            stdin = json.dumps(payload).encode()
+            hook_env = _hook_env(root, hook)
+            samples = [
+                _time_command(hook.command, stdin, project, hook_env)
+                for _ in range(warmup + runs)
+            ][warmup:]
+            base = percentile(startup[hook.interpreter], 50)
+            results[hook.name] = {
+                "total": summarize(samples),
+                "startup": summarize(startup[hook.interpreter]),
+                "work": summarize([max(0.0, s - base) for s in samples]),
+            }
+    finally:
+        if daemon:
+            daemon.terminate()
+            daemon.wait()
+    return results
+
+
+# --- Reporting ---------------------------------------------------------------
+
+def print_table(scale_name: str, results: dict):
+    scale = SCALES[scale_name]
+    print(f"\n{scale_name}: {scale.tasks} tasks, {scale.session_bytes // 1024} KB session "
+          f"(ms; work = wall - interpreter startup p50)")
+    print(f"{'hook':<24} {'startup p50':>11} {'work p50':>9} {'p95':>8} {'p99':>8} {'total p50':>10}")
+    for name, r in results.items():
+        print(f"{name:<24} {r['startup']['p50']:>11.1f} {r['work']['p50']:>9.1f} "
+              f"{r['work']['p95']:>8.1f} {r['work']['p99']:>8.1f} {r['total']['p50']:>10.1f}")
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Return a line per hook whose work time regressed against the baseline."""
+    regressions = []
+    for scale_name, hooks in current.items():
+        for name, r in hooks.items():
+            old = baseline.get("results", {}).get(scale_name, {}).get(name)
+            if not old:
+                continue
+            for p in ("p50", "p95"):
+                before, after = old["work"][p], r["work"][p]
+                if after - before >= NOISE_FLOOR_MS and after > before * (1 + threshold):
+                    regressions.append(
+                        f"{scale_name}/{name} work {p}: {before:.1f} -> {after:.1f} ms"
+                    )
+    return regressions
+
+
+def check_readers(extra: list[Path]):
+    """Exit if the indexed and streamed session readers disagree."""
+    files = sorted(SESSION_FIXTURES.glob("*.md")) + extra
+    result = subprocess.run(
+        [sys.executable, str(HOOKS_DIR / "lib" / "session_store.py"), "compare", *map(str, files)],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        print("Session readers disagree:\n" + result.stdout + result.stderr, file=sys.stderr)
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hook latency on synthetic projects.")
+    parser.add_argument("--scale", action="append", choices=sorted(SCALES),
+                        help="Scale to run (repeatable; default: small, medium)")
+    parser.add_argument("--hooks", help="Comma-separated hook names (default: all)")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--regenerate", action="store_true", help="Rebuild the synthetic trees")
+    parser.add_argument("--save", type=Path, metavar="FILE", help="Write results as a baseline")
+    parser.add_argument("--compare", type=Path, metavar="FILE", help="Compare against a baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed relative slowdown before failing (default: 0.2)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    hooks = HOOKS
+    if args.hooks:
+        wanted = set(args.hooks.split(","))
+        unknown = wanted - {h.name for h in HOOKS}
+        if unknown:
+            parser.error(f"unknown hooks: {', '.join(sorted(unknown))}")
+        hooks = [h for h in HOOKS if h.name in wanted]
+
+    results = {}
+    for scale_name in args.scale or ["small", "medium"]:
+        root = generate(scale_name, args.regenerate)
+        check_readers([root / "project" / ".sessions" / "active" / "bench-session.md"])
+        results[scale_name] = bench_scale(root, hooks, args.runs, args.warmup)
+        if not args.json:
+            print_table(scale_name, results[scale_name])
+
+    report = {
+        "version": BASELINE_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "machine": {"node": platform.node(), "python": platform.python_version(),
+                    "system": platform.system()},
+        "runs": args.runs,
+        "results": results,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    if args.save:
+        args.save.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nBaseline written to {args.save}", file=sys.stderr)
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if baseline.get("machine") != report["machine"]:
+            print("\nNote: baseline was recorded on a different machine/interpreter", file=sys.stderr)
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            print("\nRegressions:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+        print("\nNo regressions against baseline.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Fast-start setup for the Python hooks.
+
+Each Python hook is a new interpreter. Before it looks at the prompt it
+pays for `site` initialization (site-packages, .pth files) and for
+compiling any hooks/lib module that has no cached bytecode. The hooks only
+use the standard library, so neither cost is needed:
+
+    install     Precompile hooks/ to __pycache__ and rewrite the Python hook
+                commands in settings.json to `python3 -I -S <script>`
+                (isolated mode, no site import)
+    uninstall   Restore the plain commands
+    measure     Time each Python hook command with and without -I -S
+
+`-I` also ignores PYTHON* environment variables such as
+PYTHONDONTWRITEBYTECODE, so the precompiled bytecode is always used.
+
+Usage:
+    fast_start.py install [--settings ~/.claude/settings.json]
+    fast_start.py uninstall [--settings ...]
+    fast_start.py measure [--runs 30]
+"""
+
+import argparse
+import compileall
+import json
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent
+DEFAULT_SETTINGS = HOOKS_DIR.parent / "settings.json"
+PAYLOADS_FILE = HOOKS_DIR / "bench" / "payloads.json"
+
+PREFIX = ["python3", "-I", "-S"]
+
+
+def precompile() -> bool:
+    """Write __pycache__ bytecode for every module under hooks/."""
+    return compileall.compile_dir(str(HOOKS_DIR), quiet=1, force=True)
+
+
+def _is_python_hook(argv: list[str]) -> bool:
+    return bool(argv) and argv[0].endswith(".py")
+
+
+def rewrite_command(command: str, fast: bool) -> str:
+    """Add or strip the fast-start interpreter prefix on one hook command."""
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return command
+    if fast and _is_python_hook(argv):
+        return " ".join(PREFIX) + " " + command
+    prefix = " ".join(PREFIX) + " "
+    if not fast and command.startswith(prefix):
+        return command[len(prefix):]
+    return command
+
+
+def rewrite_settings(path: Path, fast: bool) -> int:
+    """Rewrite every hook command in settings.json; returns how many changed."""
+    text = path.read_text()
+    settings = json.loads(text)
+    changed = 0
+    for groups in settings.get("hooks", {}).values():
+        for group in groups:
+            for hook in group.get("hooks", []):
+                if hook.get("type") != "command":
+                    continue
+                new = rewrite_command(hook["command"], fast)
+                if new != hook["command"]:
+                    hook["command"] = new
+                    changed += 1
+    if changed:
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(settings, indent=2, ensure_ascii=False) + "\n")
+        os.replace(tmp, path)
+    return changed
+
+
+def _median_ms(argv: list[str], stdin: bytes, runs: int, env: dict[str, str]) -> float:
+    samples = []
+    for _ in range(runs + 2):
+        start = time.perf_counter()
+        subprocess.run(argv, input=stdin, env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples[2:])
+
+
+def measure(runs: int):
+    """Print median wall time of the Python hooks, plain vs fast-start."""
+    payloads = json.loads(PAYLOADS_FILE.read_text())
+    # The daemon is left out so the numbers show the interpreter cost.
+    env = dict(os.environ, CLAUDE_HOOKD_AUTOSTART="0", CLAUDE_HOOK_TELEMETRY="0",
+               CLAUDE_HOOKD_SOCKET=os.devnull)
+    cases = [
+        ("interpreter only", ["-c", ""], None),
+        ("hook_client (plain prompt)", [str(HOOKS_DIR / "hook_client.py"), "UserPromptSubmit"], "prompt_plain"),
+        ("hook_client (rule match)", [str(HOOKS_DIR / "hook_client.py"), "UserPromptSubmit"], "prompt_review"),
+        ("context_enhancer.py", [str(HOOKS_DIR / "userpromptsubmit" / "context_enhancer.py")], "prompt_review"),
+        ("session_context.py", [str(HOOKS_DIR / "userpromptsubmit" / "session_context.py")], "prompt_plain"),
+    ]
+    print(f"{'command':<30} {'python3':>9} {'-I -S':>9} {'saved':>9}   (median ms, {runs} runs)")
+    for label, args, payload in cases:
+        stdin = json.dumps(payloads[payload]).encode() if payload else b""
+        plain = _median_ms([sys.executable, *args], stdin, runs, env)
+        fast = _median_ms([sys.executable, *PREFIX[1:], *args], stdin, runs, env)
+        print(f"{label:<30} {plain:>9.1f} {fast:>9.1f} {plain - fast:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fast-start setup for Python hooks.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("install", "uninstall"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--settings", type=Path, default=DEFAULT_SETTINGS)
+    measure_cmd = sub.add_parser("measure")
+    measure_cmd.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+
+    if args.command == "install":
+        if not precompile():
+            print("fast_start: some modules failed to compile", file=sys.stderr)
+        changed = rewrite_settings(args.settings, fast=True)
+        print(f"Precompiled {HOOKS_DIR}; {changed} command(s) in {args.settings} now use "
+              f"`{' '.join(PREFIX)}`")
+    elif args.command == "uninstall":
+        changed = rewrite_settings(args.settings, fast=False)
+        print(f"Restored {changed} command(s) in {args.settings}")
+    else:
+        measure(args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Client shim for the persistent hook daemon (hooks/lib/hookd.py).
+
+Forwards the hook payload on stdin to the daemon over its unix socket and
+replays the daemon's stdout, stderr and exit code. If the daemon isn't
+running, the hooks run in this process instead and a daemon is started in
+the background for the next invocation (set CLAUDE_HOOKD_AUTOSTART=0 to
+disable that). A daemon that accepted the request but timed out or broke
+off is not worked around: its hooks may already have run.
+
+Prompts that no pipeline stage would change are answered here without
+contacting the daemon (see lib/prompt_fastpath.py).
+
+Each invocation is recorded as a span for `hook_telemetry.py stats`.
+
+Usage (settings.json):
+    "command": "~/.claude/hooks/hook_client.py UserPromptSubmit"
+"""
+
+import json
+import os
+import sys
+import time
+
+# Imports are kept to the minimum the fast path needs; the rest are loaded
+# on the paths that use them.
+LIB_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "lib")
+sys.path.insert(0, LIB_DIR)
+
+# Generous enough for a slow hook, short enough to fall back if wedged.
+TIMEOUT_SECONDS = 10
+
+# Environment the hooks read, sent with each request so the daemon honors
+# this invocation's settings rather than those it was started with.
+FORWARDED_ENV_PREFIXES = ("CLAUDE_", "TASK_SYNC_", "SUBSTRATE_")
+FORWARDED_ENV = ("PATH",)
+
+
+def socket_path() -> str:
+    """Location of the daemon socket (kept in sync with hookd.socket_path)."""
+    return os.environ.get("CLAUDE_HOOKD_SOCKET") or os.path.expanduser(
+        "~/.claude/run/hookd.sock"
+    )
+
+
+class NoReply(Exception):
+    """The daemon took the request but didn't answer it in time or in full."""
+
+
+def forward(event: str, raw_input: str) -> dict:
+    """Send one request to the daemon and return its decoded reply.
+
+    Raises OSError if the daemon can't be reached, and NoReply if it was
+    reached but failed to answer: it may have run the hooks already, so
+    they must not be run again.
+    """
+    import socket
+
+    env = {
+        name: value for name, value in os.environ.items()
+        if name.startswith(FORWARDED_ENV_PREFIXES) or name in FORWARDED_ENV
+    }
+    request = json.dumps({"event": event, "cwd": os.getcwd(), "env": env, "input": raw_input})
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(TIMEOUT_SECONDS)
+        sock.connect(socket_path())
+        try:
+            sock.sendall(request.encode())
+            sock.shutdown(socket.SHUT_WR)
+
+            chunks = []
+            while chunk := sock.recv(65536):
+                chunks.append(chunk)
+            return json.loads(b"".join(chunks))
+        except (OSError, ValueError) as e:
+            raise NoReply(str(e) or type(e).__name__) from e
+    finally:
+        sock.close()
+
+
+def run_locally(event: str, raw_input: str) -> dict:
+    """Run the hooks in this process when the daemon is unavailable."""
+    import hookd
+
+    if os.environ.get("CLAUDE_HOOKD_AUTOSTART", "1") == "1":
+        import subprocess
+
+        subprocess.Popen(
+            [sys.executable, os.path.join(LIB_DIR, "hookd.py"), "start"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+    result = hookd.run_hook(event, raw_input)
+    return {
+        "stdout": result.stdout,
+        "stderr": result.stderr,
+        "exit_code": result.exit_code,
+    }
+
+
+def record_span(event: str, start: float, elapsed: float, raw: bytes, reply: dict, hook: str):
+    """Record this invocation for hook_telemetry.py stats; never fails the hook."""
+    try:
+        import hook_telemetry
+
+        hook_telemetry.record(hook_telemetry.Span(
+            hook=hook, event=event, start=start, duration_ms=elapsed * 1000,
+            bytes_in=len(raw), bytes_out=len(reply.get("stdout", "").encode()),
+            exit_code=reply.get("exit_code", 0),
+            session=hook_telemetry.session_id_of(raw),
+        ))
+    except Exception:
+        pass
+
+
+def main():
+    event = sys.argv[1] if len(sys.argv) > 1 else "UserPromptSubmit"
+    start, t0 = time.time(), time.perf_counter()
+    raw = sys.stdin.buffer.read()
+    raw_input = raw.decode("utf-8", "replace")
+
+    prompt = None
+    if event == "UserPromptSubmit":
+        import prompt_fastpath
+
+        prompt = prompt_fastpath.passthrough(raw)
+
+    if prompt is not None:
+        reply = {"stdout": prompt + "\n"}
+        hook = "hook_client (fast path)"
+    else:
+        try:
+            reply = forward(event, raw_input)
+            hook = "hook_client"
+        except NoReply as e:
+            # Running the hooks again here could repeat their side effects
+            # (e.g. spool a task event twice), so this invocation is skipped.
+            reply = {"stderr": f"hook_client: no reply from hookd: {e}\n"}
+            hook = "hook_client (no reply)"
+        except OSError:
+            reply = run_locally(event, raw_input)
+            hook = "hook_client (in-process)"
+
+    sys.stdout.write(reply.get("stdout", ""))
+    sys.stderr.write(reply.get("stderr", ""))
+    sys.stdout.flush()
+    if os.environ.get("CLAUDE_HOOK_TELEMETRY", "1") != "0":
+        record_span(event, start, time.perf_counter() - t0, raw, reply, hook)
+    sys.exit(reply.get("exit_code", 0))
+
+
+if __name__ == "__main__":
+    main()
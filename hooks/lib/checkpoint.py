@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Pre-compaction checkpoint for the active session.
+
+PreCompact runs while the user waits for compaction, so the checkpoint
+touches each file exactly once:
+
+  * session file   compaction_count/updated_at are updated in memory and
+                   written with one temp-file + rename; only the frontmatter
+                   is parsed, the body is copied across unchanged
+  * progress.md    compaction_count/last_updated, same single write
+  * checkpoints.md one entry appended to .sessions/journal/<id>/ (O_APPEND,
+                   earlier entries are never rewritten)
+
+It then prints the same shell assignments as `session_store.py export`,
+plus CHECKPOINT_MS and CHECKPOINT_TIMINGS, so the hook stays one process.
+
+--timings is a diagnostic: it times the phases of a dry run, which reads
+and parses every file but writes none of them, so the writes themselves
+are not included.
+
+With --hook-input the PreCompact payload is read from stdin and the
+conversation's injection record is cleared (see injection_cache.py), so
+context blocks are offered again in the next context window.
+
+Usage:
+    eval "$(checkpoint.py --hook-input --section 'TL;DR=8' --checklist 10)"
+    checkpoint.py --file .sessions/active/foo.md --timings   # Dry run
+"""
+
+import argparse
+import json
+import os
+import shlex
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import injection_cache
+import session_store
+
+JOURNAL_DIR = Path(".sessions") / "journal"
+JOURNAL_FILE = "checkpoints.md"
+
+
+@dataclass
+class Checkpoint:
+    """Outcome of one checkpoint."""
+    session_file: Path
+    frontmatter: dict[str, str]
+    progress_file: Path | None = None
+    journal_file: Path | None = None
+    # Phase name -> milliseconds.
+    timings: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.timings.values())
+
+
+class _Timer:
+    def __init__(self, timings: dict[str, float]):
+        self.timings = timings
+        self.last = time.perf_counter()
+
+    def lap(self, phase: str):
+        now = time.perf_counter()
+        self.timings[phase] = round((now - self.last) * 1000, 3)
+        self.last = now
+
+
+def journal_entry(frontmatter: dict[str, str], now: str, branch: str | None) -> str:
+    """Markdown block recorded in the journal for one compaction."""
+    lines = [f"## {now} compaction #{frontmatter.get('compaction_count', '?')}"]
+    if branch:
+        lines.append(f"- Branch: {branch}")
+    for key in ("current_step", "progress_pct"):
+        if frontmatter.get(key):
+            lines.append(f"- {key}: {frontmatter[key]}")
+    return "\n".join(lines) + "\n\n"
+
+
+def append_entry(path: Path, entry: str):
+    """Append `entry` with a single O_APPEND write."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, entry.encode())
+    finally:
+        os.close(fd)
+
+
+def checkpoint(session_file: Path, dry_run: bool = False) -> Checkpoint:
+    """Record a compaction of `session_file`; one write per file touched.
+
+    With `dry_run`, every file is read and every change worked out, but
+    nothing is written.
+    """
+    timings: dict[str, float] = {}
+    timer = _Timer(timings)
+    now = session_store.utc_now()
+
+    frontmatter = session_store.update_frontmatter(
+        session_file, {"updated_at": now}, ["compaction_count"], write=not dry_run
+    )
+    timer.lap("session")
+    result = Checkpoint(session_file=session_file, frontmatter=frontmatter, timings=timings)
+
+    session_id = frontmatter.get("id") or frontmatter.get("session_id")
+    if not session_id:
+        return result
+    journal = JOURNAL_DIR / session_id
+
+    progress_file = journal / "progress.md"
+    if progress_file.is_file():
+        session_store.update_frontmatter(progress_file, {
+            "compaction_count": frontmatter.get("compaction_count", "1"),
+            "last_updated": now,
+        }, write=not dry_run)
+        result.progress_file = progress_file
+        timer.lap("progress")
+
+    result.journal_file = journal / JOURNAL_FILE
+    entry = journal_entry(frontmatter, now, session_store.current_branch())
+    if not dry_run:
+        append_entry(result.journal_file, entry)
+    timer.lap("journal")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint the active session before compaction.")
+    parser.add_argument("--file", type=Path, help="Session file (default: active)")
+    parser.add_argument("--section", action="append", default=[], metavar="NAME=N")
+    parser.add_argument("--label", action="append", default=[], metavar="NAME=N")
+    parser.add_argument("--checklist", type=int, default=0, metavar="N")
+    parser.add_argument("--blockers", type=int, default=0, metavar="N")
+    parser.add_argument("--hook-input", action="store_true",
+                        help="Read the PreCompact hook payload from stdin")
+    parser.add_argument("--timings", action="store_true",
+                        help="Time each phase of a dry-run checkpoint (nothing is written)")
+    args = parser.parse_args()
+
+    if args.hook_input and not sys.stdin.isatty():
+        try:
+            session_id = json.load(sys.stdin).get("session_id")
+        except (ValueError, AttributeError):
+            session_id = None
+        if session_id:
+            injection_cache.forget(session_id)
+
+    session_file = args.file or session_store.get_active_session()
+    if session_file is None or not session_file.is_file():
+        print("SESSION_FILE=")
+        return
+
+    result = checkpoint(session_file, dry_run=args.timings)
+    if args.timings:
+        for phase, ms in result.timings.items():
+            print(f"{phase:<10} {ms:8.3f} ms")
+        print(f"{'total':<10} {result.total_ms:8.3f} ms")
+        return
+
+    start = time.perf_counter()
+    env = session_store.export_session(
+        session_file,
+        sections=session_store.parse_counts(args.section),
+        labels=session_store.parse_counts(args.label),
+        checklist=args.checklist,
+        blockers=args.blockers,
+    )
+    result.timings["export"] = round((time.perf_counter() - start) * 1000, 3)
+    env["CHECKPOINT_MS"] = f"{result.total_ms:.1f}"
+    env["CHECKPOINT_TIMINGS"] = " ".join(f"{k}={v:.1f}" for k, v in result.timings.items())
+    for name, value in env.items():
+        print(f"{name}={shlex.quote(value)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Token-budgeted assembly of the session context block.
+
+The session_context stage used to cap each section by line count (TL;DR 8,
+Next Steps 5, Key Context 8), so a single pasted stack trace could make
+every continuation prompt thousands of tokens long. Here each section is
+measured with a cheap local token estimate and the block is filled in
+priority order until the budget is spent:
+
+    - A section that fits is included whole.
+    - The section that crosses the budget is truncated at a line boundary
+      (or mid-line for one very long line) with a note of what was cut.
+    - Sections after that are dropped, unless at least MIN_SECTION_TOKENS
+      are left for them.
+
+estimate_tokens() is a heuristic, not a real tokenizer: ASCII words cost
+one token per four letters, digit runs one per three digits, and every
+other non-space character one token. That tracks BPE tokenizers closely
+enough for budgeting prose, code and stack traces without a dependency.
+
+Budget and priority come from the `session_context` entry of the prompt
+pipeline config (see prompt_pipeline.py):
+
+    {"stages": [...], "session_context": {"token_budget": 600,
+                                          "priority": ["TL;DR", "Next Steps", "Key Context"]}}
+
+Usage (show what would be injected for the active session):
+    context_budget.py [--budget N] [session_file]
+"""
+
+import re
+from dataclasses import dataclass, field
+
+DEFAULT_BUDGET = 600
+# Fill order; the rendered block keeps its own section order.
+DEFAULT_PRIORITY = ("TL;DR", "Next Steps", "Key Context")
+
+# Below this, a section is dropped rather than cut to a stub.
+MIN_SECTION_TOKENS = 24
+
+# Lines read from the session file per section, before budgeting.
+READ_LINES = 60
+
+_TOKEN_RE = re.compile(r"[A-Za-z]+|[0-9]+|\S")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate BPE token count of `text`."""
+    tokens = 0
+    for m in _TOKEN_RE.finditer(text):
+        piece = m.group()
+        if piece[0].isascii() and piece[0].isalpha():
+            tokens += (len(piece) + 3) // 4
+        elif piece[0].isascii() and piece[0].isdigit():
+            tokens += (len(piece) + 2) // 3
+        else:
+            tokens += 1
+    return tokens
+
+
+def _cut_line(line: str, budget: int) -> str:
+    """Longest prefix of `line` (by whole tokens) within `budget`."""
+    used = 0
+    end = 0
+    for m in _TOKEN_RE.finditer(line):
+        cost = estimate_tokens(m.group())
+        if used + cost > budget:
+            break
+        used += cost
+        end = m.end()
+    return line[:end]
+
+
+def truncate(text: str, budget: int) -> tuple[str, int, bool]:
+    """Fit `text` into `budget` tokens; returns (text, tokens, truncated)."""
+    total = estimate_tokens(text)
+    if total <= budget:
+        return text, total, False
+
+    lines = text.split("\n")
+    kept: list[str] = []
+    used = 0
+    for i, line in enumerate(lines):
+        note = f"… ({len(lines) - i} more line(s) truncated)"
+        # Keep room for the note about what was dropped.
+        room = budget - used - estimate_tokens(note)
+        cost = estimate_tokens(line)
+        if cost <= room:
+            kept.append(line)
+            used += cost
+            continue
+        if room >= MIN_SECTION_TOKENS // 2 and not kept:
+            # One very long first line: keep its beginning.
+            kept.append(_cut_line(line, room - 1) + " …")
+            note = f"… ({len(lines) - i - 1} more line(s) truncated)" if i + 1 < len(lines) else ""
+        if note:
+            kept.append(note)
+        break
+    result = "\n".join(kept)
+    return result, estimate_tokens(result), True
+
+
+@dataclass
+class Assembly:
+    sections: dict[str, str] = field(default_factory=dict)
+    # Section -> (tokens used, tokens wanted).
+    usage: dict[str, tuple[int, int]] = field(default_factory=dict)
+    overhead: int = 0
+    budget: int = DEFAULT_BUDGET
+
+    @property
+    def used(self) -> int:
+        return self.overhead + sum(used for used, _ in self.usage.values())
+
+    def report(self) -> str:
+        """One line for tuning, e.g. `412/600 tokens (TL;DR 120, ...)`."""
+        parts = []
+        for name, (used, wanted) in self.usage.items():
+            if used == wanted:
+                parts.append(f"{name} {used}")
+            elif used == 0:
+                parts.append(f"{name} dropped ({wanted})")
+            else:
+                parts.append(f"{name} {used}/{wanted}")
+        return f"{self.used}/{self.budget} tokens ({', '.join(parts)})"
+
+
+def assemble(
+    sections: dict[str, str],
+    budget: int = DEFAULT_BUDGET,
+    priority: tuple[str, ...] | list[str] = DEFAULT_PRIORITY,
+    overhead: str = "",
+) -> Assembly:
+    """Fill `budget` with `sections` in priority order.
+
+    `overhead` is the fixed text around the sections (headings, header
+    lines); its cost is taken from the budget first.
+    """
+    assembly = Assembly(budget=budget, overhead=estimate_tokens(overhead))
+    remaining = budget - assembly.overhead
+    order = [name for name in priority if name in sections]
+    order += [name for name in sections if name not in order]
+
+    for name in order:
+        text = sections[name].strip()
+        wanted = estimate_tokens(text)
+        if not text:
+            continue
+        if wanted <= remaining:
+            kept, used = text, wanted
+        elif remaining >= MIN_SECTION_TOKENS:
+            kept, used, _ = truncate(text, remaining)
+        else:
+            kept, used = "", 0
+        assembly.sections[name] = kept
+        assembly.usage[name] = (used, wanted)
+        remaining -= used
+    return assembly
+
+
+def main():
+    import argparse
+    import sys
+    from pathlib import Path
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import prompt_pipeline
+    import session_store
+
+    parser = argparse.ArgumentParser(description="Show the budgeted session context block.")
+    parser.add_argument("session_file", nargs="?", type=Path)
+    parser.add_argument("--budget", type=int, help="Override the configured token budget")
+    args = parser.parse_args()
+
+    session_file = args.session_file or session_store.get_active_session()
+    if session_file is None:
+        print("context_budget: no active session", file=sys.stderr)
+        sys.exit(1)
+    block, assembly = prompt_pipeline.session_block(session_file, args.budget)
+    print(block)
+    print(f"\n[{assembly.report()}]", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Per-package Go coverage profiles, cached by the content of the package.
+
+The coverage hook used to run `go test -cover` on every edit and report
+one percentage. Here each run's per-function coverage (`go tool cover
+-func`) is stored under a hash of the package's .go files (sources and
+tests), its testdata directory and embedded files, the sources and embedded
+files of every package in the same module that it or its tests import
+(`go list -deps -test`), and the module's go.mod and go.sum. An edit that
+leaves all of those in a state they have been in before (a reverted change,
+a no-op Write) replays the stored profile instead of running the tests, and
+the report says so. Only passing runs are stored, so a flaky failure or a
+timeout is retried on the next edit. Packages from other modules are
+covered through go.mod/go.sum only; a local `replace` directory is not.
+
+Each report is a delta against the package's previous passing profile: the total,
+then the functions that gained or lost coverage, were added or removed.
+
+Profiles live under ~/.cache/claude-hooks/coverage/<package>/, the newest
+MAX_PROFILES per package.
+
+Usage:
+    coverage_cache.py notify     # Hook: read the PostToolUse payload on stdin
+    coverage_cache.py show DIR   # Coverage of one package (runs if needed)
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+CACHE_DIR = Path.home() / ".cache" / "claude-hooks" / "coverage"
+MAX_PROFILES = 20
+
+TEST_TIMEOUT = "30s"
+
+# Functions listed per report; the rest are summarized.
+MAX_DELTA_LINES = 10
+
+GO_TOOLS = ("Edit", "Write", "MultiEdit")
+
+
+def module_root(path: Path) -> Path | None:
+    """Nearest directory at or above `path` with a go.mod."""
+    for directory in (path, *path.parents):
+        if (directory / "go.mod").is_file():
+            return directory
+    return None
+
+
+# One line per package: its directory, then the files that build it.
+DEPS_FORMAT = "\t".join([
+    "{{.Dir}}{{range .GoFiles}}",
+    "{{.}}{{end}}{{range .CgoFiles}}",
+    "{{.}}{{end}}{{range .EmbedFiles}}",
+    "{{.}}{{end}}{{range .TestEmbedFiles}}",
+    "{{.}}{{end}}{{range .XTestEmbedFiles}}",
+    "{{.}}{{end}}",
+])
+
+
+def dependency_files(package_dir: Path, root: Path) -> list[Path] | None:
+    """Build inputs of the package and its same-module dependencies.
+
+    Covers the package's embedded files and the Go sources and embedded
+    files of everything it or its tests import from this module. None if
+    `go list` can't run.
+    """
+    try:
+        listed = subprocess.run(
+            ["go", "list", "-e", "-deps", "-test", "-f", DEPS_FORMAT, "."],
+            cwd=package_dir, capture_output=True, text=True, timeout=30,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if listed.returncode != 0:
+        return None
+    files = set()
+    for line in listed.stdout.splitlines():
+        directory, *names = line.split("\t")
+        for name in filter(None, names):
+            # An absolute name is the generated test main in the build cache.
+            path = Path(directory) / name
+            if path.is_relative_to(root) and not os.path.isabs(name):
+                files.add(path)  # Not the standard library or another module.
+    return sorted(p for p in files if p.is_file())
+
+
+def content_key(package_dir: Path, root: Path) -> str:
+    """Hash of every input that can change the package's coverage."""
+    digest = hashlib.sha256()
+    inputs = sorted(p for p in package_dir.glob("*.go") if p.is_file())
+    testdata = package_dir / "testdata"
+    if testdata.is_dir():
+        inputs += sorted(p for p in testdata.rglob("*") if p.is_file())
+    deps = dependency_files(package_dir, root)
+    if deps is None:
+        # Never matches a key computed with the dependencies.
+        digest.update(b"deps unknown\0")
+    else:
+        local = set(inputs)
+        inputs += [p for p in deps if p not in local]
+    inputs += [p for p in (root / "go.mod", root / "go.sum") if p.is_file()]
+    for path in inputs:
+        digest.update(str(path.relative_to(root)).encode() + b"\0")
+        digest.update(path.read_bytes())
+        digest.update(b"\0")
+    return digest.hexdigest()[:24]
+
+
+@dataclass
+class Profile:
+    key: str
+    passed: bool
+    total: float | None
+    # "file.go:Func" -> percent of statements covered.
+    functions: dict[str, float] = field(default_factory=dict)
+    created: float = 0.0
+    output: str = ""
+
+
+def _parse_func_output(text: str) -> tuple[float | None, dict[str, float]]:
+    """Parse `go tool cover -func` lines: `pkg/file.go:12:\tName\t\t85.7%`."""
+    total = None
+    functions = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) < 3 or not parts[-1].endswith("%"):
+            continue
+        percent = float(parts[-1].rstrip("%"))
+        if parts[0] == "total:":
+            total = percent
+        else:
+            file_name = os.path.basename(parts[0].split(":", 1)[0])
+            functions[f"{file_name}:{parts[1]}"] = percent
+    return total, functions
+
+
+def run_coverage(package_dir: Path, key: str) -> Profile:
+    """Run the package's tests with a coverage profile."""
+    with tempfile.TemporaryDirectory(prefix="claude-cover-") as tmp:
+        profile_path = os.path.join(tmp, "cover.out")
+        test = subprocess.run(
+            ["go", "test", "-timeout", TEST_TIMEOUT, f"-coverprofile={profile_path}", "."],
+            cwd=package_dir, capture_output=True, text=True,
+        )
+        total, functions = None, {}
+        if os.path.exists(profile_path):
+            func = subprocess.run(
+                ["go", "tool", "cover", f"-func={profile_path}"],
+                cwd=package_dir, capture_output=True, text=True,
+            )
+            total, functions = _parse_func_output(func.stdout)
+    output = "" if test.returncode == 0 else "\n".join(
+        (test.stdout + test.stderr).splitlines()[-10:]
+    )
+    return Profile(key, test.returncode == 0, total, functions, time.time(), output)
+
+
+class PackageCache:
+    """Stored profiles of one package, plus which one was reported last."""
+
+    def __init__(self, package_dir: Path):
+        name = hashlib.sha1(str(package_dir).encode()).hexdigest()[:16]
+        self.dir = CACHE_DIR / name
+        self.latest_file = self.dir / "latest"
+
+    def get(self, key: str) -> Profile | None:
+        try:
+            return Profile(**json.loads((self.dir / f"{key}.json").read_text()))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+
+    def latest(self) -> Profile | None:
+        try:
+            return self.get(self.latest_file.read_text().strip())
+        except FileNotFoundError:
+            return None
+
+    def put(self, profile: Profile):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._write(self.dir / f"{profile.key}.json", json.dumps(asdict(profile)))
+        profiles = sorted(self.dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for stale in profiles[:-MAX_PROFILES]:
+            stale.unlink(missing_ok=True)
+
+    def set_latest(self, key: str):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._write(self.latest_file, key + "\n")
+
+    @staticmethod
+    def _write(path: Path, text: str):
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(text)
+        os.replace(tmp, path)
+
+
+def describe_delta(previous: Profile | None, current: Profile) -> list[str]:
+    """Functions whose coverage changed between two profiles."""
+    if previous is None or previous.key == current.key:
+        return []
+    before, after = previous.functions, current.functions
+    gained, lost, added, removed = [], [], [], []
+    for name, percent in after.items():
+        if name not in before:
+            added.append(f"   + {name} {percent:.1f}% (new)")
+        elif percent > before[name]:
+            gained.append(f"   ↑ {name} {before[name]:.1f}% → {percent:.1f}%")
+        elif percent < before[name]:
+            lost.append(f"   ↓ {name} {before[name]:.1f}% → {percent:.1f}%")
+    for name in before:
+        if name not in after:
+            removed.append(f"   - {name} (removed)")
+
+    lines = lost + gained + added + removed
+    if len(lines) > MAX_DELTA_LINES:
+        extra = len(lines) - MAX_DELTA_LINES
+        lines = lines[:MAX_DELTA_LINES] + [f"   … {extra} more function(s) changed"]
+    return lines
+
+
+def report(package_dir: Path) -> str:
+    """Coverage of one package, with changes since the last report."""
+    package_dir = package_dir.resolve()
+    root = module_root(package_dir)
+    if root is None:
+        return ""
+    cache = PackageCache(package_dir)
+    key = content_key(package_dir, root)
+
+    current = cache.get(key)
+    cached = current is not None
+    if current is None:
+        current = run_coverage(package_dir, key)
+        # Failures (a flaky test, a TEST_TIMEOUT hit) are re-run next time
+        # rather than replayed until the sources change.
+        if current.passed:
+            cache.put(current)
+    previous = cache.latest()
+    if current.passed:
+        cache.set_latest(key)
+
+    rel = os.path.relpath(package_dir, root)
+    label = "." if rel == "." else f"./{rel}"
+    suffix = " (inputs unchanged, replayed from cache)" if cached else ""
+    if not current.passed:
+        lines = [f"📈 Coverage for {label}: tests failed{suffix}"]
+        lines += [f"   {line}" for line in current.output.splitlines()]
+        return "\n".join(lines) + "\n"
+    if current.total is None:
+        return f"📈 Coverage for {label}: no statements{suffix}\n"
+
+    headline = f"📈 Coverage for {label}: {current.total:.1f}%"
+    if previous is not None and previous.key != key and previous.total is not None:
+        headline += f" ({current.total - previous.total:+.1f})"
+    lines = [headline + suffix] + describe_delta(previous, current)
+    return "\n".join(lines) + "\n"
+
+
+def notify():
+    """PostToolUse hook entry point."""
+    try:
+        input_data = json.load(sys.stdin)
+    except json.JSONDecodeError:
+        return
+    tool = input_data.get("tool_name") or input_data.get("tool") or ""
+    params = input_data.get("tool_input") or input_data.get("parameters") or {}
+    file_path = params.get("file_path") or ""
+    if tool not in GO_TOOLS or not file_path.endswith(".go"):
+        return
+    directory = Path(file_path).parent
+    if directory.is_dir():
+        sys.stdout.write(report(directory))
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "notify":
+        notify()
+    elif command == "show" and len(sys.argv) == 3:
+        sys.stdout.write(report(Path(sys.argv[2])) or "coverage_cache: not inside a Go module\n")
+    else:
+        print(__doc__, file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
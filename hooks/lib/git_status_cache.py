@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+Cached git status for the PostToolUse hook and the status line.
+
+The status line ran `git branch` and `git status --porcelain` on every
+render, and git_status_refresh.sh ran `git status` twice after every edit.
+On a large repository each of those walks the whole work tree.
+
+A small daemon keeps a snapshot per repository (branch, ahead/behind,
+short-format entries) in ~/.cache/claude-hooks/gitstatus/<hash>.json:
+
+    - The status line reads the snapshot file and pings the daemon so it
+      keeps the repository fresh. It never runs git itself unless there is
+      no snapshot yet.
+    - The PostToolUse hook asks the daemon for an immediate refresh (the
+      edit just changed the tree) and prints the result.
+    - While a repository is in use the daemon re-runs `git status` right
+      away when HEAD or the index changes (checkouts, commits, staging),
+      and otherwise only as a slow backstop for edits made outside the
+      hooks: every CLAUDE_GITSTATUS_INTERVAL seconds, or every
+      FSMONITOR_INTERVAL_SECONDS in a repository with core.fsmonitor
+      configured, where an unchanged tree is cheap to re-check.
+      Repositories that haven't been read for IDLE_SECONDS are dropped,
+      and the daemon exits once it has nothing left to watch.
+
+Refreshes run `git --no-optional-locks status` so they never hold the
+index lock while you use git. The repository's own core.untrackedCache
+and core.fsmonitor settings apply; nothing is forced on, since the
+untracked cache is never written under --no-optional-locks and forcing
+fsmonitor would start a daemon in every repository the status line sees.
+
+Usage:
+    git_status_cache.py hook         # PostToolUse: payload on stdin
+    git_status_cache.py statusline   # statusLine: payload on stdin
+    git_status_cache.py show         # Print the snapshot for the cwd
+    git_status_cache.py start|serve|stop|status
+
+Environment:
+    CLAUDE_GITSTATUS_SOCKET    Socket path (default ~/.claude/run/gitstatus.sock)
+    CLAUDE_GITSTATUS_INTERVAL  Seconds between backstop refreshes of an active
+                               repo without fsmonitor (default 30)
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+SNAPSHOT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "claude-hooks", "gitstatus")
+
+IDLE_SECONDS = 600
+# How often the daemon checks HEAD/index and poll deadlines.
+TICK_SECONDS = 0.25
+# Backstop refresh interval of repositories without fsmonitor, where each
+# `git status` walks the whole work tree.
+DEFAULT_INTERVAL_SECONDS = 30
+# Backstop interval where core.fsmonitor makes an unchanged status cheap.
+FSMONITOR_INTERVAL_SECONDS = 3
+# Hook callers wait this long for a fresh snapshot before using the old one.
+REFRESH_WAIT_SECONDS = 2
+
+# Entries printed by the PostToolUse hook before it just shows a count.
+MAX_LISTED = 5
+
+EDIT_TOOLS = ("Edit", "Write", "MultiEdit")
+
+
+def socket_path() -> str:
+    return os.environ.get("CLAUDE_GITSTATUS_SOCKET") or os.path.join(
+        os.path.expanduser("~"), ".claude", "run", "gitstatus.sock"
+    )
+
+
+def pid_path() -> str:
+    return os.path.splitext(socket_path())[0] + ".pid"
+
+
+def log_path() -> str:
+    return os.path.splitext(socket_path())[0] + ".log"
+
+
+def repo_root(path: str) -> str | None:
+    """Nearest directory at or above `path` containing .git."""
+    path = os.path.abspath(path)
+    while True:
+        if os.path.exists(os.path.join(path, ".git")):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def git_dir(root: str) -> str:
+    """The repository's git directory (worktrees have a .git file)."""
+    dot_git = os.path.join(root, ".git")
+    if os.path.isfile(dot_git):
+        with open(dot_git) as f:
+            line = f.readline().strip()
+        if line.startswith("gitdir:"):
+            return os.path.join(root, line[len("gitdir:"):].strip())
+    return dot_git
+
+
+def snapshot_path(root: str) -> str:
+    name = hashlib.sha1(root.encode()).hexdigest()[:16]
+    return os.path.join(SNAPSHOT_DIR, f"{name}.json")
+
+
+def read_snapshot(root: str) -> dict | None:
+    try:
+        with open(snapshot_path(root)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _parse_branch(header: str) -> dict:
+    """Parse the `## ...` line of `git status --branch`."""
+    info = {"branch": "", "detached": False, "ahead": 0, "behind": 0}
+    header = header[3:]
+    if header.startswith("HEAD (no branch)"):
+        info["detached"] = True
+        return info
+    for prefix in ("No commits yet on ", "Initial commit on "):
+        if header.startswith(prefix):
+            info["branch"] = header[len(prefix):]
+            return info
+    head, _, tracking = header.partition(" [")
+    info["branch"] = head.split("...", 1)[0]
+    for part in tracking.rstrip("]").split(", "):
+        kind, _, count = part.partition(" ")
+        if kind in ("ahead", "behind") and count.isdigit():
+            info[kind] = int(count)
+    return info
+
+
+def collect(root: str) -> dict:
+    """Run `git status` once and build a snapshot."""
+    import subprocess
+
+    args = ["git", "--no-optional-locks", "-C", root, "status", "--porcelain=v1", "-z", "--branch"]
+    result = subprocess.run(args, capture_output=True, timeout=60)
+
+    fields = result.stdout.decode(errors="replace").split("\0")
+    snapshot = {"root": root, "updated": time.time(), "ok": result.returncode == 0,
+                "branch": "", "detached": False, "ahead": 0, "behind": 0, "entries": []}
+    i = 0
+    while i < len(fields):
+        entry = fields[i]
+        i += 1
+        if not entry:
+            continue
+        if entry.startswith("## "):
+            snapshot.update(_parse_branch(entry))
+            continue
+        status, path = entry[:2], entry[3:]
+        if status[0] in "RC":
+            # Renames and copies are followed by the source path.
+            path = f"{fields[i]} -> {path}"
+            i += 1
+        snapshot["entries"].append(f"{status} {path}")
+    return snapshot
+
+
+def write_snapshot(snapshot: dict):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    path = snapshot_path(snapshot["root"])
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp, path)
+
+
+def refresh(root: str) -> dict:
+    snapshot = collect(root)
+    write_snapshot(snapshot)
+    return snapshot
+
+
+def uses_fsmonitor(root: str) -> bool:
+    """Whether the repository's own config turns on an fsmonitor."""
+    import subprocess
+
+    try:
+        result = subprocess.run(
+            ["git", "-C", root, "config", "--get", "core.fsmonitor"],
+            capture_output=True, text=True, timeout=10,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    value = result.stdout.strip().lower()
+    return bool(value) and value not in ("false", "no", "off", "0")
+
+
+class _Repo:
+    def __init__(self, root: str):
+        import threading
+
+        self.root = root
+        self.git_dir = git_dir(root)
+        self.lock = threading.Lock()
+        self.last_seen = time.monotonic()
+        self.refreshed = 0.0
+        self.signature = None
+        self.fsmonitor = uses_fsmonitor(root)
+
+    def current_signature(self) -> tuple:
+        stamps = []
+        for name in ("HEAD", "index"):
+            try:
+                st = os.stat(os.path.join(self.git_dir, name))
+                stamps.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    def refresh(self) -> dict:
+        with self.lock:
+            snapshot = refresh(self.root)
+            self.refreshed = time.monotonic()
+            # Taken after the refresh, so git's own index writes don't
+            # trigger another one.
+            self.signature = self.current_signature()
+            return snapshot
+
+
+class _Daemon:
+    def __init__(self):
+        import threading
+
+        self.repos: dict[str, _Repo] = {}
+        self.lock = threading.Lock()
+        self.last_request = time.monotonic()
+        self.interval = float(os.environ.get("CLAUDE_GITSTATUS_INTERVAL", DEFAULT_INTERVAL_SECONDS))
+
+    def repo(self, root: str) -> _Repo:
+        with self.lock:
+            self.last_request = time.monotonic()
+            repo = self.repos.get(root)
+            if repo is None:
+                repo = self.repos[root] = _Repo(root)
+            repo.last_seen = self.last_request
+            return repo
+
+    def poll(self, server):
+        """Keep active repositories fresh; stop the server once idle."""
+        while True:
+            time.sleep(TICK_SECONDS)
+            now = time.monotonic()
+            with self.lock:
+                for root, repo in list(self.repos.items()):
+                    if now - repo.last_seen > IDLE_SECONDS:
+                        del self.repos[root]
+                repos = list(self.repos.values())
+                idle = not repos and now - self.last_request > IDLE_SECONDS
+            if idle:
+                server.shutdown()
+                return
+            for repo in repos:
+                interval = min(self.interval, FSMONITOR_INTERVAL_SECONDS) if repo.fsmonitor else self.interval
+                due = now - repo.refreshed >= interval
+                if due or repo.current_signature() != repo.signature:
+                    try:
+                        repo.refresh()
+                    except Exception as e:
+                        print(f"gitstatus: refresh of {repo.root} failed: {e}", file=sys.stderr)
+
+
+def serve():
+    """Serve requests in the foreground until SIGTERM/SIGINT or idle."""
+    import signal
+    import socketserver
+    import threading
+
+    daemon = _Daemon()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            data = self.rfile.read()
+            if not data:
+                return  # Liveness probe.
+            try:
+                request = json.loads(data)
+                repo = daemon.repo(request["root"])
+                reply = repo.refresh() if request["op"] == "refresh" else {}
+                self.wfile.write(json.dumps(reply).encode())
+            except Exception as e:
+                print(f"gitstatus: {e}", file=sys.stderr)
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    path = socket_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True, mode=0o700)
+    if os.path.exists(path):
+        if _is_running():
+            print(f"gitstatus: already running on {path}", file=sys.stderr)
+            sys.exit(1)
+        os.unlink(path)
+
+    server = Server(path, Handler)
+    os.chmod(path, 0o600)
+    with open(pid_path(), "w") as f:
+        f.write(f"{os.getpid()}\n")
+
+    def _shutdown(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    threading.Thread(target=daemon.poll, args=(server,), daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for stale in (path, pid_path()):
+            try:
+                os.unlink(stale)
+            except FileNotFoundError:
+                pass
+
+
+def _connect(timeout: float):
+    import socket
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(socket_path())
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _is_running() -> bool:
+    try:
+        _connect(0.5).close()
+        return True
+    except OSError:
+        return False
+
+
+def _request(request: dict, timeout: float) -> dict:
+    import socket
+
+    sock = _connect(timeout)
+    try:
+        sock.sendall(json.dumps(request).encode())
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while chunk := sock.recv(65536):
+            chunks.append(chunk)
+    finally:
+        sock.close()
+    return json.loads(b"".join(chunks) or b"{}")
+
+
+def _start_in_background():
+    import subprocess
+
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "start"],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+
+
+def start():
+    """Detach from the terminal and serve in the background."""
+    if _is_running():
+        return
+    if os.fork() > 0:
+        return
+    os.setsid()
+    if os.fork() > 0:
+        os._exit(0)
+
+    os.makedirs(os.path.dirname(socket_path()), exist_ok=True, mode=0o700)
+    log = open(log_path(), "a")
+    devnull = open(os.devnull, "r")
+    os.dup2(devnull.fileno(), 0)
+    os.dup2(log.fileno(), 1)
+    os.dup2(log.fileno(), 2)
+    serve()
+    os._exit(0)
+
+
+def stop():
+    import signal
+
+    try:
+        with open(pid_path()) as f:
+            pid = int(f.read().strip())
+    except (FileNotFoundError, ValueError):
+        print("gitstatus: not running")
+        return
+    try:
+        os.kill(pid, signal.SIGTERM)
+        print(f"gitstatus: stopped (pid {pid})")
+    except ProcessLookupError:
+        print("gitstatus: not running (stale pid file)")
+        os.unlink(pid_path())
+
+
+def fresh_snapshot(root: str) -> dict:
+    """Snapshot refreshed by the daemon, or by this process as a fallback."""
+    try:
+        snapshot = _request({"op": "refresh", "root": root}, REFRESH_WAIT_SECONDS)
+        if snapshot:
+            return snapshot
+    except (OSError, ValueError):
+        _start_in_background()
+    return refresh(root)
+
+
+def watched_snapshot(root: str) -> dict:
+    """Current snapshot file; tells the daemon the repository is in use."""
+    try:
+        _request({"op": "watch", "root": root}, 0.2)
+    except (OSError, ValueError):
+        _start_in_background()
+    return read_snapshot(root) or refresh(root)
+
+
+def hook():
+    """PostToolUse: show what's been changed after a file modification."""
+    try:
+        input_data = json.load(sys.stdin)
+    except json.JSONDecodeError:
+        return
+    tool = input_data.get("tool_name") or input_data.get("tool") or ""
+    if tool not in EDIT_TOOLS:
+        return
+    root = repo_root(os.getcwd())
+    if root is None:
+        return
+
+    entries = fresh_snapshot(root)["entries"]
+    if entries:
+        print("")
+        print(f"📊 Git Status: {len(entries)} file(s) modified")
+        if len(entries) <= MAX_LISTED:
+            print("\n".join(entries))
+        else:
+            print("   Run 'git status' to see all changes")
+
+
+def statusline():
+    """statusLine: `⛰ user | dir [branch] * | model` from the snapshot."""
+    import getpass
+
+    try:
+        input_data = json.load(sys.stdin)
+    except json.JSONDecodeError:
+        input_data = {}
+    cwd = (input_data.get("workspace") or {}).get("current_dir") or os.getcwd()
+    model = (input_data.get("model") or {}).get("display_name", "")
+
+    git_info = ""
+    root = repo_root(cwd)
+    snapshot = watched_snapshot(root) if root is not None else {}
+    # A failed refresh has no branch; show nothing rather than "detached".
+    if snapshot.get("ok"):
+        branch = snapshot.get("branch")
+        git_info = f" [{branch}]" if branch and not snapshot.get("detached") else " [detached]"
+        if snapshot.get("entries"):
+            git_info += " *"
+    sys.stdout.write(f"⛰ {getpass.getuser()} | {os.path.basename(cwd)}{git_info} | {model}")
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "show"
+    if command == "hook":
+        hook()
+    elif command == "statusline":
+        statusline()
+    elif command == "show":
+        root = repo_root(os.getcwd())
+        if root is None:
+            print("gitstatus: not inside a git repository")
+            sys.exit(1)
+        print(json.dumps(read_snapshot(root) or refresh(root), indent=2))
+    elif command == "serve":
+        serve()
+    elif command == "start":
+        start()
+    elif command == "stop":
+        stop()
+    elif command == "status":
+        if _is_running():
+            print(f"gitstatus: running on {socket_path()}")
+        else:
+            print("gitstatus: not running")
+            sys.exit(1)
+    else:
+        print(__doc__, file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,582 @@
+#!/usr/bin/env python3
+"""
+Background Go test runner for the PostToolUse hook.
+
+The hook used to run `go test` synchronously after every edit, so a burst
+of edits to one package meant a queue of serial test runs blocking Claude.
+This service takes the test runs off the hook's critical path:
+
+    - Edits are coalesced per module; tests start once no edit has arrived
+      for the debounce window.
+    - The affected packages are the edited ones plus every package in the
+      main module that depends on them (from `go list`), and packages whose
+      tests import one of those.
+    - Runs go to a bounded worker pool, one `go test` per package. A new
+      batch supersedes queued or running tests of the same package: queued
+      runs are dropped and running ones are killed.
+    - The hook gets the latest finished result for the edited package and
+      its dependents straight away; results are also kept in
+      ~/.cache/claude-hooks/gotest so they survive a restart.
+    - A run that can't start (no `go` on PATH) or is killed after
+      PROCESS_TIMEOUT_SECONDS is reported as an error, not a test failure.
+    - The service exits once it has had no request for IDLE_SECONDS and
+      has nothing queued or running; the hook restarts it on demand.
+
+Usage:
+    go_test_service.py notify    # Hook: read the PostToolUse payload on stdin
+    go_test_service.py status    # Latest results for the current module
+    go_test_service.py start     # Start in the background (no-op if running)
+    go_test_service.py serve     # Run in the foreground
+    go_test_service.py stop      # Stop a running service
+
+Environment:
+    CLAUDE_GOTEST_SOCKET        Socket path (default ~/.claude/run/gotest.sock)
+    CLAUDE_GOTEST_DEBOUNCE      Seconds of quiet before a run (default 2)
+    CLAUDE_GOTEST_WORKERS       Concurrent `go test` processes (default 2)
+    CLAUDE_GOTEST_MAX_PACKAGES  Most packages tested per batch (default 20)
+"""
+
+import hashlib
+import json
+import os
+import queue
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+RESULTS_DIR = Path.home() / ".cache" / "claude-hooks" / "gotest"
+
+# Passed to `go test -timeout`; the process itself gets extra time to build.
+TEST_TIMEOUT = "30s"
+PROCESS_TIMEOUT_SECONDS = 300
+
+# Lines of `go test` output kept for a failed package.
+OUTPUT_TAIL_LINES = 15
+
+# Exit after this long without a request once nothing is queued or running.
+IDLE_SECONDS = 600
+# How often the idle check runs.
+IDLE_CHECK_SECONDS = 30
+
+GO_TOOLS = ("Edit", "Write", "MultiEdit")
+
+LIST_FORMAT = (
+    "{{.ImportPath}}\t{{.Dir}}\t{{join .Imports \" \"}}\t"
+    "{{join .TestImports \" \"}} {{join .XTestImports \" \"}}"
+)
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def socket_path() -> Path:
+    override = os.environ.get("CLAUDE_GOTEST_SOCKET")
+    if override:
+        return Path(override)
+    return Path.home() / ".claude" / "run" / "gotest.sock"
+
+
+def pid_path() -> Path:
+    return socket_path().with_suffix(".pid")
+
+
+def log_path() -> Path:
+    return socket_path().with_suffix(".log")
+
+
+def module_root(path: Path) -> Path | None:
+    """Nearest directory at or above `path` with a go.mod."""
+    for directory in (path, *path.parents):
+        if (directory / "go.mod").is_file():
+            return directory
+    return None
+
+
+@dataclass
+class PackageGraph:
+    """Main-module packages and who imports them."""
+    by_dir: dict[str, str] = field(default_factory=dict)
+    dirs: dict[str, str] = field(default_factory=dict)
+    importers: dict[str, set[str]] = field(default_factory=dict)
+    test_importers: dict[str, set[str]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, root: Path) -> "PackageGraph":
+        result = subprocess.run(
+            ["go", "list", "-e", "-f", LIST_FORMAT, "./..."],
+            cwd=root, capture_output=True, text=True, timeout=120,
+        )
+        graph = cls()
+        for line in result.stdout.splitlines():
+            pkg, directory, imports, test_imports = (line.split("\t") + ["", "", ""])[:4]
+            graph.by_dir[directory] = pkg
+            graph.dirs[pkg] = directory
+            for dep in imports.split():
+                graph.importers.setdefault(dep, set()).add(pkg)
+            for dep in test_imports.split():
+                graph.test_importers.setdefault(dep, set()).add(pkg)
+        return graph
+
+    def affected(self, edited: list[str]) -> list[str]:
+        """`edited` and its reverse dependencies, nearest first."""
+        order = [pkg for pkg in edited if pkg in self.dirs]
+        seen = set(order)
+        i = 0
+        while i < len(order):
+            for importer in sorted(self.importers.get(order[i], ())):
+                if importer not in seen:
+                    seen.add(importer)
+                    order.append(importer)
+            i += 1
+        # Test code is never imported, so test imports only add one level.
+        for pkg in list(order):
+            for importer in sorted(self.test_importers.get(pkg, ())):
+                if importer not in seen:
+                    seen.add(importer)
+                    order.append(importer)
+        return order
+
+
+@dataclass
+class Result:
+    package: str
+    status: str  # "passed", "failed" or "error"
+    output: str
+    seconds: float
+    finished: float
+    # Module-relative directory, for display before `go list` has run.
+    name: str = ""
+
+
+@dataclass
+class Job:
+    root: Path
+    package: str
+    generation: int
+
+
+class Module:
+    """Per-module state: pending edits, latest batch, results."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.pending: set[str] = set()
+        self.deadline = 0.0
+        self.graph: PackageGraph | None = None
+        self.generation = 0
+        # Package -> generation of the newest batch that includes it.
+        self.latest: dict[str, int] = {}
+        self.running: dict[str, tuple[int, subprocess.Popen]] = {}
+        self.results: dict[str, Result] = {}
+        self.last_batch: list[str] = []
+        self.skipped = 0
+        self._load_results()
+
+    @property
+    def results_file(self) -> Path:
+        key = hashlib.sha1(str(self.root).encode()).hexdigest()[:16]
+        return RESULTS_DIR / f"{key}.json"
+
+    def _load_results(self):
+        try:
+            data = json.loads(self.results_file.read_text())
+            self.results = {r["package"]: Result(**r) for r in data["results"]}
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            pass
+
+    def save_results(self):
+        try:
+            RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = self.results_file.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({
+                "root": str(self.root),
+                "results": [asdict(r) for r in self.results.values()],
+            }))
+            os.replace(tmp, self.results_file)
+        except OSError:
+            pass
+
+    def display(self, pkg: str) -> str:
+        directory = self.graph.dirs.get(pkg) if self.graph else None
+        if directory:
+            rel = os.path.relpath(directory, self.root)
+            return "." if rel == "." else f"./{rel}"
+        result = self.results.get(pkg)
+        return result.name if result and result.name else pkg
+
+
+class Service:
+    def __init__(self):
+        self.lock = threading.Condition()
+        self.modules: dict[Path, Module] = {}
+        self.jobs: queue.Queue[Job] = queue.Queue()
+        self.debounce = _env_number("CLAUDE_GOTEST_DEBOUNCE", 2)
+        self.max_packages = int(_env_number("CLAUDE_GOTEST_MAX_PACKAGES", 20))
+        self.last_request = time.monotonic()
+        workers = max(1, int(_env_number("CLAUDE_GOTEST_WORKERS", 2)))
+
+        threading.Thread(target=self._scheduler, daemon=True).start()
+        for _ in range(workers):
+            threading.Thread(target=self._worker, daemon=True).start()
+
+    def module(self, root: Path) -> Module:
+        if root not in self.modules:
+            self.modules[root] = Module(root)
+        return self.modules[root]
+
+    def edit(self, file_path: Path) -> str:
+        """Queue an edited file and report the latest results that cover it."""
+        root = module_root(file_path.parent)
+        if root is None:
+            return ""
+        with self.lock:
+            self.last_request = time.monotonic()
+            module = self.module(root)
+            module.pending.add(str(file_path.parent))
+            module.deadline = time.monotonic() + self.debounce
+            self.lock.notify()
+            return self._report(module, str(file_path.parent))
+
+    def _report(self, module: Module, directory: str) -> str:
+        pkg = module.graph.by_dir.get(directory) if module.graph else None
+        if pkg and module.graph:
+            interest = module.graph.affected([pkg])[: self.max_packages]
+        else:
+            interest = list(module.results)
+        results = [module.results[p] for p in interest if p in module.results]
+
+        rel = os.path.relpath(directory, module.root)
+        lines = [f"🧪 Tests queued for {'.' if rel == '.' else './' + rel}"]
+        failed = [r for r in results if r.status != "passed"]
+        passed = [r for r in results if r.status == "passed"]
+        for r in failed:
+            age = int(time.time() - r.finished)
+            what = "failed" if r.status == "failed" else "could not run"
+            lines.append(f"❌ Tests {what} for {module.display(r.package)} ({age}s ago)")
+            lines.extend(f"   {line}" for line in r.output.splitlines())
+        if passed:
+            names = ", ".join(module.display(r.package) for r in passed)
+            lines.append(f"✅ Tests passed for {names}")
+        if failed:
+            lines.append("   Review the output above and fix any failing tests.")
+        if module.skipped:
+            lines.append(f"   ({module.skipped} more dependent package(s) over the limit not run)")
+        return "\n".join(lines) + "\n"
+
+    def _scheduler(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                due = [m for m in self.modules.values() if m.pending and m.deadline <= now]
+                if not due:
+                    waits = [m.deadline - now for m in self.modules.values() if m.pending]
+                    self.lock.wait(timeout=min(waits) if waits else None)
+                    continue
+                batches = []
+                for module in due:
+                    batches.append((module, sorted(module.pending)))
+                    module.pending.clear()
+            # `go list` can take a while; edits keep arriving meanwhile.
+            for module, dirs in batches:
+                self._schedule(module, dirs)
+
+    def _schedule(self, module: Module, dirs: list[str]):
+        try:
+            graph = PackageGraph.load(module.root)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"gotest: go list failed in {module.root}: {e}", file=sys.stderr)
+            return
+        edited = [graph.by_dir[d] for d in dirs if d in graph.by_dir]
+        packages = graph.affected(edited)
+
+        with self.lock:
+            module.graph = graph
+            module.generation += 1
+            module.last_batch = packages[: self.max_packages]
+            module.skipped = len(packages) - len(module.last_batch)
+            for pkg in module.last_batch:
+                module.latest[pkg] = module.generation
+                running = module.running.get(pkg)
+                if running:
+                    _kill(running[1])
+                self.jobs.put(Job(module.root, pkg, module.generation))
+
+    def _worker(self):
+        while True:
+            job = self.jobs.get()
+            with self.lock:
+                module = self.modules[job.root]
+                if module.latest.get(job.package) != job.generation:
+                    continue  # Superseded while queued.
+                try:
+                    proc = subprocess.Popen(
+                        ["go", "test", "-timeout", TEST_TIMEOUT, job.package],
+                        cwd=job.root, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                        text=True, start_new_session=True,
+                    )
+                except OSError as e:
+                    # Keep the worker: record the error and take the next job.
+                    self._record(module, job.package, "error", f"could not start go test: {e}", 0.0)
+                    continue
+                module.running[job.package] = (job.generation, proc)
+
+            start = time.monotonic()
+            timed_out = False
+            try:
+                output, _ = proc.communicate(timeout=PROCESS_TIMEOUT_SECONDS)
+            except subprocess.TimeoutExpired:
+                _kill(proc)
+                output, _ = proc.communicate()
+                timed_out = True
+            seconds = time.monotonic() - start
+
+            with self.lock:
+                if module.running.get(job.package, (None,))[0] == job.generation:
+                    del module.running[job.package]
+                if module.latest.get(job.package) != job.generation:
+                    continue  # Killed by a newer batch.
+                tail = "\n".join(output.splitlines()[-OUTPUT_TAIL_LINES:])
+                if timed_out:
+                    status = "error"
+                    tail = f"killed after {PROCESS_TIMEOUT_SECONDS}s\n{tail}".rstrip()
+                else:
+                    status = "passed" if proc.returncode == 0 else "failed"
+                self._record(module, job.package, status, "" if status == "passed" else tail, seconds)
+
+    def _record(self, module: Module, pkg: str, status: str, output: str, seconds: float):
+        """Store a finished run's result; call with the lock held."""
+        module.results[pkg] = Result(
+            pkg, status, output, round(seconds, 2), time.time(), module.display(pkg),
+        )
+        module.save_results()
+
+    def idle(self) -> bool:
+        """No request for IDLE_SECONDS and nothing pending, queued or running."""
+        with self.lock:
+            busy = any(m.pending or m.running for m in self.modules.values())
+            return (
+                not busy
+                and self.jobs.empty()
+                and time.monotonic() - self.last_request > IDLE_SECONDS
+            )
+
+    def watch_idle(self, server: socketserver.BaseServer):
+        """Stop the server once the service has been idle long enough."""
+        while True:
+            time.sleep(IDLE_CHECK_SECONDS)
+            if self.idle():
+                server.shutdown()
+                return
+
+    def status(self, root: Path) -> str:
+        with self.lock:
+            self.last_request = time.monotonic()
+            module = self.module(root)
+            lines = [f"{root}"]
+            for pkg in sorted(module.results):
+                r = module.results[pkg]
+                lines.append(f"  {r.status:<7} {module.display(pkg)} ({r.seconds:.1f}s)")
+            if module.pending:
+                lines.append(f"  waiting  {len(module.pending)} edited dir(s) in debounce window")
+            if module.running:
+                lines.append(f"  running  {', '.join(module.display(p) for p in module.running)}")
+            if module.skipped:
+                lines.append(f"  skipped  {module.skipped} dependent package(s) over the limit")
+            return "\n".join(lines) + "\n"
+
+
+def _kill(proc: subprocess.Popen):
+    # `go test` forks the test binary; kill the whole process group.
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        data = self.rfile.read()
+        if not data:
+            return  # Liveness probe from _is_running().
+        try:
+            request = json.loads(data)
+            if request["op"] == "edit":
+                reply = SERVICE.edit(Path(request["file"]))
+            else:
+                reply = SERVICE.status(Path(request["root"]))
+        except Exception as e:
+            reply = f"gotest: {e}\n"
+        try:
+            self.wfile.write(reply.encode())
+        except BrokenPipeError:
+            pass
+
+
+SERVICE: Service | None = None
+
+
+def _request(request: dict) -> str:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(5)
+        sock.connect(str(socket_path()))
+        sock.sendall(json.dumps(request).encode())
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while chunk := sock.recv(65536):
+            chunks.append(chunk)
+    finally:
+        sock.close()
+    return b"".join(chunks).decode()
+
+
+def _is_running() -> bool:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(0.5)
+        sock.connect(str(socket_path()))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def serve():
+    """Serve requests in the foreground until SIGTERM/SIGINT."""
+    global SERVICE
+    path = socket_path()
+    path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+    if path.exists():
+        if _is_running():
+            print(f"gotest: already running on {path}", file=sys.stderr)
+            sys.exit(1)
+        path.unlink()
+
+    SERVICE = Service()
+    server = socketserver.UnixStreamServer(str(path), _RequestHandler)
+    os.chmod(path, 0o600)
+    pid_path().write_text(f"{os.getpid()}\n")
+
+    def _shutdown(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    threading.Thread(target=SERVICE.watch_idle, args=(server,), daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        with SERVICE.lock:
+            for module in SERVICE.modules.values():
+                for _, proc in module.running.values():
+                    _kill(proc)
+        for stale in (path, pid_path()):
+            try:
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def start():
+    """Detach from the terminal and serve in the background."""
+    if _is_running():
+        return
+    if os.fork() > 0:
+        return
+    os.setsid()
+    if os.fork() > 0:
+        os._exit(0)
+
+    socket_path().parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+    log = open(log_path(), "a")
+    devnull = open(os.devnull, "r")
+    os.dup2(devnull.fileno(), 0)
+    os.dup2(log.fileno(), 1)
+    os.dup2(log.fileno(), 2)
+    serve()
+    os._exit(0)
+
+
+def stop():
+    try:
+        pid = int(pid_path().read_text().strip())
+    except (FileNotFoundError, ValueError):
+        print("gotest: not running")
+        return
+    try:
+        os.kill(pid, signal.SIGTERM)
+        print(f"gotest: stopped (pid {pid})")
+    except ProcessLookupError:
+        print("gotest: not running (stale pid file)")
+        pid_path().unlink()
+
+
+def notify():
+    """PostToolUse hook entry point."""
+    try:
+        input_data = json.load(sys.stdin)
+    except json.JSONDecodeError:
+        return
+    tool = input_data.get("tool_name") or input_data.get("tool") or ""
+    params = input_data.get("tool_input") or input_data.get("parameters") or {}
+    file_path = params.get("file_path") or ""
+    if tool not in GO_TOOLS or not file_path.endswith(".go"):
+        return
+
+    request = {"op": "edit", "file": os.path.abspath(file_path)}
+    if not _is_running():
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "start"],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL, start_new_session=True,
+        )
+        for _ in range(20):
+            time.sleep(0.05)
+            if _is_running():
+                break
+    try:
+        sys.stdout.write(_request(request))
+    except OSError:
+        print("gotest: test service unavailable, see " + str(log_path()), file=sys.stderr)
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command == "notify":
+        notify()
+    elif command == "serve":
+        serve()
+    elif command == "start":
+        start()
+    elif command == "stop":
+        stop()
+    elif command == "status":
+        root = module_root(Path.cwd())
+        if root is None:
+            print("gotest: not inside a Go module")
+            sys.exit(1)
+        try:
+            sys.stdout.write(_request({"op": "status", "root": str(root)}))
+        except OSError:
+            print("gotest: not running")
+            sys.exit(1)
+    else:
+        print(__doc__, file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
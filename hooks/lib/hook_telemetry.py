@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+Per-invocation hook timing, kept in a size-capped ring buffer file.
+
+Every hook invocation becomes one fixed-size span record (hook name, event,
+matcher, Claude Code session id, start time, duration, bytes in/out, exit
+code) in ~/.claude/run/hook-spans.ring. The file holds the most recent
+CAPACITY spans; older ones are overwritten in place, so it never grows
+past ~1.5 MB and recording is a single locked pwrite.
+
+Python hooks record directly (hook_client.py does so for every prompt).
+Shell hooks can be run through `wrap`, which times the script, counts the
+bytes it reads and writes, and passes its output and exit code through:
+
+    "command": "python3 -I -S ~/.claude/hooks/lib/hook_telemetry.py wrap sessionstart/load_project_context SessionStart -- ~/.claude/hooks/sessionstart/load_project_context.sh"
+
+Wrapping is opt-in: it puts a Python interpreter start in front of every
+shell hook, which costs more than most of those hooks take. `install`
+wraps each shell hook in settings.json while you investigate, and
+`uninstall` restores the plain commands.
+
+Usage:
+    hook_telemetry.py install [--settings ~/.claude/settings.json]
+    hook_telemetry.py uninstall [--settings ...]
+    hook_telemetry.py wrap <hook> <event> [--matcher M] -- <command...>
+    hook_telemetry.py stats [--session ID] [--since 2h] [--hook NAME]
+    hook_telemetry.py dump [--limit N]          # Raw spans, newest last
+    hook_telemetry.py clear
+
+Set CLAUDE_HOOK_TELEMETRY=0 to stop recording (wrap then just execs the
+command).
+"""
+
+import os
+import signal
+import struct
+import sys
+import time
+
+MAGIC = b"HKSP"
+VERSION = 1
+
+# magic, version, capacity, total spans ever written.
+_HEADER = struct.Struct("<4sHxxIQ")
+# start, duration_ms, bytes_in, bytes_out, exit_code, hook, event, matcher, session.
+_RECORD = struct.Struct("<dfIIh48s24s48s48s")
+
+CAPACITY = 8192
+
+
+def enabled() -> bool:
+    return os.environ.get("CLAUDE_HOOK_TELEMETRY", "1") != "0"
+
+
+def ring_path() -> str:
+    return os.environ.get("CLAUDE_HOOK_TELEMETRY_FILE") or os.path.expanduser(
+        "~/.claude/run/hook-spans.ring"
+    )
+
+
+class Span:
+    """One hook invocation.
+
+    A plain class rather than a dataclass: this module is imported by every
+    hook process and dataclasses alone costs ~10 ms to import.
+    """
+    __slots__ = ("hook", "event", "start", "duration_ms", "bytes_in",
+                 "bytes_out", "exit_code", "matcher", "session")
+
+    def __init__(self, hook: str, event: str, start: float, duration_ms: float,
+                 bytes_in: int = 0, bytes_out: int = 0, exit_code: int = 0,
+                 matcher: str = "", session: str = ""):
+        self.hook = hook
+        self.event = event
+        self.start = start
+        self.duration_ms = duration_ms
+        self.bytes_in = bytes_in
+        self.bytes_out = bytes_out
+        self.exit_code = exit_code
+        self.matcher = matcher
+        self.session = session
+
+    def pack(self) -> bytes:
+        return _RECORD.pack(
+            self.start, self.duration_ms,
+            min(self.bytes_in, 0xFFFFFFFF), min(self.bytes_out, 0xFFFFFFFF),
+            max(-32768, min(self.exit_code, 32767)),
+            self.hook.encode()[:48], self.event.encode()[:24],
+            self.matcher.encode()[:48], self.session.encode()[:48],
+        )
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "Span":
+        start, duration, bytes_in, bytes_out, exit_code, hook, event, matcher, session = (
+            _RECORD.unpack(data)
+        )
+
+        def text(raw: bytes) -> str:
+            return raw.rstrip(b"\0").decode("utf-8", "replace")
+
+        return cls(text(hook), text(event), start, duration, bytes_in, bytes_out,
+                   exit_code, text(matcher), text(session))
+
+
+def _open_ring(path: str) -> int:
+    """Open (creating if needed) the ring file and return a locked fd."""
+    import fcntl
+
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    header = os.pread(fd, _HEADER.size, 0)
+    if len(header) < _HEADER.size or _HEADER.unpack(header)[:2] != (MAGIC, VERSION):
+        os.ftruncate(fd, 0)
+        os.pwrite(fd, _HEADER.pack(MAGIC, VERSION, CAPACITY, 0), 0)
+    return fd
+
+
+def record(span: Span):
+    """Append one span, overwriting the oldest once the ring is full."""
+    if not enabled():
+        return
+    try:
+        fd = _open_ring(ring_path())
+    except OSError:
+        return
+    try:
+        _, _, capacity, total = _HEADER.unpack(os.pread(fd, _HEADER.size, 0))
+        os.pwrite(fd, span.pack(), _HEADER.size + (total % capacity) * _RECORD.size)
+        os.pwrite(fd, _HEADER.pack(MAGIC, VERSION, capacity, total + 1), 0)
+    finally:
+        os.close(fd)
+
+
+def read_spans(path: str | None = None) -> list[Span]:
+    """All spans in the ring, oldest first."""
+    try:
+        with open(path or ring_path(), "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    if len(data) < _HEADER.size:
+        return []
+    magic, version, capacity, total = _HEADER.unpack_from(data)
+    if (magic, version) != (MAGIC, VERSION):
+        return []
+
+    count = min(total, capacity)
+    first = total - count
+    spans = []
+    for n in range(first, total):
+        offset = _HEADER.size + (n % capacity) * _RECORD.size
+        chunk = data[offset:offset + _RECORD.size]
+        if len(chunk) == _RECORD.size:
+            spans.append(Span.unpack(chunk))
+    return spans
+
+
+def session_id_of(raw_input: bytes) -> str:
+    """Best-effort `session_id` from a hook payload."""
+    marker = raw_input.find(b'"session_id"')
+    if marker == -1:
+        return ""
+    start = raw_input.find(b'"', raw_input.find(b":", marker) + 1)
+    end = raw_input.find(b'"', start + 1)
+    if start == -1 or end == -1:
+        return ""
+    return raw_input[start + 1:end].decode("utf-8", "replace")
+
+
+# --- wrap --------------------------------------------------------------------
+
+def _write_all(fd: int, data: bytes):
+    view = memoryview(data)
+    while view:
+        try:
+            n = os.write(fd, view)
+        except BrokenPipeError:
+            return
+        view = view[n:]
+
+
+def _pump(data: bytes, in_w: int, out_r: int) -> int:
+    """Feed `data` to the hook while relaying its output; returns bytes out.
+
+    Both directions are serviced together, so a hook that writes more
+    than a pipe buffer before reading its payload doesn't deadlock.
+    """
+    import select
+
+    os.set_blocking(in_w, False)
+    view = memoryview(data)
+    poller = select.poll()
+    poller.register(out_r, select.POLLIN)
+    if view:
+        poller.register(in_w, select.POLLOUT)
+    else:
+        os.close(in_w)
+        in_w = -1
+
+    bytes_out = 0
+    open_fds = 2 if in_w >= 0 else 1
+    while open_fds:
+        for fd, _ in poller.poll():
+            if fd == out_r:
+                chunk = os.read(out_r, 65536)
+                if chunk:
+                    bytes_out += len(chunk)
+                    _write_all(1, chunk)
+                    continue
+                poller.unregister(out_r)
+                os.close(out_r)
+            else:
+                try:
+                    view = view[os.write(in_w, view[:65536]):]
+                except BlockingIOError:
+                    continue
+                except BrokenPipeError:
+                    view = view[:0]  # The hook stopped reading.
+                if view:
+                    continue
+                poller.unregister(in_w)
+                os.close(in_w)
+            open_fds -= 1
+    return bytes_out
+
+
+def wrap(hook: str, event: str, matcher: str, command: list[str]) -> int:
+    """Run `command` as the hook, recording a span; returns its exit code."""
+    if not enabled():
+        os.execvp(command[0], command)
+
+    raw_input = sys.stdin.buffer.read()
+    in_r, in_w = os.pipe()
+    out_r, out_w = os.pipe()
+
+    start = time.time()
+    t0 = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        os.dup2(in_r, 0)
+        os.dup2(out_w, 1)
+        for fd in (in_r, in_w, out_r, out_w):
+            os.close(fd)
+        # Python ignores SIGPIPE; don't let the hook inherit that.
+        signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+        try:
+            os.execvp(command[0], command)
+        except OSError as e:
+            os.write(2, f"hook_telemetry: {command[0]}: {e.strerror}\n".encode())
+            os._exit(127)
+
+    os.close(in_r)
+    os.close(out_w)
+    bytes_out = _pump(raw_input, in_w, out_r)
+    _, status = os.waitpid(pid, 0)
+    duration_ms = (time.perf_counter() - t0) * 1000
+
+    exit_code = os.waitstatus_to_exitcode(status)
+    record(Span(
+        hook=hook, event=event, start=start, duration_ms=duration_ms,
+        bytes_in=len(raw_input), bytes_out=bytes_out, exit_code=exit_code,
+        matcher=matcher, session=session_id_of(raw_input),
+    ))
+    return exit_code if exit_code >= 0 else 128 - exit_code
+
+
+# --- install -----------------------------------------------------------------
+
+WRAP_PREFIX = "python3 -I -S "
+
+
+def wrap_command(command: str, event: str, matcher: str) -> str:
+    """`command` run through `wrap`, if it is a shell hook under hooks/."""
+    import shlex
+
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return command
+    script = argv[0] if argv else ""
+    if "/hooks/" not in script or script.endswith(".py") or "hook_telemetry.py" in command:
+        return command
+    hooks_dir, _, rel = script.rpartition("/hooks/")
+    name = os.path.splitext(rel)[0]
+    wrapped = f"{WRAP_PREFIX}{hooks_dir}/hooks/lib/hook_telemetry.py wrap {name} {event}"
+    if matcher:
+        wrapped += f" --matcher {shlex.quote(matcher)}"
+    return f"{wrapped} -- {command}"
+
+
+def unwrap_command(command: str) -> str:
+    """The hook command a `wrap` command runs, or `command` itself."""
+    if "hook_telemetry.py wrap " in command and " -- " in command:
+        return command.split(" -- ", 1)[1]
+    return command
+
+
+def rewrite_settings(path: str, wrapped: bool) -> int:
+    """Wrap or unwrap every shell hook in settings.json; returns how many changed."""
+    import json
+
+    with open(path) as f:
+        settings = json.load(f)
+    changed = 0
+    for event, groups in settings.get("hooks", {}).items():
+        for group in groups:
+            for hook in group.get("hooks", []):
+                if hook.get("type") != "command":
+                    continue
+                if wrapped:
+                    new = wrap_command(hook["command"], event, group.get("matcher", ""))
+                else:
+                    new = unwrap_command(hook["command"])
+                if new != hook["command"]:
+                    hook["command"] = new
+                    changed += 1
+    if changed:
+        tmp = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            f.write(json.dumps(settings, indent=2, ensure_ascii=False) + "\n")
+        os.replace(tmp, path)
+    return changed
+
+
+# --- stats -------------------------------------------------------------------
+
+# Histogram bucket upper bounds in ms.
+BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float("inf")]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def parse_since(value: str) -> float:
+    """'90s', '15m', '2h', '7d' -> epoch seconds that long ago."""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    if value[-1:] in units:
+        return time.time() - float(value[:-1]) * units[value[-1]]
+    return time.time() - float(value)
+
+
+def _histogram(durations: list[float], width: int = 30) -> list[str]:
+    counts = [0] * len(BUCKETS)
+    for d in durations:
+        for i, bound in enumerate(BUCKETS):
+            if d < bound:
+                counts[i] += 1
+                break
+    peak = max(counts) or 1
+    lines = []
+    lower = 0
+    for bound, n in zip(BUCKETS, counts):
+        label = f"{lower:g}-{bound:g} ms" if bound != float("inf") else f">{lower:g} ms"
+        lower = bound
+        if n:
+            lines.append(f"    {label:>14} {'█' * max(1, n * width // peak)} {n}")
+    return lines
+
+
+def print_stats(spans: list[Span], histograms: bool = True):
+    if not spans:
+        print("No hook spans recorded.")
+        return
+
+    by_hook: dict[tuple[str, str], list[Span]] = {}
+    for span in spans:
+        by_hook.setdefault((span.event, span.hook), []).append(span)
+
+    first = time.strftime("%Y-%m-%d %H:%M", time.localtime(spans[0].start))
+    print(f"Hook latency in ms ({len(spans)} spans since {first})")
+    print(f"{'event':<18} {'hook':<34} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8} "
+          f"{'max':>8} {'total':>10} {'err':>4} {'in/out B':>12}")
+    rows = sorted(by_hook.items(), key=lambda kv: -sum(s.duration_ms for s in kv[1]))
+    for (event, hook), group in rows:
+        durations = [s.duration_ms for s in group]
+        errors = sum(s.exit_code != 0 for s in group)
+        avg_in = sum(s.bytes_in for s in group) // len(group)
+        avg_out = sum(s.bytes_out for s in group) // len(group)
+        print(f"{event:<18} {hook:<34} {len(group):>6} "
+              f"{percentile(durations, 50):>8.1f} {percentile(durations, 95):>8.1f} "
+              f"{percentile(durations, 99):>8.1f} {max(durations):>8.1f} "
+              f"{sum(durations):>10.0f} {errors:>4} {f'{avg_in}/{avg_out}':>12}")
+        if histograms:
+            print("\n".join(_histogram(durations)))
+
+    by_session: dict[str, list[Span]] = {}
+    for span in spans:
+        by_session.setdefault(span.session or "(none)", []).append(span)
+    print(f"\n{'session':<38} {'spans':>6} {'hook ms':>10}  slowest hook (ms)")
+    for session, group in sorted(by_session.items(), key=lambda kv: -kv[1][-1].start):
+        per_hook: dict[str, float] = {}
+        for s in group:
+            per_hook[s.hook] = per_hook.get(s.hook, 0) + s.duration_ms
+        slowest = max(per_hook, key=per_hook.get)
+        total = sum(per_hook.values())
+        print(f"{session:<38} {len(group):>6} {total:>10.0f}  "
+              f"{slowest} ({per_hook[slowest]:.0f})")
+
+
+def main():
+    import argparse
+
+    argv = sys.argv[1:]
+    if argv[:1] == ["wrap"]:
+        # Parse by hand: everything after "--" belongs to the hook command.
+        if "--" not in argv or len(argv) < 4:
+            print(__doc__, file=sys.stderr)
+            sys.exit(2)
+        split = argv.index("--")
+        head, command = argv[1:split], argv[split + 1:]
+        matcher = ""
+        if "--matcher" in head:
+            i = head.index("--matcher")
+            matcher = head[i + 1]
+            del head[i:i + 2]
+        sys.exit(wrap(head[0], head[1], matcher, command))
+
+    parser = argparse.ArgumentParser(description="Hook timing telemetry.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    stats = sub.add_parser("stats", help="Per-hook latency and per-session totals")
+    stats.add_argument("--session", help="Only spans from this session id (prefix)")
+    stats.add_argument("--since", help="Only spans newer than this (e.g. 30m, 2h, 7d)")
+    stats.add_argument("--hook", help="Only this hook")
+    stats.add_argument("--no-histograms", action="store_true")
+    dump = sub.add_parser("dump", help="Print raw spans as TSV")
+    dump.add_argument("--limit", type=int, default=50)
+    sub.add_parser("clear", help="Delete all recorded spans")
+    for name, help_text in (("install", "Time every shell hook in settings.json"),
+                            ("uninstall", "Restore the unwrapped shell hook commands")):
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument("--settings", default=os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            "settings.json"))
+    args = parser.parse_args(argv)
+
+    if args.command in ("install", "uninstall"):
+        changed = rewrite_settings(args.settings, wrapped=args.command == "install")
+        verb = "Wrapped" if args.command == "install" else "Unwrapped"
+        print(f"{verb} {changed} hook command(s) in {args.settings}")
+        return
+
+    spans = read_spans()
+    if args.command == "clear":
+        try:
+            os.unlink(ring_path())
+        except FileNotFoundError:
+            pass
+    elif args.command == "dump":
+        for s in spans[-args.limit:]:
+            stamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(s.start))
+            print(f"{stamp}\t{s.event}\t{s.hook}\t{s.matcher}\t{s.duration_ms:.1f}\t"
+                  f"{s.bytes_in}\t{s.bytes_out}\t{s.exit_code}\t{s.session}")
+    else:
+        if args.session:
+            spans = [s for s in spans if s.session.startswith(args.session)]
+        if args.since:
+            cutoff = parse_since(args.since)
+            spans = [s for s in spans if s.start >= cutoff]
+        if args.hook:
+            spans = [s for s in spans if s.hook == args.hook]
+        print_stats(spans, histograms=not args.no_histograms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Persistent hook daemon: runs Python hooks inside one long-lived process.
+
+Every UserPromptSubmit used to fork three interpreters that each re-parsed
+the same stdin JSON. The daemon listens on a unix socket, parses the hook
+payload once and runs the prompt pipeline (prompt_pipeline.py) in-process.
+PreToolUse payloads go to the path guard (path_guard.py), whose compiled
+policy stays in memory between calls, and PostToolUse task events are
+appended to the Substrate sync spool (task_spool.py).
+`hooks/hook_client.py` is the stdlib-only shim that Claude Code actually
+invokes; it forwards stdin over the socket and falls back to `run_hook()`
+in its own process when the daemon isn't running.
+
+Modules in hooks/lib are reloaded automatically when their source changes,
+so editing a hook never requires restarting the daemon.
+
+Each request carries the client's CLAUDE_*, TASK_SYNC_* and SUBSTRATE_*
+variables and PATH, which are applied for that request only, so the hooks
+see the same settings as they would running in the client's process.
+
+Usage:
+    hookd.py start     # Start in the background (no-op if already running)
+    hookd.py serve     # Run in the foreground
+    hookd.py stop      # Stop a running daemon
+    hookd.py status    # Report whether the daemon is running
+
+Environment:
+    CLAUDE_HOOKD_SOCKET  Override the socket path
+                         (default: ~/.claude/run/hookd.sock)
+"""
+
+import contextlib
+import importlib
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import traceback
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Callable
+
+# Largest request we are willing to buffer (pasted prompts can be big).
+MAX_REQUEST_BYTES = 32 * 1024 * 1024
+
+# Variables taken from each request (kept in sync with hook_client.py).
+FORWARDED_ENV_PREFIXES = ("CLAUDE_", "TASK_SYNC_", "SUBSTRATE_")
+FORWARDED_ENV = ("PATH",)
+
+
+def socket_path() -> Path:
+    """Location of the daemon socket (kept in sync with hook_client.py)."""
+    override = os.environ.get("CLAUDE_HOOKD_SOCKET")
+    if override:
+        return Path(override)
+    return Path.home() / ".claude" / "run" / "hookd.sock"
+
+
+def pid_path() -> Path:
+    return socket_path().with_suffix(".pid")
+
+
+def log_path() -> Path:
+    return socket_path().with_suffix(".log")
+
+
+@dataclass
+class HookResult:
+    """Combined output of one hook event."""
+    stdout: str = ""
+    stderr: str = ""
+    exit_code: int = 0
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "stdout": self.stdout,
+            "stderr": self.stderr,
+            "exit_code": self.exit_code,
+        })
+
+
+class LibModules:
+    """Imports hooks/lib modules and reloads them when any source changes."""
+
+    def __init__(self, lib_dir: Path):
+        self.lib_dir = lib_dir
+        self._stamp: dict[str, int] = {}
+
+    def _snapshot(self) -> dict[str, int]:
+        return {p.stem: p.stat().st_mtime_ns for p in self.lib_dir.glob("*.py")}
+
+    def get(self, name: str) -> ModuleType:
+        stamp = self._snapshot()
+        if stamp != self._stamp:
+            # Drop every lib module so cross-module imports are refreshed too.
+            for stale in self._stamp:
+                if stale != "hookd":
+                    sys.modules.pop(stale, None)
+            self._stamp = stamp
+        return importlib.import_module(name)
+
+
+LIB = LibModules(Path(__file__).resolve().parent)
+
+
+def run_prompt_pipeline(input_data: dict) -> HookResult:
+    """Run the configured UserPromptSubmit stages over one parsed payload."""
+    pipeline = LIB.get("prompt_pipeline")
+    return HookResult(stdout=pipeline.process(input_data) + "\n")
+
+
+def run_path_guard(input_data: dict) -> HookResult:
+    """Check a file edit against the guard policy."""
+    verdict = LIB.get("path_guard").check(input_data)
+    return HookResult(verdict.stdout, verdict.stderr, verdict.exit_code)
+
+
+def run_task_spool(input_data: dict) -> HookResult:
+    """Spool a task tool event for the Substrate flusher."""
+    LIB.get("task_spool").append(input_data)
+    return HookResult()
+
+
+# Event name -> handler taking the parsed hook payload.
+HANDLERS: dict[str, Callable[[dict], HookResult]] = {
+    "UserPromptSubmit": run_prompt_pipeline,
+    "PreToolUse": run_path_guard,
+    "PostToolUse": run_task_spool,
+}
+
+
+def _forwarded(name: str) -> bool:
+    return name.startswith(FORWARDED_ENV_PREFIXES) or name in FORWARDED_ENV
+
+
+@contextlib.contextmanager
+def request_env(env: dict[str, str] | None):
+    """Make the forwarded variables exactly `env` until the block exits.
+
+    Forwarded variables the request doesn't set are removed for the
+    duration, so an unset variable reads as unset, as in the client.
+    """
+    if env is None:
+        yield
+        return
+    saved = {name: value for name, value in os.environ.items() if _forwarded(name)}
+    for name in saved:
+        if name not in env:
+            del os.environ[name]
+    os.environ.update({name: value for name, value in env.items() if _forwarded(name)})
+    try:
+        yield
+    finally:
+        for name in [name for name in os.environ if _forwarded(name)]:
+            if name not in saved:
+                del os.environ[name]
+        os.environ.update(saved)
+
+
+def run_hook(
+    event: str,
+    raw_input: str,
+    cwd: str | None = None,
+    env: dict[str, str] | None = None,
+) -> HookResult:
+    """Dispatch one hook invocation; used by the daemon and the client fallback.
+
+    `env` holds the caller's forwarded variables; None keeps this process's.
+    """
+    handler = HANDLERS.get(event)
+    if handler is None:
+        return HookResult(stderr=f"hookd: no handler for event {event!r}\n")
+
+    try:
+        input_data = json.loads(raw_input)
+    except json.JSONDecodeError:
+        # Unparseable input: pass through silently like the scripts did.
+        return HookResult()
+
+    if cwd:
+        os.chdir(cwd)
+
+    stderr = io.StringIO()
+    with contextlib.redirect_stderr(stderr), request_env(env):
+        try:
+            result = handler(input_data)
+        except Exception:
+            traceback.print_exc()
+            result = HookResult(exit_code=1)
+    result.stderr += stderr.getvalue()
+    return result
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        data = self.rfile.read(MAX_REQUEST_BYTES + 1)
+        if len(data) > MAX_REQUEST_BYTES:
+            result = HookResult(stderr="hookd: request too large\n", exit_code=1)
+        else:
+            try:
+                request = json.loads(data)
+                result = run_hook(
+                    request["event"], request["input"], request.get("cwd"), request.get("env")
+                )
+            except Exception:
+                result = HookResult(stderr=traceback.format_exc(), exit_code=1)
+        self.wfile.write(result.to_json().encode())
+
+
+class _Server(socketserver.UnixStreamServer):
+    # Requests are served one at a time: handlers chdir into the caller's
+    # working directory and take on its environment, both process-global.
+    pass
+
+
+def _is_running() -> bool:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(0.5)
+        sock.connect(str(socket_path()))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def serve():
+    """Serve requests in the foreground until SIGTERM/SIGINT."""
+    path = socket_path()
+    path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+    if path.exists():
+        if _is_running():
+            print(f"hookd: already running on {path}", file=sys.stderr)
+            sys.exit(1)
+        path.unlink()
+
+    server = _Server(str(path), _RequestHandler)
+    os.chmod(path, 0o600)
+    pid_path().write_text(f"{os.getpid()}\n")
+
+    def _shutdown(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for stale in (path, pid_path()):
+            try:
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def start():
+    """Detach from the terminal and serve in the background."""
+    if _is_running():
+        return
+    if os.fork() > 0:
+        return
+    os.setsid()
+    if os.fork() > 0:
+        os._exit(0)
+
+    socket_path().parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+    log = open(log_path(), "a")
+    devnull = open(os.devnull, "r")
+    os.dup2(devnull.fileno(), 0)
+    os.dup2(log.fileno(), 1)
+    os.dup2(log.fileno(), 2)
+    serve()
+    os._exit(0)
+
+
+def stop():
+    try:
+        pid = int(pid_path().read_text().strip())
+    except (FileNotFoundError, ValueError):
+        print("hookd: not running")
+        return
+    try:
+        os.kill(pid, signal.SIGTERM)
+        print(f"hookd: stopped (pid {pid})")
+    except ProcessLookupError:
+        print("hookd: not running (stale pid file)")
+        pid_path().unlink()
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command == "serve":
+        serve()
+    elif command == "start":
+        start()
+    elif command == "stop":
+        stop()
+    elif command == "status":
+        if _is_running():
+            print(f"hookd: running on {socket_path()}")
+        else:
+            print("hookd: not running")
+            sys.exit(1)
+    else:
+        print(__doc__, file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
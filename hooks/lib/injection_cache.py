@@ -0,0 +1,99 @@
+"""
+Per-session record of context blocks already injected into the prompt.
+
+The prompt pipeline used to append the same rule paragraphs and session
+TL;DR to every matching prompt, although the model still had them in its
+context window. InjectionState remembers, per Claude Code session id, a
+hash of each block it has sent; a block is sent again only when its content
+changes or after the conversation has been compacted (the PreCompact
+checkpoint calls forget()).
+
+State lives in ~/.cache/claude-hooks/injected/<hash of session id>.json:
+    {"blocks": {"security_context": "<sha1 of text>", ...}}
+
+Set CLAUDE_INJECT_DEDUP=0 to inject on every prompt as before.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+CACHE_DIR = Path.home() / ".cache" / "claude-hooks" / "injected"
+
+# State files for sessions idle longer than this are removed.
+MAX_AGE_SECONDS = 7 * 24 * 3600
+
+
+def enabled() -> bool:
+    return os.environ.get("CLAUDE_INJECT_DEDUP", "1") != "0"
+
+
+def _state_path(session_id: str) -> Path:
+    key = hashlib.sha1(session_id.encode()).hexdigest()[:16]
+    return CACHE_DIR / f"{key}.json"
+
+
+def _digest(content: str) -> str:
+    return hashlib.sha1(content.encode()).hexdigest()
+
+
+class InjectionState:
+    """Which blocks one session has already received."""
+
+    def __init__(self, session_id: str | None):
+        self.session_id = session_id if enabled() else None
+        self._blocks: dict[str, str] = {}
+        self._dirty = False
+        if self.session_id:
+            try:
+                self._blocks = json.loads(_state_path(self.session_id).read_text())["blocks"]
+            except (FileNotFoundError, ValueError, KeyError, TypeError):
+                self._blocks = {}
+
+    def is_fresh(self, name: str, content: str) -> bool:
+        """True if `content` has not been injected under `name` yet."""
+        if not self.session_id:
+            return True
+        return self._blocks.get(name) != _digest(content)
+
+    def mark(self, name: str, content: str):
+        if self.session_id:
+            self._blocks[name] = _digest(content)
+            self._dirty = True
+
+    def save(self):
+        """Persist the state if anything was marked."""
+        if not self._dirty:
+            return
+        path = _state_path(self.session_id)
+        if not path.exists():
+            _prune()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"blocks": self._blocks}))
+        os.replace(tmp, path)
+        self._dirty = False
+
+
+def forget(session_id: str):
+    """Drop a session's state so every block is injected again."""
+    try:
+        _state_path(session_id).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _prune():
+    cutoff = time.time() - MAX_AGE_SECONDS
+    try:
+        entries = list(os.scandir(CACHE_DIR))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except OSError:
+            continue
@@ -0,0 +1,146 @@
+"""
+Single-pass keyword matcher for prompt context rules.
+
+All keywords from every rule category are folded into one prefix-factored
+regular expression, so a prompt is lowercased once and scanned once in a
+single linear pass no matter how many rules exist. Matching is word-boundary aware: a keyword must start at a
+word boundary and end before a non-letter, so "bip" matches "BIP", "BIP-125"
+and "BIP341" but not "bipartite". A trailing `*` makes a keyword a prefix,
+so "test*" matches "test", "tests" and "testing".
+
+Rules file format (JSON):
+    {
+      "security_context": {
+        "keywords": ["security", "exploit*", "dos"],
+        "text": "Security Context: ..."
+      }
+    }
+
+Compiled rule sets are cached per process keyed by the rules file's mtime
+and size, so the hook daemon compiles them once and recompiles only when
+the file is edited.
+"""
+
+import json
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+# Keywords end at the first non-letter, so "BOLT11" and "p2p-layer" match.
+_LETTER = r"[^\W\d_]"
+
+
+@dataclass
+class Rule:
+    name: str
+    keywords: list[str]
+    text: str = ""
+
+
+def _trie_pattern(keywords: list[str]) -> str:
+    """Build a prefix-factored alternation ("b(?:ip|olt)") for `keywords`.
+
+    Sharing prefixes lets the regex engine reject most positions after one
+    character instead of trying every keyword in turn.
+    """
+    root: dict = {}
+    for keyword in keywords:
+        node = root
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        alternatives = []
+        for ch, child in sorted(node.items()):
+            if ch == "":
+                continue
+            if ch == "*":
+                alternatives.append(f"{_LETTER}*")
+            else:
+                alternatives.append(re.escape(ch) + emit(child))
+        if not alternatives:
+            return ""
+        if "" in node:
+            return f"(?:{'|'.join(alternatives)})?"
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return f"(?:{'|'.join(alternatives)})"
+
+    return emit(root)
+
+
+class KeywordMatcher:
+    """Finds which rule categories occur in a piece of text."""
+
+    def __init__(self, rules: list[Rule]):
+        self.rules = {rule.name: rule for rule in rules}
+
+        # Exact keywords and prefix keywords (trailing `*`) -> rule names.
+        self._exact: dict[str, set[str]] = {}
+        self._prefix: dict[str, set[str]] = {}
+        for rule in rules:
+            for keyword in rule.keywords:
+                keyword = keyword.lower()
+                if keyword.endswith("*"):
+                    self._prefix.setdefault(keyword[:-1], set()).add(rule.name)
+                else:
+                    self._exact.setdefault(keyword, set()).add(rule.name)
+        self._prefix_lengths = sorted({len(p) for p in self._prefix})
+
+        keywords = list(self._exact) + [p + "*" for p in self._prefix]
+        # The lookahead makes every match zero-width so overlapping keywords
+        # ("v3 transaction" / "transaction") are all reported.
+        self._regex = re.compile(
+            rf"\b(?=({_trie_pattern(keywords)})(?!{_LETTER}))"
+        ) if keywords else None
+
+    def _rules_for(self, word: str) -> set[str]:
+        """Rule names for every keyword that matches the matched text `word`."""
+        names = set(self._exact.get(word, ()))
+        for n in self._prefix_lengths:
+            if n > len(word):
+                break
+            tail = word[n:]
+            if word[:n] in self._prefix and (not tail or tail.isalpha()):
+                names |= self._prefix[word[:n]]
+        return names
+
+    def match(self, text: str) -> set[str]:
+        """Return the names of every rule with a keyword in `text`."""
+        found: set[str] = set()
+        if self._regex is None:
+            return found
+
+        seen: set[str] = set()
+        for m in self._regex.finditer(text.lower()):
+            word = m.group(1)
+            if word in seen:
+                continue
+            seen.add(word)
+            found |= self._rules_for(word)
+            if len(found) == len(self.rules):
+                break
+        return found
+
+
+_cache: dict[Path, tuple[tuple[int, int], KeywordMatcher]] = {}
+
+
+def load_matcher(path: Path) -> KeywordMatcher:
+    """Load and compile a rules file, reusing the compiled matcher if unchanged."""
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+
+    cached = _cache.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    data = json.loads(Path(path).read_text())
+    matcher = KeywordMatcher([
+        Rule(name=name, keywords=spec.get("keywords", []), text=spec.get("text", ""))
+        for name, spec in data.items()
+    ])
+    _cache[path] = (stamp, matcher)
+    return matcher
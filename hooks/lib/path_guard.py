@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+PreToolUse guard for file edits, driven by a path policy.
+
+The policy lists glob patterns in three categories, checked in order:
+
+    allow   never blocked or warned about (exceptions to the lists below)
+    block   the edit is refused (exit 2, reason on stderr for Claude)
+    warn    the edit goes ahead with a warning
+
+plus `gofmt` patterns for Go files that are checked with `gofmt -l`
+(independently of the three above).
+Patterns are matched against the absolute path of the edited file. A
+pattern without a slash matches the file name in any directory (`*.pem`).
+A pattern with a slash matches any trailing part of the path that starts
+at a directory boundary (`secrets/**`). A leading `/` or `~/` anchors it
+at the root. `*` stays within one directory; `**` crosses directories.
+
+The allow/block/warn patterns compile into one regular expression, so a
+check is a single match no matter how long the policy is. The compiled
+pattern is cached in memory (the hook daemon compiles once per policy
+edit) and on disk under ~/.cache/claude-hooks/guard for one-shot
+processes.
+
+Policy lookup, first found wins:
+    <project>/.claude/guard_policy.json
+    hooks/pretooluse/guard_policy.json
+
+Both payload shapes are accepted: `tool`/`parameters` and
+`tool_name`/`tool_input`.
+
+Usage (hook, reads the PreToolUse payload on stdin):
+    path_guard.py                   # Path policy and gofmt check
+    path_guard.py --checks paths    # Just one of them
+    path_guard.py --explain <path>  # Show which pattern a path hits
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_POLICY = HOOKS_DIR / "pretooluse" / "guard_policy.json"
+PROJECT_POLICY = Path(".claude") / "guard_policy.json"
+
+CACHE_DIR = Path.home() / ".cache" / "claude-hooks" / "guard"
+CACHE_VERSION = 1
+
+# Checked in this order; the first category whose pattern matches wins.
+CATEGORIES = ("allow", "block", "warn")
+
+CHECKS = ("paths", "gofmt")
+
+BLOCK_MESSAGE = """🚫 BLOCKED: Cannot modify sensitive file: {path}
+   This file contains credentials or secrets.
+   If you need to modify it, disable this hook temporarily."""
+
+WARN_MESSAGE = """⚠️  Warning: Modifying configuration file: {path}
+   Please review changes carefully."""
+
+GOFMT_MESSAGE = """⚠️  Note: {path} needs Go formatting (gofmt)
+   This won't block your edit, but consider running: gofmt -w {path}"""
+
+
+def glob_to_regex(glob: str) -> str:
+    """Translate one policy glob into a regex over absolute paths."""
+    glob = os.path.expanduser(glob)
+    if glob.startswith("/"):
+        prefix, glob = "/", glob.lstrip("/")
+    else:
+        # Match the file name, or a trailing run of path components.
+        prefix = "(?:.*/)?"
+
+    out = []
+    i = 0
+    while i < len(glob):
+        if glob.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif glob.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif glob[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif glob[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif glob[i] == "[" and "]" in glob[i + 2:]:
+            end = glob.index("]", i + 2)
+            body = glob[i + 1:end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append(f"[{body.replace(chr(92), chr(92) * 2)}]")
+            i = end + 1
+        else:
+            out.append(re.escape(glob[i]))
+            i += 1
+    return prefix + "".join(out)
+
+
+def _compile(source: str) -> re.Pattern | None:
+    return re.compile(source) if source else None
+
+
+@dataclass
+class GuardPolicy:
+    """A policy compiled into one regex; group rN is `rules[N]`."""
+    tools: set[str]
+    # (category, glob) per alternative, in match order.
+    rules: list[tuple[str, str]]
+    regex: re.Pattern | None = None
+    gofmt: re.Pattern | None = None
+
+    @classmethod
+    def compile(cls, spec: dict) -> "GuardPolicy":
+        rules = [(category, glob) for category in CATEGORIES for glob in spec.get(category, [])]
+        return cls(
+            tools=set(spec.get("tools", [])),
+            rules=rules,
+            regex=_compile("|".join(
+                f"(?P<r{n}>{glob_to_regex(glob)})" for n, (_, glob) in enumerate(rules)
+            )),
+            gofmt=_compile("|".join(glob_to_regex(glob) for glob in spec.get("gofmt", []))),
+        )
+
+    def match(self, path: str) -> tuple[str, str] | None:
+        """(category, glob) of the first rule that matches `path`."""
+        if self.regex is None:
+            return None
+        m = self.regex.fullmatch(path)
+        if m is None:
+            return None
+        return self.rules[int(m.lastgroup[1:])]
+
+    def match_all(self, path: str) -> list[tuple[str, str]]:
+        """Every matching rule (for --explain), in match order."""
+        return [rule for rule in self.rules if re.fullmatch(glob_to_regex(rule[1]), path)]
+
+
+def policy_file() -> Path:
+    # Absolute, so the daemon's cache doesn't mix up projects.
+    project = Path.cwd() / PROJECT_POLICY
+    return project if project.exists() else DEFAULT_POLICY
+
+
+_memory: dict[Path, tuple[list[int], GuardPolicy]] = {}
+
+
+def _cache_path(path: Path) -> Path:
+    # Patterns expand `~`, so the compiled form depends on HOME too.
+    key = f"{path}\0{Path.home()}"
+    return CACHE_DIR / f"{hashlib.sha1(key.encode()).hexdigest()[:16]}.json"
+
+
+def load_policy(path: Path | None = None) -> GuardPolicy:
+    """Compiled policy, from memory, the disk cache, or the policy file."""
+    path = path or policy_file()
+    st = os.stat(path)
+    stamp = [st.st_mtime_ns, st.st_size]
+
+    cached = _memory.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    cache_file = _cache_path(path)
+    policy = None
+    try:
+        data = json.loads(cache_file.read_text())
+        if data["version"] == CACHE_VERSION and data["stamp"] == stamp:
+            policy = GuardPolicy(
+                tools=set(data["tools"]),
+                rules=[tuple(rule) for rule in data["rules"]],
+                regex=_compile(data["source"]),
+                gofmt=_compile(data["gofmt"]),
+            )
+    except (FileNotFoundError, ValueError, KeyError, TypeError):
+        pass
+
+    if policy is None:
+        policy = GuardPolicy.compile(json.loads(path.read_text()))
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({
+                "version": CACHE_VERSION,
+                "stamp": stamp,
+                "tools": sorted(policy.tools),
+                "rules": policy.rules,
+                "source": policy.regex.pattern if policy.regex else "",
+                "gofmt": policy.gofmt.pattern if policy.gofmt else "",
+            }))
+            os.replace(tmp, cache_file)
+        except OSError:
+            pass
+
+    _memory[path] = (stamp, policy)
+    return policy
+
+
+def tool_and_path(input_data: dict) -> tuple[str, str]:
+    """Tool name and target file from either payload shape."""
+    tool = input_data.get("tool_name") or input_data.get("tool") or ""
+    params = input_data.get("tool_input") or input_data.get("parameters") or {}
+    path = params.get("file_path") or params.get("notebook_path") or ""
+    return tool, path
+
+
+@dataclass
+class Verdict:
+    stdout: str = ""
+    stderr: str = ""
+    exit_code: int = 0
+
+
+def _needs_gofmt(path: str) -> bool:
+    import subprocess
+
+    try:
+        result = subprocess.run(["gofmt", "-l", path], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return bool(result.stdout.strip())
+
+
+def check(input_data: dict, checks: tuple[str, ...] = CHECKS) -> Verdict:
+    """Apply the policy to one PreToolUse payload."""
+    tool, path = tool_and_path(input_data)
+    if not path:
+        return Verdict()
+
+    policy = load_policy()
+    if policy.tools and tool not in policy.tools:
+        return Verdict()
+
+    full = os.path.normpath(os.path.join(os.getcwd(), os.path.expanduser(path)))
+    verdict = Verdict()
+    if "paths" in checks:
+        rule = policy.match(full)
+        category = rule[0] if rule else None
+        if category == "block":
+            return Verdict(stderr=BLOCK_MESSAGE.format(path=path) + "\n", exit_code=2)
+        if category == "warn":
+            verdict.stdout += WARN_MESSAGE.format(path=path) + "\n"
+
+    if ("gofmt" in checks and policy.gofmt and policy.gofmt.fullmatch(full)
+            and os.path.isfile(full) and _needs_gofmt(full)):
+        verdict.stdout += GOFMT_MESSAGE.format(path=path) + "\n"
+    return verdict
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="PreToolUse path guard.")
+    parser.add_argument("--checks", default=",".join(CHECKS),
+                        help=f"Comma-separated subset of: {', '.join(CHECKS)}")
+    parser.add_argument("--explain", metavar="PATH", help="Show the rules matching PATH")
+    args = parser.parse_args()
+
+    if args.explain:
+        full = os.path.normpath(os.path.join(os.getcwd(), os.path.expanduser(args.explain)))
+        policy = load_policy()
+        print(f"{full} ({policy_file()})")
+        for category, glob in policy.match_all(full) or [("-", "no matching rule")]:
+            print(f"  {category:<6} {glob}")
+        if policy.gofmt and policy.gofmt.fullmatch(full):
+            print("  gofmt  checked with gofmt -l")
+        return
+
+    try:
+        input_data = json.load(sys.stdin)
+    except json.JSONDecodeError:
+        sys.exit(0)
+
+    verdict = check(input_data, tuple(args.checks.split(",")))
+    sys.stdout.write(verdict.stdout)
+    sys.stderr.write(verdict.stderr)
+    sys.exit(verdict.exit_code)
+
+
+if __name__ == "__main__":
+    main()
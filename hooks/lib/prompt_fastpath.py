@@ -0,0 +1,113 @@
+"""
+Cheap pre-check that lets most prompts skip the prompt pipeline.
+
+Most prompts need no changes: no `-u` suffix, no rule keyword, not a
+continuation. For those the pipeline's output is the prompt itself, so the
+hook can answer after one JSON parse and a few substring scans instead of
+importing prompt_pipeline, session_store and the keyword regex.
+
+The check is conservative. needs_pipeline() may return True for a prompt
+that ends up unchanged, but never False for one the pipeline would change.
+This module only imports json and os so that it stays cheap.
+"""
+
+import json
+import os
+
+LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+RULES_FILE = os.path.join(os.path.dirname(LIB_DIR), "userpromptsubmit", "context_rules.json")
+# A project config may enable stages the fast path knows nothing about.
+PROJECT_CONFIG = os.path.join(".claude", "prompt_pipeline.json")
+
+# (mtime_ns, size) of the rules file, [(keyword, is_prefix)].
+_keywords: tuple[tuple[int, int], list[tuple[str, bool]]] | None = None
+
+
+def is_continuation_prompt(prompt: str) -> bool:
+    """Detect if this prompt is asking to continue previous work."""
+    prompt_lower = prompt.lower().strip()
+
+    # Direct continuation triggers
+    triggers = [
+        "continue",
+        "resume",
+        "keep going",
+        "where were we",
+        "what's next",
+        "whats next",
+        "what was i",
+        "what were we",
+        "pick up",
+        "carry on",
+        "let's continue",
+        "lets continue",
+        "go on",
+        "proceed",
+        "next step",
+    ]
+
+    for trigger in triggers:
+        if trigger in prompt_lower:
+            return True
+
+    # Short prompts that imply continuation
+    short_continuations = ["ok", "okay", "yes", "yep", "sure", "go", "next", "do it"]
+    if prompt_lower in short_continuations:
+        return True
+
+    return False
+
+
+def _load_keywords() -> list[tuple[str, bool]]:
+    global _keywords
+    st = os.stat(RULES_FILE)
+    stamp = (st.st_mtime_ns, st.st_size)
+    if _keywords is None or _keywords[0] != stamp:
+        with open(RULES_FILE) as f:
+            rules = json.load(f)
+        keywords = {
+            (k.lower().rstrip("*"), k.endswith("*"))
+            for spec in rules.values()
+            for k in spec.get("keywords", [])
+        }
+        _keywords = (stamp, sorted(keywords))
+    return _keywords[1]
+
+
+def _has_keyword(text: str, keyword: str, is_prefix: bool) -> bool:
+    """Word-start occurrence of `keyword` (whole word unless a prefix)."""
+    i = text.find(keyword)
+    while i != -1:
+        end = i + len(keyword)
+        if (i == 0 or not text[i - 1].isalnum()) and (
+            is_prefix or end == len(text) or not text[end].isalpha()
+        ):
+            return True
+        i = text.find(keyword, i + 1)
+    return False
+
+
+def needs_pipeline(prompt: str) -> bool:
+    """False only if no pipeline stage could change this prompt."""
+    if os.path.exists(PROJECT_CONFIG):
+        return True
+    if prompt.rstrip().endswith("-u") or is_continuation_prompt(prompt):
+        return True
+    try:
+        keywords = _load_keywords()
+    except (OSError, ValueError):
+        return True
+    lower = prompt.lower()
+    return any(_has_keyword(lower, k, is_prefix) for k, is_prefix in keywords)
+
+
+def passthrough(raw_input: bytes | str) -> str | None:
+    """Return the prompt if the pipeline would leave it unchanged, else None."""
+    try:
+        payload = json.loads(raw_input)
+        prompt = payload.get("prompt", "")
+    except (ValueError, AttributeError):
+        return None
+    if not isinstance(prompt, str) or needs_pipeline(prompt):
+        return None
+    return prompt
@@ -0,0 +1,253 @@
+"""
+Single-pass UserPromptSubmit pipeline.
+
+The hook payload is parsed once into a PromptContext that is handed to each
+enabled stage in order. Stages only annotate the context (strip the `-u`
+suffix, queue context blocks, attach session state); render() turns the
+final context into the one piece of output Claude Code receives.
+
+Hook entry points call prompt_fastpath.passthrough() first and only import
+this module when a stage could change the prompt.
+
+Keyword-driven stages share one scan of the prompt against the rules in
+userpromptsubmit/context_rules.json (see keyword_matcher.py).
+
+Blocks are injected once per Claude Code session: a rule paragraph or
+session TL;DR the model has already seen is skipped until its text changes
+or the conversation is compacted (see injection_cache.py).
+
+Stages register themselves with @stage(name). Which stages run, and in what
+order, comes from the first config file found:
+
+    <project>/.claude/prompt_pipeline.json
+    hooks/userpromptsubmit/prompt_pipeline.json
+
+Config format:
+    {"stages": ["ultrathink", "task_nudge", "session_context"],
+     "session_context": {"token_budget": 600}}
+
+The session_context block is filled to a token budget in section priority
+order (see context_budget.py).
+"""
+
+import json
+import os
+import sys
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import context_budget
+import injection_cache
+import keyword_matcher
+import session_store
+import task_index
+from prompt_fastpath import is_continuation_prompt
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_CONFIG = HOOKS_DIR / "userpromptsubmit" / "prompt_pipeline.json"
+PROJECT_CONFIG = Path(".claude") / "prompt_pipeline.json"
+RULES_FILE = HOOKS_DIR / "userpromptsubmit" / "context_rules.json"
+
+DEFAULT_STAGES = [
+    "ultrathink",
+    "task_nudge",
+    "security_context",
+    "bitcoin_context",
+    "testing_context",
+    "session_context",
+]
+
+
+@dataclass
+class PromptContext:
+    """State shared by every stage for one prompt."""
+    payload: dict
+    prompt: str
+    ultrathink: bool = False
+    additions: list[str] = field(default_factory=list)
+    session_block: str = ""
+    injected: injection_cache.InjectionState = field(
+        default_factory=lambda: injection_cache.InjectionState(None)
+    )
+    _matched: set[str] | None = None
+
+    @property
+    def matcher(self) -> keyword_matcher.KeywordMatcher:
+        return keyword_matcher.load_matcher(RULES_FILE)
+
+    def matched_rules(self) -> set[str]:
+        """Rule categories present in the prompt, scanned once on first use."""
+        if self._matched is None:
+            self._matched = self.matcher.match(self.prompt)
+        return self._matched
+
+
+STAGES: dict[str, Callable[[PromptContext], None]] = {}
+
+
+def stage(name: str):
+    """Register a pipeline stage under `name`."""
+    def register(fn: Callable[[PromptContext], None]):
+        STAGES[name] = fn
+        return fn
+    return register
+
+
+@stage("ultrathink")
+def ultrathink_stage(ctx: PromptContext):
+    """Handle ultrathink mode (-u suffix)."""
+    if ctx.prompt.rstrip().endswith("-u"):
+        ctx.prompt = ctx.prompt.rstrip()[:-2].rstrip()
+        ctx.ultrathink = True
+
+
+def add_rule_context(ctx: PromptContext, rule_name: str) -> bool:
+    """Queue a rule's context text if any of its keywords are in the prompt.
+
+    Text already injected earlier in this session is not repeated.
+    """
+    if rule_name not in ctx.matched_rules():
+        return False
+    text = ctx.matcher.rules[rule_name].text
+    if not ctx.injected.is_fresh(rule_name, text):
+        return False
+    ctx.additions.append(text)
+    ctx.injected.mark(rule_name, text)
+    return True
+
+
+@stage("task_nudge")
+def task_nudge_stage(ctx: PromptContext):
+    """Suggest /task-next when starting work without an in-progress task."""
+    if "task_nudge" not in ctx.matched_rules():
+        return
+
+    # Check if we're in a project with tasks
+    if not os.path.isdir(".tasks"):
+        return
+
+    # Check if there's an active task
+    active_tasks = task_index.count_by_status()["in_progress"]
+
+    if active_tasks == 0:
+        add_rule_context(ctx, "task_nudge")
+
+
+@stage("security_context")
+def security_context_stage(ctx: PromptContext):
+    """Add security considerations for security/review prompts."""
+    add_rule_context(ctx, "security_context")
+
+
+@stage("bitcoin_context")
+def bitcoin_context_stage(ctx: PromptContext):
+    """Add protocol context for Bitcoin/Lightning prompts."""
+    add_rule_context(ctx, "bitcoin_context")
+
+
+@stage("testing_context")
+def testing_context_stage(ctx: PromptContext):
+    """Add testing guidance for test/coverage prompts."""
+    add_rule_context(ctx, "testing_context")
+
+
+def session_block(
+    session_file: Path, budget: int | None = None
+) -> tuple[str, context_budget.Assembly]:
+    """Render the session context block within the configured token budget."""
+    options = load_config().get("session_context", {})
+    if budget is None:
+        budget = options.get("token_budget", context_budget.DEFAULT_BUDGET)
+    priority = options.get("priority", context_budget.DEFAULT_PRIORITY)
+
+    lines = context_budget.READ_LINES
+    context = session_store.get_session_context(session_file, lines, lines, lines)
+    sections = {
+        "TL;DR": context["tldr"],
+        "Key Context": context["key_context"],
+        "Next Steps": context["next_steps"],
+    }
+    header = f"""[Session Context: {context['shortname']}]
+{f"(After {context['compactions']} compaction(s))" if context['compactions'] > 0 else ""}
+"""
+    headings = "".join(f"\n## {name}\n" for name, text in sections.items() if text)
+    assembly = context_budget.assemble(sections, budget, priority, header + headings + "\n---")
+
+    block = header
+    for name in sections:
+        if assembly.sections.get(name):
+            block += f"\n## {name}\n{assembly.sections[name]}\n"
+    return block + "\n---", assembly
+
+
+@stage("session_context")
+def session_context_stage(ctx: PromptContext):
+    """Inject the active session's TL;DR for continuation prompts."""
+    session_file = session_store.get_active_session()
+    if not session_file or not is_continuation_prompt(ctx.prompt):
+        return
+
+    block, assembly = session_block(session_file)
+    # The block carries the compaction count, so it is re-sent after every
+    # compaction as well as whenever the TL;DR or next steps change.
+    if ctx.injected.is_fresh("session_context", block):
+        ctx.session_block = block
+        ctx.injected.mark("session_context", block)
+        print(f"session_context: {assembly.report()}", file=sys.stderr)
+
+
+def load_config() -> dict:
+    """The first readable pipeline config, project before default."""
+    for config in (PROJECT_CONFIG, DEFAULT_CONFIG):
+        try:
+            data = json.loads(config.read_text())
+            if isinstance(data, dict):
+                return data
+            raise TypeError("expected a JSON object")
+        except FileNotFoundError:
+            continue
+        except (ValueError, TypeError) as e:
+            print(f"prompt_pipeline: ignoring bad config {config}: {e}", file=sys.stderr)
+    return {}
+
+
+def load_stages() -> list[str]:
+    """Resolve the enabled stage names from project or default config."""
+    stages = load_config().get("stages")
+    return stages if isinstance(stages, list) else DEFAULT_STAGES
+
+
+def render(ctx: PromptContext) -> str:
+    """Build the single hook output from the final context."""
+    output = ctx.prompt
+    if ctx.session_block:
+        output = f"{ctx.session_block}\nUser request: {output}"
+
+    if ctx.additions:
+        output += "\n\n" + "\n".join(ctx.additions)
+
+    if ctx.ultrathink:
+        output += "\n\nultrathink"
+
+    return output
+
+
+def process(input_data: dict, stages: list[str] | None = None) -> str:
+    """Run the pipeline over one parsed hook payload and return its output."""
+    ctx = PromptContext(
+        payload=input_data,
+        prompt=input_data.get("prompt", ""),
+        injected=injection_cache.InjectionState(input_data.get("session_id")),
+    )
+
+    for name in stages if stages is not None else load_stages():
+        fn = STAGES.get(name)
+        if fn is None:
+            print(f"prompt_pipeline: unknown stage {name!r}", file=sys.stderr)
+            continue
+        fn(ctx)
+
+    ctx.injected.save()
+    return render(ctx)
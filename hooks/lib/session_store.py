@@ -0,0 +1,943 @@
+#!/usr/bin/env python3
+"""
+Read access to session files under .sessions/ (see SESSIONS.md).
+
+Shared by the prompt pipeline and any hook that needs the active session's
+frontmatter or a handful of its sections.
+
+Session journals grow to many MB across compactions, so files are not
+re-split on every lookup. One pass over the file records the frontmatter
+fields and the byte range of every `## ` section and `**Label**` block into
+a SessionIndex. Indexes are cached in memory and on disk keyed by the
+file's (inode, mtime, size); a section lookup is then a single seek and a
+read of just that range, through mmap for large files.
+
+When no valid index is cached (the file was just appended to), hooks use
+stream_sections() instead: a bounded read that stops once the requested
+sections are captured and skips over the append-only sections.
+
+The active session is resolved through .sessions/registry.json, which the
+session commands maintain, so hooks never scan .sessions/active/. Several
+sessions can be active in one repo; each is matched to its cwd and branch.
+
+Usage:
+    session_store.py active                     # Path of the active session
+    session_store.py list [--status paused]     # Registered sessions
+    session_store.py register <session-file>    # Add/refresh (status active)
+    session_store.py set-status <id|shortname> <status>
+    session_store.py unregister <id|shortname>
+
+    # One call for shell hooks: read (and optionally update) the session.
+    eval "$(session_store.py export --section 'TL;DR=6' --checklist 7 \\
+            --blockers 3 --increment compaction_count --now updated_at)"
+
+    session_store.py update <file> --increment compaction_count --now updated_at
+
+    # Check the indexed and streamed readers agree on a file.
+    session_store.py compare <file>... [--section 'TL;DR=8'] [--label 'Key Context=8']
+"""
+
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+INDEX_VERSION = 3
+REGISTRY_VERSION = 1
+
+# Maps session ids to their file, cwd, branch and status (see SESSIONS.md).
+REGISTRY_FILE = Path(".sessions") / "registry.json"
+
+CACHE_DIR = Path.home() / ".cache" / "claude-hooks" / "sessions"
+
+# Files at least this large are read through mmap instead of read().
+MMAP_THRESHOLD = 1024 * 1024
+
+# Sections that only ever get appended to; streaming reads skip over them.
+APPEND_ONLY_SECTIONS = (
+    "Progress",
+    "Decisions",
+    "Discoveries",
+    "Files Modified This Session",
+)
+
+# Upper bound on bytes a streaming read consumes (frontmatter + sections),
+# unless CLAUDE_SESSION_READ_BUDGET says otherwise.
+DEFAULT_BYTE_BUDGET = 256 * 1024
+
+# Read size used when skipping over append-only sections.
+SKIP_CHUNK = 64 * 1024
+
+# Frontmatter is expected within the first few KB; read more only if not.
+FRONTMATTER_READ = 16 * 1024
+
+_LABEL_RE = re.compile(r"\*\*([^*]+)\*\*")
+
+# Lines that delimit sections: `## Heading` or a leading `**Label**`.
+_MARKER_RE = re.compile(rb"^(?:## (?P<heading>[^\r\n]*)|\*\*(?P<label>[^*\r\n]+)\*\*(?P<rest>[^\r\n]*))", re.M)
+
+
+@dataclass
+class SessionIndex:
+    """Frontmatter and section byte ranges of one session file."""
+    stamp: list[int]
+    frontmatter: dict[str, str] = field(default_factory=dict)
+    # Heading text (without "## ") -> [body_start, body_end).
+    sections: dict[str, list[int]] = field(default_factory=dict)
+    # Bold label (without the asterisks) -> [body_start, body_end).
+    labels: dict[str, list[int]] = field(default_factory=dict)
+
+    def find(self, table: dict[str, list[int]], name: str) -> list[int] | None:
+        """The first entry, in file order, whose name starts with `name`.
+
+        The same rule stream_sections() applies, so `## TL;DR (Read This
+        First)` before `## TL;DR` resolves to the former in both readers.
+        """
+        for key, span in table.items():
+            if key.startswith(name):
+                return span
+        return None
+
+
+def utc_now() -> str:
+    """Current time in the ISO-8601 form used by session frontmatter."""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def current_branch(root: Path = Path(".")) -> str | None:
+    """Current git branch from .git/HEAD, without forking git."""
+    git = root / ".git"
+    try:
+        if git.is_file():
+            # Worktrees and submodules: ".git" holds "gitdir: <path>".
+            git = root / git.read_text().split(":", 1)[1].strip()
+        head = (git / "HEAD").read_text().strip()
+    except (OSError, IndexError):
+        return None
+    if head.startswith("ref: refs/heads/"):
+        return head[len("ref: refs/heads/"):]
+    return None
+
+
+def read_registry() -> dict[str, dict] | None:
+    """Return {session id: entry} from the registry, or None if there is none."""
+    try:
+        return json.loads(REGISTRY_FILE.read_text()).get("sessions", {})
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        return {}
+
+
+def update_registry(mutate) -> dict[str, dict]:
+    """Apply `mutate(sessions)` to the registry under an exclusive lock."""
+    REGISTRY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(REGISTRY_FILE.with_suffix(".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        sessions = read_registry() or {}
+        mutate(sessions)
+        tmp = REGISTRY_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(
+            {"version": REGISTRY_VERSION, "sessions": sessions}, indent=2
+        ) + "\n")
+        os.replace(tmp, REGISTRY_FILE)
+    return sessions
+
+
+def register_session(session_file: Path, status: str = "active") -> dict:
+    """Add or refresh a session's registry entry for this cwd and branch."""
+    with open(session_file, "rb") as f:
+        frontmatter, _ = parse_frontmatter(f.read(16 * 1024))
+    session_id = frontmatter.get("id") or session_file.stem
+    entry = {
+        "path": str(session_file),
+        "shortname": frontmatter.get("shortname", ""),
+        "cwd": os.getcwd(),
+        "branch": current_branch() or frontmatter.get("git_branch", ""),
+        "status": status,
+        "updated_at": utc_now(),
+    }
+    update_registry(lambda sessions: sessions.__setitem__(session_id, entry))
+    return {"id": session_id, **entry}
+
+
+def _resolve_id(sessions: dict[str, dict], key: str) -> str | None:
+    """Find a session id by id, id prefix or shortname."""
+    if key in sessions:
+        return key
+    for session_id, entry in sessions.items():
+        if session_id.startswith(key) or entry.get("shortname") == key:
+            return session_id
+    return None
+
+
+def set_session_status(key: str, status: str) -> bool:
+    """Set a registered session's status; returns False if it isn't registered."""
+    found = False
+
+    def mutate(sessions):
+        nonlocal found
+        session_id = _resolve_id(sessions, key)
+        if session_id is not None:
+            found = True
+            sessions[session_id]["status"] = status
+            sessions[session_id]["updated_at"] = utc_now()
+
+    update_registry(mutate)
+    return found
+
+
+def unregister_session(key: str) -> bool:
+    """Drop a session (by id or shortname) from the registry."""
+    found = False
+
+    def mutate(sessions):
+        nonlocal found
+        session_id = _resolve_id(sessions, key)
+        if session_id is not None:
+            found = True
+            del sessions[session_id]
+
+    update_registry(mutate)
+    return found
+
+
+def get_active_session() -> Path | None:
+    """Find the active session for this working directory and branch.
+
+    Active sessions are looked up in .sessions/registry.json, preferring one
+    registered for the current cwd and branch, then one for the cwd, then
+    the most recently updated. Projects without a registry fall back to the
+    first file in .sessions/active/.
+    """
+    sessions = read_registry()
+    if sessions is None:
+        sessions_dir = Path(".sessions/active")
+        if not sessions_dir.exists():
+            return None
+
+        sessions = list(sessions_dir.glob("*.md"))
+        return sessions[0] if sessions else None
+
+    cwd = os.getcwd()
+    branch = current_branch()
+
+    def rank(entry: dict) -> tuple:
+        return (
+            entry.get("cwd") == cwd and entry.get("branch") == branch,
+            entry.get("cwd") == cwd,
+            entry.get("updated_at", ""),
+        )
+
+    active = [e for e in sessions.values() if e.get("status") == "active"]
+    for entry in sorted(active, key=rank, reverse=True):
+        path = Path(entry["path"])
+        if path.exists():
+            return path
+    return None
+
+
+def _stamp(st: os.stat_result) -> list[int]:
+    return [st.st_ino, st.st_mtime_ns, st.st_size]
+
+
+def _read_all(path: Path, size: int):
+    """Return the file contents as bytes, or an mmap for large files."""
+    with open(path, "rb") as f:
+        if size >= MMAP_THRESHOLD:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return f.read()
+
+
+def parse_frontmatter(data) -> tuple[dict[str, str], int]:
+    """Parse top-level `key: value` frontmatter; return (fields, body offset)."""
+    fields: dict[str, str] = {}
+    if not data[:4].startswith(b"---"):
+        return fields, 0
+
+    pos = data.find(b"\n") + 1
+    while pos and pos < len(data):
+        end = data.find(b"\n", pos)
+        if end == -1:
+            end = len(data)
+        line = data[pos:end].decode("utf-8", "replace").rstrip("\r")
+        pos = end + 1
+        if line.strip() == "---":
+            return fields, pos
+        if ":" in line and not line.startswith((" ", "\t", "-")):
+            key, value = line.split(":", 1)
+            fields[key.strip()] = value.strip()
+    return fields, 0
+
+
+def build_index(path: Path, st: os.stat_result | None = None) -> SessionIndex:
+    """Scan a session file once and record its frontmatter and sections."""
+    st = st or os.stat(path)
+    index = SessionIndex(stamp=_stamp(st))
+    if st.st_size == 0:
+        return index
+
+    data = _read_all(path, st.st_size)
+    try:
+        index.frontmatter, body = parse_frontmatter(data)
+
+        # Spans still open; a repeated name gets a span of its own that is
+        # closed like any other but not recorded, so the first one stands.
+        open_heading: list[int] | None = None
+        open_label: list[int] | None = None
+        for m in _MARKER_RE.finditer(data, body):
+            line_end = data.find(b"\n", m.end())
+            next_line = len(data) if line_end == -1 else line_end + 1
+
+            if m.group("heading") is not None:
+                # A `## ` heading closes both the previous section and label.
+                if open_heading is not None:
+                    open_heading[1] = m.start()
+                if open_label is not None:
+                    open_label[1] = m.start()
+                    open_label = None
+                heading = m.group("heading").decode("utf-8", "replace").strip()
+                open_heading = [next_line, len(data)]
+                index.sections.setdefault(heading, open_heading)
+            else:
+                # Any new `**Label**` line closes the previous label, with or
+                # without a colon ("**Objective**: ...", "**Key Context** (...)").
+                if open_label is not None:
+                    open_label[1] = m.start()
+                label = m.group("label").decode("utf-8", "replace").strip()
+                open_label = [next_line, len(data)]
+                index.labels.setdefault(label, open_label)
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+    return index
+
+
+def _cache_path(path: Path) -> Path:
+    key = hashlib.sha1(str(path.resolve()).encode()).hexdigest()[:16]
+    return CACHE_DIR / f"{key}.json"
+
+
+_memory_cache: dict[Path, SessionIndex] = {}
+
+
+def cached_index(path: Path, st: os.stat_result | None = None) -> SessionIndex | None:
+    """Return a still-valid cached index for `path` without scanning the file."""
+    stamp = _stamp(st or os.stat(path))
+
+    cached = _memory_cache.get(path)
+    if cached and cached.stamp == stamp:
+        return cached
+
+    try:
+        raw = json.loads(_cache_path(path).read_text())
+        if raw.pop("version") == INDEX_VERSION and raw["stamp"] == stamp:
+            index = SessionIndex(**raw)
+            _memory_cache[path] = index
+            return index
+    except (FileNotFoundError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def load_index(path: Path) -> SessionIndex:
+    """Return the index for `path`, rebuilding it only if the file changed."""
+    st = os.stat(path)
+    index = cached_index(path, st)
+    if index is not None:
+        return index
+
+    index = build_index(path, st)
+    _memory_cache[path] = index
+    try:
+        cache_file = _cache_path(path)
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"version": INDEX_VERSION, **index.__dict__}))
+        os.replace(tmp, cache_file)
+    except OSError:
+        pass
+    return index
+
+
+def read_span(path: Path, span: list[int]) -> str:
+    """Read the byte range [start, end) of a file."""
+    start, end = span
+    with open(path, "rb") as f:
+        if end - start >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return mm[start:end].decode("utf-8", "replace")
+        f.seek(start)
+        return f.read(end - start).decode("utf-8", "replace")
+
+
+def _first_lines(text: str, max_lines: int, skip_blank: bool = False) -> str:
+    lines = text.split("\n")
+    if skip_blank:
+        lines = [line for line in lines if line.strip()]
+    return "\n".join(lines[:max_lines]).strip()
+
+
+def extract_section(path: Path, section_name: str, max_lines: int = 10) -> str:
+    """Extract the first `max_lines` lines of a `## ` section by heading name."""
+    index = load_index(path)
+    span = index.find(index.sections, section_name)
+    if span is None:
+        return ""
+    return _first_lines(read_span(path, span), max_lines)
+
+
+def extract_key_context(path: Path, max_lines: int = 8) -> str:
+    """Extract the Key Context subsection."""
+    index = load_index(path)
+    span = index.find(index.labels, "Key Context")
+    if span is None:
+        return ""
+    return _first_lines(read_span(path, span), max_lines, skip_blank=True)
+
+
+@dataclass
+class StreamResult:
+    """What a bounded streaming read managed to capture."""
+    frontmatter: dict[str, str] = field(default_factory=dict)
+    sections: dict[str, str] = field(default_factory=dict)
+    labels: dict[str, str] = field(default_factory=dict)
+    bytes_read: int = 0
+
+
+def _is_append_only(heading: str) -> bool:
+    return any(heading.startswith(name) for name in APPEND_ONLY_SECTIONS)
+
+
+def _skip_to_next_heading(f, limit: int) -> tuple[int, bool]:
+    """Advance `f` to the next `## ` line without decoding what's skipped.
+
+    `f` must be positioned at the start of a line. Returns the number of
+    bytes skipped and whether a heading was found within `limit` bytes.
+    """
+    skipped = 0
+    carry = b"\n"
+    while skipped < limit:
+        chunk = f.read(min(SKIP_CHUNK, limit - skipped))
+        if not chunk:
+            return skipped, False
+        pos = (carry + chunk).find(b"\n## ")
+        if pos != -1:
+            # Offset of the heading's first byte relative to this chunk.
+            offset = pos + 1 - len(carry)
+            f.seek(offset - len(chunk), os.SEEK_CUR)
+            return skipped + offset, True
+        skipped += len(chunk)
+        carry = chunk[-3:]
+    return skipped, False
+
+
+def _match(name: str, wanted: dict[str, int]) -> str | None:
+    for want in wanted:
+        if name.startswith(want):
+            return want
+    return None
+
+
+def _capture(buf: list[str], line: str, limit: int, skip_blank: bool) -> bool:
+    """Add a line to a capture buffer; return True once the buffer is full."""
+    if not (skip_blank and not line.strip()):
+        buf.append(line)
+    return len(buf) >= limit
+
+
+def stream_sections(
+    path: Path,
+    sections: dict[str, int],
+    labels: dict[str, int] | None = None,
+    byte_budget: int | None = None,
+) -> StreamResult:
+    """Read frontmatter plus the first lines of the requested sections.
+
+    `sections` maps `## ` heading prefixes and `labels` maps `**Label**`
+    names to the number of lines wanted. Reading stops as soon as every
+    request is satisfied or `byte_budget` bytes have been read.
+
+    Append-only sections (the progress checklist, decisions, discoveries)
+    are skipped with a raw search for the next heading rather than read
+    line by line. If they are too large to skip within half the budget,
+    the remaining sections, such as Next Steps, are looked up in a window
+    at the end of the file instead.
+    """
+    labels = labels or {}
+    if byte_budget is None:
+        # Read per call: hookd applies each request's environment.
+        byte_budget = int(os.environ.get("CLAUDE_SESSION_READ_BUDGET", DEFAULT_BYTE_BUDGET))
+    budget = byte_budget
+    result = StreamResult()
+    pending_sections = dict(sections)
+    pending_labels = dict(labels)
+
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+
+        # Frontmatter.
+        first = f.readline()
+        result.bytes_read += len(first)
+        if first.strip() == b"---":
+            while result.bytes_read < budget:
+                raw = f.readline()
+                result.bytes_read += len(raw)
+                line = raw.decode("utf-8", "replace").rstrip("\r\n")
+                if not raw or line.strip() == "---":
+                    break
+                if ":" in line and not line.startswith((" ", "\t", "-")):
+                    key, value = line.split(":", 1)
+                    result.frontmatter[key.strip()] = value.strip()
+        else:
+            f.seek(0)
+            result.bytes_read = 0
+
+        # Forward pass over the leading, rarely-rewritten sections.
+        section_buf: list[str] | None = None
+        section_name = ""
+        label_buf: list[str] | None = None
+        label_name = ""
+        reached_tail = False
+        # At most half the budget is spent skipping append-only sections;
+        # the rest is kept for the tail window.
+        skip_allowance = budget // 2
+
+        def close_section():
+            nonlocal section_buf
+            if section_buf is not None:
+                result.sections[section_name] = "\n".join(section_buf).strip()
+                pending_sections.pop(section_name, None)
+                section_buf = None
+
+        def close_label():
+            nonlocal label_buf
+            if label_buf is not None:
+                result.labels[label_name] = "\n".join(label_buf).strip()
+                pending_labels.pop(label_name, None)
+                label_buf = None
+
+        while (pending_sections or pending_labels) and result.bytes_read < budget:
+            raw = f.readline()
+            if not raw:
+                break
+            result.bytes_read += len(raw)
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+
+            if line.startswith("## "):
+                close_section()
+                close_label()
+                if not (pending_sections or pending_labels):
+                    break
+                heading = line[3:].strip()
+                if _is_append_only(heading):
+                    skipped, found = _skip_to_next_heading(f, skip_allowance)
+                    result.bytes_read += skipped
+                    skip_allowance -= skipped
+                    if not found:
+                        reached_tail = skip_allowance <= 0
+                        break
+                    continue
+                want = _match(heading, pending_sections)
+                if want is not None:
+                    section_buf, section_name = [], want
+                continue
+
+            if section_buf is not None and _capture(
+                section_buf, line, pending_sections[section_name], False
+            ):
+                close_section()
+
+            m = _LABEL_RE.match(line) if line.startswith("**") else None
+            if m:
+                # Any new `**Label**` line ends the label being captured; the
+                # line itself still belongs to the section around it.
+                close_label()
+                want = _match(m.group(1).strip(), pending_labels)
+                if want is not None:
+                    label_buf, label_name = [], want
+            elif label_buf is not None and _capture(
+                label_buf, line, pending_labels[label_name], True
+            ):
+                close_label()
+
+        close_section()
+        close_label()
+
+        # Tail window for sections that come after the append-only ones.
+        remaining = budget - result.bytes_read
+        if reached_tail and pending_sections and remaining > 0:
+            start = max(f.tell(), size - remaining)
+            f.seek(start)
+            tail = f.read(size - start)
+            result.bytes_read += len(tail)
+            for want, limit in list(pending_sections.items()):
+                pos = tail.rfind(b"\n## " + want.encode())
+                if pos == -1:
+                    continue
+                body = tail[tail.find(b"\n", pos + 1) + 1:]
+                end = body.find(b"\n## ")
+                if end != -1:
+                    body = body[:end]
+                lines = body.decode("utf-8", "replace").split("\n")[:limit]
+                result.sections[want] = "\n".join(lines).strip()
+                pending_sections.pop(want)
+
+    return result
+
+
+def get_session_context(
+    session_file: Path,
+    tldr_lines: int = 8,
+    next_steps_lines: int = 5,
+    key_context_lines: int = 8,
+) -> dict:
+    """Extract key context from session file.
+
+    Uses the section index when a valid one is cached; otherwise does a
+    bounded streaming read so hook latency doesn't grow with the file.
+    """
+    index = cached_index(session_file)
+    if index is not None:
+        frontmatter = index.frontmatter
+        tldr = extract_section(session_file, "TL;DR", tldr_lines)
+        next_steps = extract_section(session_file, "Next Steps", next_steps_lines)
+        key_context = extract_key_context(session_file, key_context_lines)
+    else:
+        streamed = stream_sections(
+            session_file,
+            sections={"TL;DR": tldr_lines, "Next Steps": next_steps_lines},
+            labels={"Key Context": key_context_lines},
+        )
+        frontmatter = streamed.frontmatter
+        tldr = streamed.sections.get("TL;DR", "")
+        next_steps = streamed.sections.get("Next Steps", "")
+        key_context = streamed.labels.get("Key Context", "")
+
+    try:
+        compactions = int(frontmatter.get("compaction_count", "0"))
+    except ValueError:
+        compactions = 0
+
+    return {
+        'shortname': frontmatter.get("shortname", ""),
+        'compactions': compactions,
+        'tldr': tldr,
+        'next_steps': next_steps,
+        'key_context': key_context,
+    }
+
+
+def atomic_write(path: Path, data: bytes, tail_from: int | None = None):
+    """Replace `path` via a temp file and rename, keeping its mode.
+
+    With `tail_from`, the current file's bytes from that offset on are
+    appended after `data` without passing through Python.
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            if tail_from is not None:
+                with open(path, "rb") as src:
+                    _copy_tail(src, f, tail_from)
+        try:
+            os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    _memory_cache.pop(path, None)
+
+
+def _copy_tail(src, dst, offset: int):
+    """Copy src[offset:] to the end of dst, in-kernel where supported."""
+    dst.flush()
+    size = os.fstat(src.fileno()).st_size
+    if hasattr(os, "copy_file_range"):
+        try:
+            while offset < size:
+                n = os.copy_file_range(src.fileno(), dst.fileno(), size - offset, offset)
+                if n == 0:
+                    return
+                offset += n
+            return
+        except OSError:
+            pass
+    src.seek(offset)
+    dst.seek(0, os.SEEK_END)
+    while chunk := src.read(SKIP_CHUNK):
+        dst.write(chunk)
+
+
+def apply_frontmatter(data: bytes, updates: dict[str, str]) -> bytes:
+    """Return `data` with the given frontmatter fields set, in one pass.
+
+    Existing `key:` lines are rewritten in place; new keys are added just
+    before the closing `---`. Everything after the frontmatter is untouched.
+    """
+    if not data.startswith(b"---"):
+        return data
+
+    _, body = parse_frontmatter(data)
+    if body == 0:
+        return data
+
+    head = data[:body].decode("utf-8").split("\n")
+    remaining = dict(updates)
+    for i, line in enumerate(head[1:], start=1):
+        key = line.split(":", 1)[0].strip()
+        if ":" in line and not line.startswith((" ", "\t", "-")) and key in remaining:
+            head[i] = f"{key}: {remaining.pop(key)}"
+    # head[-1] is the empty string after the closing "---\n".
+    closing = len(head) - 2
+    head[closing:closing] = [f"{key}: {value}" for key, value in remaining.items()]
+    return "\n".join(head).encode() + data[body:]
+
+
+def read_frontmatter_block(path: Path) -> tuple[bytes, int]:
+    """Return (bytes up to the end of the frontmatter, body offset).
+
+    Only the head of the file is read; the body offset is 0 when the file
+    has no frontmatter.
+    """
+    with open(path, "rb") as f:
+        head = f.read(FRONTMATTER_READ)
+        _, body = parse_frontmatter(head)
+        if body == 0 and len(head) == FRONTMATTER_READ:
+            head += f.read()
+            _, body = parse_frontmatter(head)
+    return head[:body], body
+
+
+def update_frontmatter(
+    path: Path,
+    updates: dict[str, str] | None = None,
+    increments: list[str] | tuple = (),
+    write: bool = True,
+) -> dict[str, str]:
+    """Set and/or increment frontmatter fields with a single atomic write.
+
+    Only the frontmatter is parsed in Python; the body is copied to the new
+    file as-is. Returns the frontmatter as it is after the update; with
+    `write` off, as it would be, leaving the file untouched.
+    """
+    path = Path(path)
+    head, body = read_frontmatter_block(path)
+    frontmatter, _ = parse_frontmatter(head)
+
+    changes = dict(updates or {})
+    for key in increments:
+        try:
+            changes[key] = str(int(frontmatter.get(key, "0") or 0) + 1)
+        except ValueError:
+            changes[key] = "1"
+
+    if changes and body:
+        if write:
+            atomic_write(path, apply_frontmatter(head, changes), tail_from=body)
+        frontmatter.update(changes)
+    return frontmatter
+
+
+def _var_name(prefix: str, name: str) -> str:
+    return prefix + re.sub(r"[^A-Z0-9]+", "_", name.upper()).strip("_")
+
+
+def export_session(
+    session_file: Path | None,
+    sections: dict[str, int],
+    labels: dict[str, int],
+    checklist: int = 0,
+    blockers: int = 0,
+    updates: dict[str, str] | None = None,
+    increments: list[str] | tuple = (),
+) -> dict[str, str]:
+    """Collect everything a shell hook needs from a session in one pass.
+
+    Returned keys are shell variable names: SESSION_FILE, SESSION_<FIELD>
+    for every frontmatter field, SECTION_<NAME>, LABEL_<NAME>, CHECKLIST,
+    CHECKLIST_DONE, CHECKLIST_TOTAL and BLOCKERS. Updates are applied first
+    so the exported frontmatter reflects them.
+    """
+    env = {"SESSION_FILE": ""}
+    if session_file is None:
+        return env
+    env["SESSION_FILE"] = str(session_file)
+
+    if updates or increments:
+        update_frontmatter(session_file, updates, increments)
+
+    index = load_index(session_file)
+    for key, value in index.frontmatter.items():
+        env[_var_name("SESSION_", key)] = value
+
+    for name, max_lines in sections.items():
+        env[_var_name("SECTION_", name)] = extract_section(session_file, name, max_lines)
+
+    for name, max_lines in labels.items():
+        span = index.find(index.labels, name)
+        text = read_span(session_file, span) if span else ""
+        env[_var_name("LABEL_", name)] = _first_lines(text, max_lines, skip_blank=True)
+
+    if checklist:
+        span = index.find(index.sections, "Progress")
+        lines = read_span(session_file, span).split("\n") if span else []
+        items = [line for line in lines if line.startswith("- [")]
+        env["CHECKLIST"] = "\n".join(items[:checklist])
+        env["CHECKLIST_DONE"] = str(sum(line.startswith("- [x]") for line in items))
+        env["CHECKLIST_TOTAL"] = str(len(items))
+
+    if blockers:
+        span = index.find(index.sections, "Blockers")
+        lines = read_span(session_file, span).split("\n") if span else []
+        real = [line for line in lines if line.strip() and not line.startswith("- None")]
+        env["BLOCKERS"] = "\n".join(real[:blockers])
+
+    return env
+
+
+def compare_paths(
+    path: Path,
+    sections: dict[str, int],
+    labels: dict[str, int],
+) -> list[str]:
+    """Differences between the indexed and streamed reads of `path`.
+
+    Both paths must return the same text for every requested section and
+    label; the streamed read gets an unbounded budget for the comparison.
+    """
+    index = build_index(path)
+    streamed = stream_sections(path, sections, labels, byte_budget=os.stat(path).st_size + 1)
+    diffs = []
+    for kind, table, found, wanted, skip_blank in (
+        ("section", index.sections, streamed.sections, sections, False),
+        ("label", index.labels, streamed.labels, labels, True),
+    ):
+        for name, max_lines in wanted.items():
+            span = index.find(table, name)
+            indexed = _first_lines(read_span(path, span), max_lines, skip_blank) if span else ""
+            if indexed != found.get(name, ""):
+                diffs.append(f"{kind} {name!r}: indexed {indexed!r} != streamed {found.get(name, '')!r}")
+    return diffs
+
+
+def parse_counts(specs: list[str]) -> dict[str, int]:
+    """Parse repeated NAME=N options."""
+    counts = {}
+    for spec in specs:
+        name, _, n = spec.rpartition("=")
+        counts[name] = int(n)
+    return counts
+
+
+def main():
+    # CLI-only imports stay out of the hooks' import path.
+    import argparse
+    import shlex
+
+    parser = argparse.ArgumentParser(description="Session registry and reader.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("active", help="Print the active session file for this cwd/branch")
+
+    list_cmd = sub.add_parser("list", help="List registered sessions")
+    list_cmd.add_argument("--status", help="Only sessions with this status")
+
+    register = sub.add_parser("register", help="Register or refresh a session")
+    register.add_argument("session_file", type=Path)
+    register.add_argument("--status", default="active")
+
+    status = sub.add_parser("set-status", help="Change a session's status")
+    status.add_argument("session")
+    status.add_argument("status")
+
+    unregister = sub.add_parser("unregister", help="Remove a session")
+    unregister.add_argument("session")
+
+    export = sub.add_parser(
+        "export", help="Print shell assignments for the active session"
+    )
+    export.add_argument("--file", type=Path, help="Session file (default: active)")
+    export.add_argument("--section", action="append", default=[], metavar="NAME=N")
+    export.add_argument("--label", action="append", default=[], metavar="NAME=N")
+    export.add_argument("--checklist", type=int, default=0, metavar="N")
+    export.add_argument("--blockers", type=int, default=0, metavar="N")
+    export.add_argument("--set", action="append", default=[], metavar="FIELD=VALUE")
+    export.add_argument("--now", action="append", default=[], metavar="FIELD",
+                        help="Set FIELD to the current UTC time")
+    export.add_argument("--increment", action="append", default=[], metavar="FIELD")
+
+    compare = sub.add_parser(
+        "compare", help="Check the indexed and streamed reads of a file agree"
+    )
+    compare.add_argument("files", type=Path, nargs="+", metavar="file")
+    compare.add_argument("--section", action="append", metavar="NAME=N")
+    compare.add_argument("--label", action="append", metavar="NAME=N")
+
+    update = sub.add_parser("update", help="Atomically update frontmatter fields")
+    update.add_argument("file", type=Path)
+    update.add_argument("--set", action="append", default=[], metavar="FIELD=VALUE")
+    update.add_argument("--now", action="append", default=[], metavar="FIELD")
+    update.add_argument("--increment", action="append", default=[], metavar="FIELD")
+
+    args = parser.parse_args()
+
+    if args.command == "active":
+        session = get_active_session()
+        if session is None:
+            sys.exit(1)
+        print(session)
+    elif args.command == "list":
+        for session_id, entry in (read_registry() or {}).items():
+            if args.status is None or entry.get("status") == args.status:
+                print(f"{session_id}\t{entry.get('status')}\t{entry.get('branch')}\t{entry['path']}")
+    elif args.command == "register":
+        entry = register_session(args.session_file, args.status)
+        print(f"Registered {entry['shortname'] or entry['id']} ({entry['status']})")
+    elif args.command == "set-status":
+        if not set_session_status(args.session, args.status):
+            print(f"No registered session {args.session!r}", file=sys.stderr)
+            sys.exit(1)
+    elif args.command == "unregister":
+        if not unregister_session(args.session):
+            print(f"No registered session {args.session!r}", file=sys.stderr)
+            sys.exit(1)
+    elif args.command == "compare":
+        sections = parse_counts(args.section or ["TL;DR=8", "Next Steps=5", "Context=8"])
+        labels = parse_counts(args.label or ["Objective=3", "Key Files=8", "Key Context=8"])
+        failed = False
+        for path in args.files:
+            for diff in compare_paths(path, sections, labels):
+                print(f"{path}: {diff}")
+                failed = True
+        sys.exit(1 if failed else 0)
+    elif args.command in ("export", "update"):
+        updates = dict(spec.split("=", 1) for spec in args.set)
+        updates.update({field: utc_now() for field in args.now})
+        if args.command == "update":
+            update_frontmatter(args.file, updates, args.increment)
+            return
+        env = export_session(
+            args.file or get_active_session(),
+            sections=parse_counts(args.section),
+            labels=parse_counts(args.label),
+            checklist=args.checklist,
+            blockers=args.blockers,
+            updates=updates,
+            increments=args.increment,
+        )
+        for name, value in env.items():
+            print(f"{name}={shlex.quote(value)}")
+
+
+if __name__ == "__main__":
+    main()
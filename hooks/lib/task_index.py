@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Incremental status index for task files under .tasks/active.
+
+Counting in-progress tasks used to mean reading every task file in full on
+every prompt. The index remembers each file's (mtime, size, status); a
+refresh only stats the tree and re-reads the frontmatter of files that were
+added or changed since the last run.
+
+The index lives outside the project, in
+~/.cache/claude-hooks/tasks/<hash of the .tasks/active path>.json.
+
+Usage:
+    task_index.py count                     # "<status> <n>" for every status
+    task_index.py count in_progress ready   # Just these statuses, one per line
+"""
+
+import hashlib
+import json
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+
+INDEX_VERSION = 1
+
+CACHE_DIR = Path.home() / ".cache" / "claude-hooks" / "tasks"
+
+# Frontmatter longer than this is malformed; stop looking for `status:`.
+MAX_FRONTMATTER_LINES = 64
+
+
+def read_status(path: str) -> str | None:
+    """Return the `status:` value from a task file's YAML frontmatter."""
+    with open(path, "r", errors="replace") as f:
+        if f.readline().strip() != "---":
+            return None
+        for _ in range(MAX_FRONTMATTER_LINES):
+            line = f.readline()
+            if not line or line.strip() == "---":
+                break
+            if line.startswith("status:"):
+                return line.split(":", 1)[1].strip()
+    return None
+
+
+def _index_path(tasks_dir: Path) -> Path:
+    key = hashlib.sha1(str(tasks_dir.resolve()).encode()).hexdigest()[:16]
+    return CACHE_DIR / f"{key}.json"
+
+
+def _scan(root: str):
+    """Yield (path, stat) for every .md file below root."""
+    stack = [root]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".md"):
+                    try:
+                        yield entry.path, entry.stat()
+                    except OSError:
+                        continue
+
+
+def refresh(tasks_dir: Path = Path(".tasks/active")) -> dict[str, str | None]:
+    """Bring the index up to date and return {path: status}."""
+    index_file = _index_path(tasks_dir)
+    try:
+        index = json.loads(index_file.read_text())
+        if index.get("version") != INDEX_VERSION:
+            raise ValueError
+        files = index["files"]
+    except (FileNotFoundError, ValueError, KeyError):
+        files = {}
+
+    fresh = {}
+    changed = False
+    for path, st in _scan(str(tasks_dir)):
+        stamp = [st.st_mtime_ns, st.st_size]
+        cached = files.get(path)
+        if cached and cached[:2] == stamp:
+            fresh[path] = cached
+            continue
+        try:
+            fresh[path] = stamp + [read_status(path)]
+        except OSError:
+            continue
+        changed = True
+
+    if changed or len(fresh) != len(files):
+        index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = index_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"version": INDEX_VERSION, "files": fresh}))
+        os.replace(tmp, index_file)
+
+    return {path: entry[2] for path, entry in fresh.items()}
+
+
+def count_by_status(tasks_dir: Path = Path(".tasks/active")) -> Counter:
+    """Number of task files per frontmatter status."""
+    if not tasks_dir.is_dir():
+        return Counter()
+    return Counter(status for status in refresh(tasks_dir).values() if status)
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] != "count":
+        print(__doc__, file=sys.stderr)
+        sys.exit(2)
+
+    counts = count_by_status()
+    if len(args) > 1:
+        for status in args[1:]:
+            print(counts.get(status, 0))
+    else:
+        for status, n in sorted(counts.items()):
+            print(f"{status} {n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Spooled task sync to Substrate.
+
+Every TaskCreate/TaskUpdate/TaskList/TaskGet used to fork jq four times and
+a background shell running `substrate tasks hook-sync` for that one event,
+so a task-heavy plan filled the process table. Now the hook appends one
+line to a spool file (~/.subtrate/task_spool.jsonl) and returns, and a
+single flusher process pushes the spooled events:
+
+    - It waits until no event has arrived for FLUSH_DELAY_SECONDS, then
+      takes the whole spool as one batch.
+    - Per task list, updates to the same task are merged into one, and
+      only the newest TaskList, and the newest TaskGet of each task, is
+      kept.
+    - TaskList/TaskGet responses identical to the last ones synced are
+      no-ops and are dropped.
+    - Failed syncs are retried with exponential backoff, and dropped (and
+      logged) after MAX_ATTEMPTS. Until the retry, later events for the
+      same task list wait behind it and are coalesced with it, so an old
+      retry never lands on top of newer state.
+
+Only one flusher runs at a time (an flock on task_spool.lock); the hook
+starts one when none holds the lock, and it exits once the spool has been
+empty for IDLE_SECONDS.
+
+Usage:
+    task_spool.py append    # Hook: PostToolUse payload on stdin
+    task_spool.py flush     # Run the flusher in the foreground
+    task_spool.py status    # Show spooled and pending events
+
+Environment:
+    SUBSTRATE_CLI    substrate binary (default: PATH, ~/go/bin, ...)
+    TASK_SYNC_DEBUG  Set to 1 to log to ~/.subtrate/task_sync_debug.log
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import sys
+import time
+
+SPOOL_DIR = os.path.join(os.path.expanduser("~"), ".subtrate")
+SPOOL_FILE = os.path.join(SPOOL_DIR, "task_spool.jsonl")
+LOCK_FILE = os.path.join(SPOOL_DIR, "task_spool.lock")
+# Hashes of the last TaskList/TaskGet responses synced, for no-op detection.
+STATE_FILE = os.path.join(SPOOL_DIR, "task_spool_state.json")
+DEBUG_LOG = os.path.join(SPOOL_DIR, "task_sync_debug.log")
+
+FLUSH_DELAY_SECONDS = 0.5
+IDLE_SECONDS = 5
+MAX_ATTEMPTS = 6
+BACKOFF_SECONDS = 1
+MAX_BACKOFF_SECONDS = 60
+
+TOOLS = {
+    "TaskCreate": "create",
+    "TaskUpdate": "update",
+    "TaskList": "list",
+    "TaskGet": "get",
+}
+
+SUBSTRATE_FALLBACKS = ("~/go/bin/substrate", "~/gocode/bin/substrate", "/usr/local/bin/substrate")
+
+
+def debug_log(message: str):
+    if os.environ.get("TASK_SYNC_DEBUG", "0") != "1":
+        return
+    try:
+        os.makedirs(SPOOL_DIR, exist_ok=True)
+        with open(DEBUG_LOG, "a") as f:
+            f.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}\n")
+    except OSError:
+        pass
+
+
+def spool_event(input_data: dict) -> dict | None:
+    """The spool record for one PostToolUse payload, or None to ignore it."""
+    tool = TOOLS.get(input_data.get("tool_name") or "")
+    list_id = input_data.get("session_id")
+    if tool is None or not list_id:
+        return None
+    tool_input = input_data.get("tool_input") or {}
+    response = input_data.get("tool_response") or {}
+
+    task_id = tool_input.get("taskId", "")
+    if tool == "create":
+        # tool_input has the full fields, the response the assigned ID.
+        task = response.get("task", response) if isinstance(response, dict) else {}
+        payload = {"task": {**tool_input, **(task or {})}}
+        task_id = payload["task"].get("id", "")
+    elif tool == "update":
+        payload = tool_input
+    else:
+        payload = response
+    return {"list": list_id, "tool": tool, "task": str(task_id), "payload": payload}
+
+
+def append(input_data: dict) -> bool:
+    """Spool one event; returns False if it isn't a task sync event."""
+    event = spool_event(input_data)
+    if event is None:
+        return False
+    line = (json.dumps(event, separators=(",", ":")) + "\n").encode()
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    while True:
+        fd = os.open(SPOOL_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            # Shared: appenders don't block each other, only a flusher taking
+            # the file over waits for in-flight writes.
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            # A flusher may have renamed, read and unlinked the file between
+            # the open and the lock; writing now would lose the event.
+            st = os.fstat(fd)
+            try:
+                current = os.stat(SPOOL_FILE)
+            except FileNotFoundError:
+                current = None
+            if st.st_nlink == 0 or current is None or current.st_ino != st.st_ino:
+                continue
+            os.write(fd, line)
+            break
+        finally:
+            os.close(fd)
+    _ensure_flusher()
+    return True
+
+
+def _ensure_flusher():
+    fd = os.open(LOCK_FILE, os.O_WRONLY | os.O_CREAT, 0o600)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return  # A flusher is running and will pick the event up.
+
+        import subprocess
+
+        # The child inherits the locked descriptor, so the lock is never
+        # free between here and the flusher starting.
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "flush", "--lock-fd", str(fd)],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL, start_new_session=True, pass_fds=(fd,),
+        )
+    finally:
+        os.close(fd)
+
+
+def _digest(payload) -> str:
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _merge_update(into: dict, update: dict):
+    for key, value in update.items():
+        # addBlocks/addBlockedBy accumulate; everything else is last-wins.
+        if key.startswith("add") and isinstance(value, list) and isinstance(into.get(key), list):
+            into[key] = into[key] + [v for v in value if v not in into[key]]
+        else:
+            into[key] = value
+
+
+def coalesce(events: list[dict], synced: dict[str, str]) -> list[dict]:
+    """Reduce a batch to the syncs that still change something."""
+    out: list[dict] = []
+    pending_update: dict[tuple[str, str], dict] = {}
+    last_list: dict[str, int] = {}
+    last_get: dict[tuple[str, str], int] = {}
+
+    for n, event in enumerate(events):
+        key = (event["list"], event["task"])
+        if event["tool"] == "update" and event["task"]:
+            merged = pending_update.get(key)
+            if merged is not None:
+                _merge_update(merged["payload"], event["payload"])
+                continue
+            event = {**event, "payload": dict(event["payload"])}
+            pending_update[key] = event
+        elif event["tool"] == "create":
+            # Later updates must not be merged into ones before the create.
+            pending_update.pop(key, None)
+        elif event["tool"] == "list":
+            # Nor across a snapshot, which would then be replayed after
+            # the newer state and undo it.
+            for pending in [k for k in pending_update if k[0] == event["list"]]:
+                del pending_update[pending]
+            last_list[event["list"]] = n
+        elif event["tool"] == "get":
+            pending_update.pop(key, None)
+            last_get[key] = n
+        event["n"] = n
+        out.append(event)
+
+    result = []
+    for event in out:
+        n = event.pop("n")
+        if event["tool"] == "list":
+            if last_list[event["list"]] != n:
+                continue
+            if synced.get(f"list:{event['list']}") == _digest(event["payload"]):
+                continue
+        elif event["tool"] == "get":
+            key = (event["list"], event["task"])
+            if last_get[key] != n:
+                continue
+            if synced.get(f"get:{event['list']}:{event['task']}") == _digest(event["payload"]):
+                continue
+        result.append(event)
+    return result
+
+
+def _take_spool() -> list[dict]:
+    """Atomically move the spool aside and parse it."""
+    taken = f"{SPOOL_FILE}.{os.getpid()}"
+    try:
+        os.rename(SPOOL_FILE, taken)
+    except FileNotFoundError:
+        return []
+    events = []
+    with open(taken, "rb") as f:
+        # Wait for appenders that opened the file before the rename.
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                debug_log(f"dropping unparseable spool line: {line[:200]!r}")
+    os.unlink(taken)
+    return events
+
+
+def _substrate() -> str | None:
+    import shutil
+
+    found = shutil.which(os.environ.get("SUBSTRATE_CLI", "substrate"))
+    if found:
+        return found
+    for candidate in SUBSTRATE_FALLBACKS:
+        path = os.path.expanduser(candidate)
+        if os.access(path, os.X_OK):
+            return path
+    return None
+
+
+def push(substrate: str, event: dict) -> bool:
+    import subprocess
+
+    try:
+        with open(DEBUG_LOG if os.environ.get("TASK_SYNC_DEBUG") == "1" else os.devnull, "a") as log:
+            result = subprocess.run(
+                [substrate, "tasks", "hook-sync", "--tool", event["tool"],
+                 "--list", event["list"], "--session-id", event["list"]],
+                input=json.dumps(event["payload"]).encode(),
+                stdout=subprocess.DEVNULL, stderr=log, timeout=30,
+            )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        debug_log(f"hook-sync {event['tool']} failed: {e}")
+        return False
+    if result.returncode != 0:
+        debug_log(f"hook-sync {event['tool']} failed (exit {result.returncode})")
+    return result.returncode == 0
+
+
+def _load_state() -> dict[str, str]:
+    try:
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(state: dict[str, str]):
+    tmp = f"{STATE_FILE}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, STATE_FILE)
+
+
+def flush(lock_fd: int | None = None):
+    """Single flusher: batch, coalesce and push until the spool stays empty."""
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    if lock_fd is not None:
+        lock = os.fdopen(lock_fd, "w")
+    else:
+        lock = open(LOCK_FILE, "w")
+        try:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+
+    state = _load_state()
+    # List id -> (not before, events): a list with a failed sync holds its
+    # later events behind the retry, so a stale retry is never replayed on
+    # top of newer state. Events carry their failed attempt count.
+    held: dict[str, tuple[float, list[dict]]] = {}
+    idle_since = time.monotonic()
+
+    while True:
+        # Let a burst of tool calls finish before taking the batch.
+        try:
+            quiet = time.time() - os.stat(SPOOL_FILE).st_mtime
+            if quiet < FLUSH_DELAY_SECONDS:
+                time.sleep(FLUSH_DELAY_SECONDS - quiet)
+                continue
+        except FileNotFoundError:
+            pass
+
+        now = time.monotonic()
+        events = _take_spool()
+        fresh = []
+        for event in events:
+            if event["list"] in held:
+                held[event["list"]][1].append(event)
+            else:
+                fresh.append(event)
+        due = []
+        for list_id in [k for k, (not_before, _) in held.items() if not_before <= now]:
+            due += held.pop(list_id)[1]
+        # Retried events come first, so newer events are merged over them.
+        batch = coalesce(due + fresh, state)
+
+        substrate = _substrate() if batch else None
+        if batch and substrate is None:
+            debug_log(f"substrate CLI not found, dropping {len(batch)} event(s)")
+        elif batch:
+            idle_since = now
+            debug_log(f"flushing {len(batch)} sync(s) for {len(events)} new and "
+                      f"{len(due)} retried event(s)")
+            for event in batch:
+                if event["list"] in held:
+                    # An earlier sync of this list failed in this batch.
+                    held[event["list"]][1].append(event)
+                    continue
+                if push(substrate, event):
+                    if event["tool"] == "list":
+                        state[f"list:{event['list']}"] = _digest(event["payload"])
+                    elif event["tool"] == "get":
+                        state[f"get:{event['list']}:{event['task']}"] = _digest(event["payload"])
+                    continue
+                event["attempts"] = event.get("attempts", 0) + 1
+                if event["attempts"] >= MAX_ATTEMPTS:
+                    debug_log(f"giving up on {event['tool']} for list {event['list']}")
+                    continue
+                delay = min(BACKOFF_SECONDS * 2 ** (event["attempts"] - 1), MAX_BACKOFF_SECONDS)
+                held[event["list"]] = (time.monotonic() + delay, [event])
+            _save_state(state)
+        elif not held and not events and now - idle_since > IDLE_SECONDS:
+            # Release the lock before a last check, so an event spooled in
+            # between either sees no flusher and starts one, or is seen here.
+            lock.close()
+            if os.path.exists(SPOOL_FILE):
+                return flush()
+            return
+
+        time.sleep(FLUSH_DELAY_SECONDS)
+
+
+def status():
+    try:
+        with open(SPOOL_FILE, "rb") as f:
+            spooled = sum(1 for _ in f)
+    except FileNotFoundError:
+        spooled = 0
+    fd = os.open(LOCK_FILE, os.O_WRONLY | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        running = False
+    except BlockingIOError:
+        running = True
+    finally:
+        os.close(fd)
+    print(f"spooled events: {spooled}")
+    print(f"flusher: {'running' if running else 'not running'}")
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command == "append":
+        try:
+            input_data = json.load(sys.stdin)
+        except json.JSONDecodeError:
+            return
+        append(input_data)
+    elif command == "flush":
+        lock_fd = int(sys.argv[3]) if sys.argv[2:3] == ["--lock-fd"] else None
+        flush(lock_fd)
+    elif command == "status":
+        status()
+    else:
+        print(__doc__, file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
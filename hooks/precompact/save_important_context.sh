@@ -12,72 +12,62 @@ echo ""
 echo "💾 Pre-Compaction Checkpoint"
 echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
 
+# checkpoint.py resolves the active session (via the registry), bumps
+# compaction_count/updated_at with one atomic write per file, appends a
+# journal entry, and reads back the sections printed below. Given the hook
+# payload on stdin it also resets the prompt hooks' injection record.
+eval "$(python3 "$(dirname "$0")/../lib/checkpoint.py" --hook-input \
+    --section 'TL;DR=8' --section 'Next Steps=5' --label 'Key Context=9' \
+    --checklist 10 --blockers 3 2>/dev/null || echo SESSION_FILE=)"
+
 # Check for active session
 if [ -d ".sessions/active" ]; then
-    active_session=$(find .sessions/active -name "*.md" -type f 2>/dev/null | head -1)
+    active_session="${SESSION_FILE:-}"
 
     if [ -n "$active_session" ] && [ -f "$active_session" ]; then
-        # Extract session metadata
-        session_id=$(grep "^id:" "$active_session" 2>/dev/null | cut -d: -f2- | xargs || echo "")
-        shortname=$(grep "^shortname:" "$active_session" 2>/dev/null | cut -d: -f2- | xargs || echo "unknown")
-        current_count=$(grep "^compaction_count:" "$active_session" 2>/dev/null | cut -d: -f2 | xargs || echo "0")
-        new_count=$((current_count + 1))
+        shortname="${SESSION_SHORTNAME:-unknown}"
+        new_count="${SESSION_COMPACTION_COUNT:-1}"
 
         echo "Session: $shortname"
         echo "Compaction: #$new_count"
+        echo "Checkpoint: ${CHECKPOINT_MS:-?} ms"
         echo ""
 
-        # Update session file: increment compaction count and timestamp
-        sed -i '' "s/^compaction_count: .*/compaction_count: $new_count/" "$active_session" 2>/dev/null || true
-        sed -i '' "s/^updated_at: .*/updated_at: $(date -u +%Y-%m-%dT%H:%M:%SZ)/" "$active_session" 2>/dev/null || true
-
-        # Update progress file if it exists
-        if [ -n "$session_id" ]; then
-            progress_file=".sessions/journal/${session_id}/progress.md"
-            if [ -f "$progress_file" ]; then
-                sed -i '' "s/^compaction_count: .*/compaction_count: $new_count/" "$progress_file" 2>/dev/null || true
-                sed -i '' "s/^last_updated: .*/last_updated: $(date -u +%Y-%m-%dT%H:%M:%SZ)/" "$progress_file" 2>/dev/null || true
-            fi
-        fi
-
         # Output key context for the compaction summary
         echo "## Session Context (for next context window)"
         echo ""
 
         # TL;DR - most important for quick resume
-        if grep -q "^## TL;DR" "$active_session" 2>/dev/null; then
+        if [ -n "${SECTION_TL_DR:-}" ]; then
             echo "### TL;DR"
-            sed -n '/^## TL;DR/,/^## /p' "$active_session" | tail -n +2 | grep -v "^## " | head -8 || true
+            echo "$SECTION_TL_DR"
             echo ""
         fi
 
         # Current progress checklist
         echo "### Progress"
-        grep "^\- \[" "$active_session" 2>/dev/null | head -10 || echo "(no checklist items)"
+        echo "${CHECKLIST:-(no checklist items)}"
         echo ""
 
         # Key context section
-        if grep -q "^\*\*Key Context\*\*" "$active_session" 2>/dev/null; then
+        if [ -n "${LABEL_KEY_CONTEXT:-}" ]; then
             echo "### Key Context"
-            sed -n '/^\*\*Key Context\*\*/,/^## /p' "$active_session" | head -10 || true
+            echo "$LABEL_KEY_CONTEXT"
             echo ""
         fi
 
         # Next steps
-        if grep -q "^## Next Steps" "$active_session" 2>/dev/null; then
+        if [ -n "${SECTION_NEXT_STEPS:-}" ]; then
             echo "### Next Steps"
-            sed -n '/^## Next Steps/,/^## /p' "$active_session" | tail -n +2 | grep -v "^## " | head -5 || true
+            echo "$SECTION_NEXT_STEPS"
             echo ""
         fi
 
         # Current blockers
-        if grep -q "^## Blockers" "$active_session" 2>/dev/null; then
-            blockers=$(sed -n '/^## Blockers/,/^## /p' "$active_session" | grep -v "^## " | grep -v "^- None" | head -3 || true)
-            if [ -n "$blockers" ]; then
-                echo "### Blockers"
-                echo "$blockers"
-                echo ""
-            fi
+        if [ -n "${BLOCKERS:-}" ]; then
+            echo "### Blockers"
+            echo "$BLOCKERS"
+            echo ""
         fi
 
         echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
@@ -20,7 +20,8 @@ fi
 
 # Check if there's an in_progress task
 if [ -d ".tasks/active" ]; then
-    in_progress_count=$(find .tasks/active -name "*.md" -exec grep -l "status: in_progress" {} \; 2>/dev/null | wc -l | tr -d ' ')
+    # The status index only re-reads task files that changed since last time.
+    in_progress_count=$(python3 "$(dirname "$0")/../lib/task_index.py" count in_progress 2>/dev/null || echo 0)
 
     if [ "$in_progress_count" -eq 0 ]; then
         echo "💡 Reminder: No task currently in_progress. Consider using /task-next to select a task."
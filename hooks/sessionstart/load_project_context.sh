@@ -28,12 +28,15 @@ echo ""
 
 # Check for active session - PRIMARY CONTEXT SOURCE
 if [ -d ".sessions/active" ]; then
-    active_session=$(find .sessions/active -name "*.md" -type f 2>/dev/null | head -1)
+    # One session_store call resolves the active session (via the registry)
+    # and reads its frontmatter, TL;DR, checklist and blockers.
+    eval "$(python3 "$(dirname "$0")/../lib/session_store.py" export \
+        --section 'TL;DR=6' --checklist 7 --blockers 3 2>/dev/null || echo SESSION_FILE=)"
+    active_session="${SESSION_FILE:-}"
 
     if [ -n "$active_session" ] && [ -f "$active_session" ]; then
-        session_id=$(grep "^id:" "$active_session" 2>/dev/null | cut -d: -f2- | xargs || echo "")
-        shortname=$(grep "^shortname:" "$active_session" 2>/dev/null | cut -d: -f2- | xargs || echo "unknown")
-        compactions=$(grep "^compaction_count:" "$active_session" 2>/dev/null | cut -d: -f2 | xargs || echo "0")
+        shortname="${SESSION_SHORTNAME:-unknown}"
+        compactions="${SESSION_COMPACTION_COUNT:-0}"
 
         echo "📋 Active Session: $shortname"
         if [ -n "$compactions" ] && [ "$compactions" -gt 0 ] 2>/dev/null; then
@@ -42,29 +45,26 @@ if [ -d ".sessions/active" ]; then
         echo ""
 
         # Show TL;DR for quick context
-        if grep -q "^## TL;DR" "$active_session" 2>/dev/null; then
+        if [ -n "${SECTION_TL_DR:-}" ]; then
             echo "## TL;DR"
-            sed -n '/^## TL;DR/,/^## /p' "$active_session" | tail -n +2 | grep -v "^## " | head -6 || true
+            echo "$SECTION_TL_DR"
             echo ""
         fi
 
         # Show progress checklist
-        progress_done=$(grep -c "^\- \[x\]" "$active_session" 2>/dev/null || echo "0")
-        progress_total=$(grep -c "^\- \[" "$active_session" 2>/dev/null || echo "0")
+        progress_done="${CHECKLIST_DONE:-0}"
+        progress_total="${CHECKLIST_TOTAL:-0}"
         if [ "$progress_total" -gt 0 ] 2>/dev/null; then
             echo "## Progress ($progress_done/$progress_total)"
-            grep "^\- \[" "$active_session" 2>/dev/null | head -7 || true
+            echo "$CHECKLIST"
             echo ""
         fi
 
         # Show blockers if any
-        if grep -q "^## Blockers" "$active_session" 2>/dev/null; then
-            blockers=$(sed -n '/^## Blockers/,/^## /p' "$active_session" | grep -v "^## " | grep -v "^- None" | grep -v "^$" | head -3 || true)
-            if [ -n "$blockers" ]; then
-                echo "## Blockers ⚠️"
-                echo "$blockers"
-                echo ""
-            fi
+        if [ -n "${BLOCKERS:-}" ]; then
+            echo "## Blockers ⚠️"
+            echo "$BLOCKERS"
+            echo ""
         fi
 
         echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
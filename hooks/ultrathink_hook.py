@@ -1,17 +1,27 @@
 #!/usr/bin/env python3
 import json
+import os
 import sys
 
-input_data = json.load(sys.stdin)
-prompt = input_data.get("prompt", "")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), "lib"))
 
-if prompt.rstrip().endswith("-u"):
-    modified_prompt = prompt.rstrip()[:-2].rstrip()
-    
-    context = f"{modified_prompt}\n\nultrathink"
-    
-    print(context)
-else:
-    print(prompt)
 
-sys.exit(0)
\ No newline at end of file
+def process(input_data: dict) -> str:
+    """Return the prompt, swapping a trailing `-u` for an ultrathink marker."""
+    prompt = input_data.get("prompt", "")
+    if not prompt.rstrip().endswith("-u"):
+        return prompt
+
+    import prompt_pipeline
+
+    return prompt_pipeline.process(input_data, ["ultrathink"])
+
+
+def main():
+    input_data = json.load(sys.stdin)
+    print(process(input_data))
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,89 +8,45 @@ Features:
 - Detects security/review prompts and adds security context
 - Detects Bitcoin/Lightning keywords and adds protocol context
 - Detects test/coverage prompts and adds testing guidance
+
+The rules live in context_rules.json next to this script, compiled into
+one keyword scan by hooks/lib/keyword_matcher.py; this script runs just the
+context stages of hooks/lib/prompt_pipeline.py for standalone use.
 """
 
 import json
-import sys
-import re
 import os
+import sys
 
-def main():
-    input_data = json.load(sys.stdin)
-    prompt = input_data.get("prompt", "")
-
-    # Track what context we're adding
-    context_additions = []
-
-    # 1. Handle ultrathink mode (preserve existing functionality)
-    ultrathink_mode = False
-    if prompt.rstrip().endswith("-u"):
-        prompt = prompt.rstrip()[:-2].rstrip()
-        ultrathink_mode = True
-
-    # 2. Detect task management opportunities
-    task_keywords = ["implement", "fix", "add feature", "create", "build", "refactor"]
-    if any(keyword in prompt.lower() for keyword in task_keywords):
-        # Check if we're in a project with tasks
-        if os.path.isdir(".tasks"):
-            # Check if there's an active task
-            active_tasks = 0
-            if os.path.isdir(".tasks/active"):
-                for root, dirs, files in os.walk(".tasks/active"):
-                    for file in files:
-                        if file.endswith(".md"):
-                            with open(os.path.join(root, file), 'r') as f:
-                                if "status: in_progress" in f.read():
-                                    active_tasks += 1
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "lib"))
 
-            if active_tasks == 0:
-                context_additions.append(
-                    "Note: Consider using /task-next to select a task from your task system before starting work."
-                )
+import prompt_fastpath
 
-    # 3. Detect security/review context needs
-    security_keywords = [
-        "security", "vulnerability", "exploit", "attack", "DoS", "race condition",
-        "consensus", "validation", "mempool", "transaction", "reorg"
-    ]
-    if any(keyword in prompt.lower() for keyword in security_keywords):
-        context_additions.append(
-            "Security Context: Remember to consider: DoS vectors, race conditions, "
-            "resource exhaustion, consensus implications, and attack surface."
-        )
+STAGES = [
+    "ultrathink",
+    "task_nudge",
+    "security_context",
+    "bitcoin_context",
+    "testing_context",
+]
 
-    # 4. Detect Bitcoin/Lightning protocol context needs
-    bitcoin_keywords = [
-        "bitcoin", "lightning", "BOLT", "BIP", "TRUC", "v3 transaction",
-        "package relay", "RBF", "CPFP", "mempool", "consensus", "p2p"
-    ]
-    if any(keyword in prompt.lower() for keyword in bitcoin_keywords):
-        context_additions.append(
-            "Bitcoin/Lightning Context: Ensure protocol compliance (BIPs/BOLTs), "
-            "consider re-org safety, verify fee calculations, and test edge cases."
-        )
 
-    # 5. Detect test coverage context needs
-    test_keywords = ["test", "coverage", "testing", "unit test", "integration test", "fuzz"]
-    if any(keyword in prompt.lower() for keyword in test_keywords):
-        context_additions.append(
-            "Testing Context: Aim for >85% coverage with meaningful tests. "
-            "Consider property-based testing with rapid for invariants. "
-            "Test error paths, edge cases, and concurrent scenarios."
-        )
+def process(input_data: dict) -> str:
+    """Return the prompt with any matching context blocks appended."""
+    prompt = input_data.get("prompt", "")
+    if not prompt_fastpath.needs_pipeline(prompt):
+        return prompt
 
-    # 6. Build the enhanced prompt
-    enhanced_prompt = prompt
+    import prompt_pipeline
 
-    if context_additions:
-        enhanced_prompt += "\n\n" + "\n".join(context_additions)
+    return prompt_pipeline.process(input_data, STAGES)
 
-    # 7. Add ultrathink if requested
-    if ultrathink_mode:
-        enhanced_prompt += "\n\nultrathink"
 
-    print(enhanced_prompt)
+def main():
+    input_data = json.load(sys.stdin)
+    print(process(input_data))
     sys.exit(0)
 
+
 if __name__ == "__main__":
     main()
@@ -1,7 +1,7 @@
 #!/Users/roasbeef/.claude/skills/nano-banana/.venv/bin/python
 """Generate multiple images from a prompts file using Gemini's image generation API.
 
-The prompts file can be JSON or newline-delimited text.
+The prompts file can be JSON, JSONL (NDJSON) or newline-delimited text.
 
 JSON format:
     [
@@ -9,15 +9,48 @@ JSON format:
         {"prompt": "a forest", "filename": "forest.png", "aspect": "16:9"}
     ]
 
+JSONL format (.jsonl or .ndjson; one object or string per line):
+    {"prompt": "a sunset", "filename": "sunset.png"}
+    {"prompt": "a forest", "filename": "forest.png", "aspect": "16:9"}
+
 Text format (one prompt per line, auto-numbered output):
     a sunset over mountains
     a forest with fog
     a beach at dawn
 
+JSONL and text files are streamed: prompts are read as they are
+submitted, and only a window of twice --parallel items is in flight or
+queued at a time, so memory stays flat however long the file is. A JSON
+array is parsed whole; use JSONL for very large jobs.
+
+Requests run on the SDK's async client, each cancelled if it takes longer
+than --timeout seconds. Concurrency adapts between 1 and --parallel: it
+grows while requests succeed and halves on rate limiting (429), overload
+(503) or timeouts. Those failures, and other transient ones, are retried
+with jittered exponential backoff, waiting at least as long as the API's
+retry hint; only an item that fails --retries more times counts as
+failed. The current concurrency and requests per minute are shown live
+on stderr.
+
+Images are cached by request (see generation_cache.py): re-running a
+prompts file only calls the API for prompts, aspect ratios or models that
+changed. --refresh calls the API anyway and --no-cache bypasses the cache.
+
+Every finished item is appended to a run journal next to the output
+directory (output_dir.journal.jsonl) with its status, output path and
+content hash. If a run is killed, --resume skips the items the journal
+records as done, once their files check out against the recorded hash,
+and carries on with the rest. The final summary counts resumed items
+too, and --json reads each item's details back from the journal.
+
+Set GEMINI_BASE_URL to send requests somewhere other than the Gemini API,
+e.g. to fake_gemini_server.py.
+
 Usage:
     python batch_generate.py prompts.json output_dir/
     python batch_generate.py prompts.txt output_dir/ --model pro
     python batch_generate.py prompts.json output_dir/ --parallel 3
+    python batch_generate.py prompts.json output_dir/ --resume
 
 Examples:
     python batch_generate.py slides.json ./images/
@@ -25,21 +58,30 @@ Examples:
 """
 
 import argparse
-import concurrent.futures
+import asyncio
+import collections
+import email.utils
+import hashlib
 import json
 import os
+import random
 import sys
+import time
+import uuid
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator
 
 try:
+    import httpx
     from google import genai
-    from google.genai import types
+    from google.genai import errors, types
 except ImportError:
     print("Error: google-genai package not installed.", file=sys.stderr)
     print("Install with: pip install google-genai", file=sys.stderr)
     sys.exit(1)
 
+from generation_cache import GenerationCache, add_cache_arguments, request_key
+
 
 # Available models.
 MODELS = {
@@ -50,77 +92,233 @@ MODELS = {
 # Supported aspect ratios.
 ASPECT_RATIOS = ["1:1", "16:9", "9:16", "21:9", "4:3", "3:4"]
 
+# Seconds before a single request is cancelled.
+DEFAULT_TIMEOUT = 180.0
+
+# httpx's connection pool scans every connection on each request, which
+# gets quadratic past a few dozen; high concurrency is spread over several
+# clients with small pools instead.
+CONNECTIONS_PER_CLIENT = 16
+
+# Adaptive concurrency: start low, double per round until the first
+# overload, then grow by one per round and halve on each overload.
+INITIAL_CONCURRENCY = 4
+DECREASE_FACTOR = 0.5
+
+# Retries of one item after a transient failure.
+DEFAULT_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+# Items submitted ahead of the concurrency ceiling, per slot; prompts
+# beyond the window stay unread in the file.
+SUBMIT_WINDOW_FACTOR = 2
+
+# Suffixes of prompts files read one JSON value per line.
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
 
-def get_client():
-    """Initialize the Gemini client with API key from environment."""
+# Status codes worth retrying; the first two also mean "slow down".
+OVERLOAD_STATUS_CODES = (429, 503)
+RETRY_STATUS_CODES = OVERLOAD_STATUS_CODES + (500, 502, 504)
+
+# Seconds between status lines when stderr is not a terminal.
+STATUS_INTERVAL = 15.0
+
+
+def get_client(max_connections: int = 1):
+    """Initialize the Gemini client with API key from environment.
+
+    Args:
+        max_connections: Connections the async client may open.
+    """
     api_key = os.environ.get("GOOGLE_API_KEY") or os.environ.get("GEMINI_API_KEY")
     if not api_key:
         print("Error: GOOGLE_API_KEY or GEMINI_API_KEY environment variable not set.", file=sys.stderr)
         sys.exit(1)
-    return genai.Client(api_key=api_key)
+    http_options = types.HttpOptions(
+        base_url=os.environ.get("GEMINI_BASE_URL"),
+        async_client_args={
+            "limits": httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        },
+    )
+    return genai.Client(api_key=api_key, http_options=http_options)
 
 
-def load_prompts(prompts_path: str, default_aspect: str = "1:1") -> list[dict[str, Any]]:
-    """Load prompts from a JSON or text file.
+def _prompt_item(value: Any, i: int, default_aspect: str) -> dict[str, Any]:
+    """Normalize one JSON prompt (a string or an object) to a prompt dict."""
+    if isinstance(value, str):
+        return {
+            "prompt": value,
+            "filename": f"image_{i + 1:03d}.png",
+            "aspect": default_aspect,
+        }
+    return {
+        "prompt": value.get("prompt", value.get("text", "")),
+        "filename": value.get("filename", f"image_{i + 1:03d}.png"),
+        "aspect": value.get("aspect", default_aspect),
+    }
+
+
+def _iter_jsonl(path: Path, default_aspect: str, warn: bool = True) -> Iterator[dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        i = 0
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                value = json.loads(line)
+            except json.JSONDecodeError as e:
+                if warn:
+                    print(f"Warning: {path}:{lineno}: skipping invalid JSON ({e.msg})", file=sys.stderr)
+                continue
+            if not isinstance(value, (str, dict)):
+                if warn:
+                    print(
+                        f"Warning: {path}:{lineno}: skipping {type(value).__name__}, "
+                        "expected a prompt string or object",
+                        file=sys.stderr,
+                    )
+                continue
+            yield _prompt_item(value, i, default_aspect)
+            i += 1
+
+
+def _iter_text(path: Path, default_aspect: str) -> Iterator[dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        i = 0
+        for line in f:
+            line = line.strip()
+            if line:
+                yield {
+                    "prompt": line,
+                    "filename": f"image_{i + 1:03d}.png",
+                    "aspect": default_aspect,
+                }
+                i += 1
+
+
+def iter_prompts(
+    prompts_path: str,
+    default_aspect: str = "1:1",
+    warn: bool = True,
+) -> Iterator[dict[str, Any]]:
+    """Yield prompts from a JSON, JSONL or text file.
+
+    JSONL and text files are read lazily, a line at a time; a JSON array
+    has to be parsed whole.
 
     Args:
         prompts_path: Path to the prompts file.
         default_aspect: Default aspect ratio for prompts without one specified.
+        warn: Report invalid JSONL lines on stderr as they are skipped.
 
-    Returns:
-        List of prompt dictionaries with keys: prompt, filename, aspect.
+    Yields:
+        Prompt dictionaries with keys: prompt, filename, aspect.
     """
     path = Path(prompts_path)
     if not path.exists():
         raise FileNotFoundError(f"Prompts file not found: {prompts_path}")
 
-    content = path.read_text().strip()
+    if path.suffix.lower() in JSONL_SUFFIXES:
+        return _iter_jsonl(path, default_aspect, warn)
+
+    with open(path, encoding="utf-8") as f:
+        head = f.read(4096).lstrip()
 
     # Try JSON first.
-    if path.suffix.lower() == ".json" or content.startswith("["):
+    if path.suffix.lower() == ".json" or head.startswith("["):
         try:
-            data = json.loads(content)
-            prompts = []
-            for i, item in enumerate(data):
-                if isinstance(item, str):
-                    prompts.append({
-                        "prompt": item,
-                        "filename": f"image_{i + 1:03d}.png",
-                        "aspect": default_aspect,
-                    })
-                else:
-                    prompts.append({
-                        "prompt": item.get("prompt", item.get("text", "")),
-                        "filename": item.get("filename", f"image_{i + 1:03d}.png"),
-                        "aspect": item.get("aspect", default_aspect),
-                    })
-            return prompts
+            data = json.loads(path.read_text())
+            return (_prompt_item(value, i, default_aspect) for i, value in enumerate(data))
         except json.JSONDecodeError:
             pass
 
     # Fall back to newline-delimited text.
-    lines = [line.strip() for line in content.split("\n") if line.strip()]
-    return [
-        {
-            "prompt": line,
-            "filename": f"image_{i + 1:03d}.png",
-            "aspect": default_aspect,
-        }
-        for i, line in enumerate(lines)
-    ]
+    return _iter_text(path, default_aspect)
 
 
-def generate_single(
+def load_prompts(prompts_path: str, default_aspect: str = "1:1") -> list[dict[str, Any]]:
+    """Load prompts from a JSON, JSONL or text file.
+
+    Args:
+        prompts_path: Path to the prompts file.
+        default_aspect: Default aspect ratio for prompts without one specified.
+
+    Returns:
+        List of prompt dictionaries with keys: prompt, filename, aspect.
+    """
+    return list(iter_prompts(prompts_path, default_aspect))
+
+
+def count_prompts(prompts_path: str, default_aspect: str = "1:1") -> int:
+    """Number of prompts in a file, read without keeping them."""
+    return sum(1 for _ in iter_prompts(prompts_path, default_aspect, warn=False))
+
+
+class RetryableError(Exception):
+    """A failure worth retrying, with the server's retry hint if it gave one."""
+
+    def __init__(self, message: str, overloaded: bool, retry_after: float | None = None):
+        super().__init__(message)
+        self.overloaded = overloaded
+        self.retry_after = retry_after
+
+
+def _retry_after(error: errors.APIError) -> float | None:
+    """Seconds to wait from a Retry-After header or a RetryInfo detail."""
+    headers = getattr(error.response, "headers", None) or {}
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                parsed = email.utils.parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                # Malformed; 3.10+ raises rather than returning None.
+                parsed = None
+            if parsed is not None:
+                return max(0.0, parsed.timestamp() - time.time())
+    details = error.details.get("error", {}).get("details", []) if isinstance(error.details, dict) else []
+    for detail in details:
+        if isinstance(detail, dict) and str(detail.get("retryDelay", "")).endswith("s"):
+            try:
+                return max(0.0, float(detail["retryDelay"][:-1]))
+            except ValueError:
+                pass
+    return None
+
+
+def image_request_key(model: str, prompt: str, aspect_ratio: str) -> str:
+    """Generation cache key of one batch item."""
+    return request_key(model, [prompt], {"response_modalities": ["IMAGE"], "aspect_ratio": aspect_ratio})
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    """Jittered exponential backoff, never shorter than the server's hint."""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+    return max(delay, retry_after or 0.0)
+
+
+async def generate_single(
     client: genai.Client,
     prompt: str,
     output_path: Path,
     model: str,
     aspect_ratio: str,
+    timeout: float = DEFAULT_TIMEOUT,
+    cache: GenerationCache | None = None,
 ) -> tuple[str, bool, str]:
-    """Generate a single image.
+    """Generate a single image, storing it in `cache` if given.
 
     Returns:
         Tuple of (filename, success, message).
+
+    Raises:
+        RetryableError: On a timeout, rate limiting or a transient error.
     """
     try:
         config = types.GenerateContentConfig(
@@ -128,105 +326,456 @@ def generate_single(
             image_config=types.ImageConfig(aspect_ratio=aspect_ratio),
         )
 
-        response = client.models.generate_content(
-            model=model,
-            contents=[prompt],
-            config=config,
+        response = await asyncio.wait_for(
+            client.aio.models.generate_content(
+                model=model,
+                contents=[prompt],
+                config=config,
+            ),
+            timeout,
         )
 
-        for part in response.parts:
+        for part in response.parts or []:
             if part.inline_data is not None:
-                image = part.as_image()
-                output_path.parent.mkdir(parents=True, exist_ok=True)
-                image.save(str(output_path))
+                cache = cache or GenerationCache(read=False, write=False)
+                await asyncio.to_thread(
+                    cache.store,
+                    image_request_key(model, prompt, aspect_ratio),
+                    part.inline_data.data,
+                    output_path,
+                    part.inline_data.mime_type,
+                )
                 return (str(output_path), True, "Success")
 
         return (str(output_path), False, "No image in response")
 
+    except asyncio.TimeoutError:
+        raise RetryableError(f"Timed out after {timeout:g}s", overloaded=True)
+    except errors.APIError as e:
+        if e.code in RETRY_STATUS_CODES:
+            raise RetryableError(str(e), e.code in OVERLOAD_STATUS_CODES, _retry_after(e))
+        return (str(output_path), False, str(e))
+    except httpx.TransportError as e:
+        raise RetryableError(str(e) or type(e).__name__, overloaded=False)
     except Exception as e:
         return (str(output_path), False, str(e))
 
 
+class AimdLimiter:
+    """Concurrency limit that adapts to how the API is coping.
+
+    Each success adds 1/limit (one per round of requests), or 1 while in
+    slow start, before the first overload. An overload multiplies the
+    limit by DECREASE_FACTOR, once per round: requests that were already in
+    flight when the limit was cut don't cut it again.
+    """
+
+    def __init__(self, ceiling: int, initial: int = INITIAL_CONCURRENCY):
+        self.ceiling = ceiling
+        self.limit = float(min(initial, ceiling))
+        self.in_flight = 0
+        self.slow_start = True
+        self._last_cut = 0.0
+        self._changed = asyncio.Condition()
+
+    async def acquire(self) -> float:
+        """Wait for a free slot; returns the start time to pass to release()."""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return time.monotonic()
+
+    async def release(self, started: float, succeeded: bool = False, overloaded: bool = False):
+        async with self._changed:
+            self.in_flight -= 1
+            if overloaded:
+                if started >= self._last_cut:
+                    self.limit = max(1.0, self.limit * DECREASE_FACTOR)
+                    self._last_cut = time.monotonic()
+                    self.slow_start = False
+            elif succeeded:
+                step = 1.0 if self.slow_start else 1.0 / self.limit
+                self.limit = min(float(self.ceiling), self.limit + step)
+            self._changed.notify_all()
+
+
+class Progress:
+    """Counts and throughput of a batch, shown as a live status line."""
+
+    def __init__(self, total: int | None = None):
+        self.total = total
+        self.done = 0
+        self.cached = 0
+        self.resumed = 0
+        self.retries = 0
+        self.waiting = 0
+        self.started = time.monotonic()
+        # Completion times of requests in the last minute.
+        self._recent: collections.deque[float] = collections.deque()
+        self._tty = sys.stderr.isatty()
+
+    def completed(self):
+        now = time.monotonic()
+        self._recent.append(now)
+        while self._recent and self._recent[0] < now - 60:
+            self._recent.popleft()
+
+    def requests_per_minute(self) -> float:
+        window = min(60.0, time.monotonic() - self.started)
+        return len(self._recent) * 60.0 / window if window > 0 else 0.0
+
+    def status(self, limiter: AimdLimiter) -> str:
+        return (
+            f"{self.done}{'' if self.total is None else f'/{self.total}'} done ({self.resumed} resumed, {self.cached} cached) · concurrency {int(limiter.limit)}/{limiter.ceiling}"
+            f" ({limiter.in_flight} in flight) · {self.requests_per_minute():.1f} req/min"
+            f" · {self.retries} retries, {self.waiting} backing off"
+        )
+
+    def clear(self):
+        """Erase the status line before printing something else."""
+        if self._tty:
+            sys.stderr.write("\r\033[K")
+
+    async def report(self, limiter: AimdLimiter):
+        interval = 1.0 if self._tty else STATUS_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            if self._tty:
+                sys.stderr.write("\r\033[K" + self.status(limiter))
+                sys.stderr.flush()
+            else:
+                print(self.status(limiter), file=sys.stderr)
+
+
+def journal_path(output_dir: Path) -> Path:
+    """Where the run journal of `output_dir` lives: beside it, not inside."""
+    output_dir = output_dir.resolve()
+    return output_dir.with_name(output_dir.name + ".journal.jsonl")
+
+
+def file_sha256(path: Path) -> str | None:
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+class RunJournal:
+    """Append-only JSONL record of the items a batch run has finished.
+
+    A `start` line opens each run; each finished item adds an `item` line
+    with its request key, status, output path, size and content hash.
+    Lines are flushed as they are written, so a killed run loses at most
+    the items still in flight.
+
+    Memory stays flat in the size of the job: resuming keeps only the
+    key, size and hash of each finished item, and the counts of the
+    summary are tallied as outcomes are recorded.
+    """
+
+    def __init__(self, path: Path, resume: bool = False):
+        self.path = path
+        # Unique per run, unlike a timestamp, so a run resumed within the
+        # same second is still told apart from the one it resumes.
+        self.run = uuid.uuid4().hex
+        # Filename -> (key, bytes, sha256) of items earlier runs finished.
+        self.previous = self.load_finished(path) if resume else {}
+        self.counts = collections.Counter()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+        if self._file.tell() > 0 and not path.read_bytes().endswith(b"\n"):
+            # A run killed mid-line; don't glue the next record onto it.
+            self._file.write("\n")
+        self._write({
+            "event": "start",
+            "run": self.run,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "resume": resume,
+        })
+
+    @staticmethod
+    def records(path: Path) -> Iterator[dict[str, Any]]:
+        """The item records of a journal, oldest first."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(record, dict) and record.get("event") == "item":
+                        yield record
+        except FileNotFoundError:
+            pass
+
+    @classmethod
+    def load_finished(cls, path: Path) -> dict[str, tuple[str, int, str]]:
+        """Filename -> (key, bytes, sha256) of the items last recorded as successes."""
+        finished: dict[str, tuple[str, int, str]] = {}
+        for record in cls.records(path):
+            if record.get("status") == "success":
+                finished[record["filename"]] = (record.get("key"), record.get("bytes"), record.get("sha256"))
+            else:
+                finished.pop(record["filename"], None)
+        return finished
+
+    def _write(self, record: dict[str, Any]) -> None:
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def finished(self, filename: str, key: str, output_path: Path) -> bool:
+        """Whether an earlier run produced `output_path` for this exact request."""
+        previous = self.previous.get(filename)
+        if previous is None or previous[0] != key:
+            return False
+        _, size, sha256 = previous
+        try:
+            if output_path.stat().st_size != size:
+                return False
+        except OSError:
+            return False
+        return file_sha256(output_path) == sha256
+
+    def record(
+        self,
+        item: dict[str, Any],
+        key: str,
+        outcome: tuple[str, bool, str],
+        retries: int,
+    ) -> None:
+        filepath, success, message = outcome
+        self.counts["total"] += 1
+        self.counts["success" if success else "failed"] += 1
+        self.counts["retries"] += retries
+        if message == "Resumed":
+            self.counts["resumed"] += 1
+            return
+        self.counts["cached"] += message == "Cached"
+        record = {
+            "event": "item",
+            "run": self.run,
+            "filename": item["filename"],
+            "key": key,
+            "status": "success" if success else "failed",
+            "path": filepath,
+            "message": message,
+            "cached": message == "Cached",
+            "retries": retries,
+            "time": time.time(),
+        }
+        if success:
+            path = Path(filepath)
+            record["bytes"] = path.stat().st_size
+            record["sha256"] = file_sha256(path)
+        self._write(record)
+
+    def summary(self, prompts: Iterable[dict[str, Any]], details: bool = True) -> dict[str, Any]:
+        """Results of `prompts`: this run's counts, per-item details from the journal.
+
+        Prompts without an outcome this run count as failed ("Not run").
+        With `details` off, the journal isn't read back and only the
+        counts are returned.
+        """
+        results = {
+            "total": 0, "success": 0, "failed": 0, "cached": 0,
+            "resumed": 0, "retries": 0, "journal": str(self.path), "details": [],
+        }
+        results.update(self.counts)
+        # Latest record per item, read back only when details are wanted.
+        latest = {record["filename"]: record for record in self.records(self.path)} if details else {}
+        total = 0
+        for item in prompts:
+            total += 1
+            if not details:
+                continue
+            record = latest.get(item["filename"]) or {"status": "failed", "message": "Not run"}
+            results["details"].append({
+                "filename": item["filename"],
+                "success": record["status"] == "success",
+                "message": record.get("message", ""),
+                "retries": record.get("retries", 0),
+                "path": record.get("path"),
+                "sha256": record.get("sha256"),
+            })
+        results["failed"] += max(0, total - self.counts["total"])
+        results["total"] = max(total, self.counts["total"])
+        return results
+
+    def close(self) -> None:
+        self._file.close()
+
+
+async def run_batch(
+    clients: list[genai.Client],
+    prompts: Iterable[dict[str, Any]],
+    output_path: Path,
+    model: str,
+    parallel: int,
+    timeout: float,
+    retries: int,
+    cache: GenerationCache,
+    journal: RunJournal,
+    total: int | None = None,
+) -> None:
+    """Generate every prompt with at most `parallel` requests in flight.
+
+    Prompts are taken from `prompts` only as the submission window has
+    room, so an iterator is never read far ahead of the requests. Prompts
+    `journal` records as finished by an earlier run are skipped, and
+    prompts already in `cache` are served from it without a request. Each
+    outcome is recorded in `journal`.
+    """
+    limiter = AimdLimiter(max(1, parallel))
+    progress = Progress(total)
+
+    async def generate(n: int, item: dict[str, Any]) -> tuple[dict[str, Any], str, tuple[str, bool, str], int]:
+        target = output_path / item["filename"]
+        key = image_request_key(model, item["prompt"], item["aspect"])
+        if await asyncio.to_thread(journal.finished, item["filename"], key, target):
+            progress.resumed += 1
+            return item, key, (str(target), True, "Resumed"), 0
+        if await asyncio.to_thread(cache.fetch, key, target):
+            progress.cached += 1
+            return item, key, (str(target), True, "Cached"), 0
+
+        attempt = 0
+        while True:
+            started = await limiter.acquire()
+            try:
+                outcome = await generate_single(
+                    clients[n % len(clients)],
+                    item["prompt"],
+                    output_path / item["filename"],
+                    model,
+                    item["aspect"],
+                    timeout,
+                    cache,
+                )
+            except RetryableError as e:
+                await limiter.release(started, overloaded=e.overloaded)
+                progress.completed()
+                if attempt >= retries:
+                    return item, key, (str(output_path / item["filename"]), False, str(e)), attempt
+                # Requeue: sleep without holding a slot, then wait for one again.
+                progress.retries += 1
+                progress.waiting += 1
+                try:
+                    await asyncio.sleep(backoff_delay(attempt, e.retry_after))
+                finally:
+                    progress.waiting -= 1
+                attempt += 1
+                continue
+            except BaseException:
+                await limiter.release(started)
+                raise
+            await limiter.release(started, succeeded=outcome[1])
+            progress.completed()
+            return item, key, outcome, attempt
+
+    # Tasks submitted but not yet reported; at most `window` of them, so
+    # the prompts behind them stay unread until there is room.
+    window = max(1, parallel) * SUBMIT_WINDOW_FACTOR
+    pending: set[asyncio.Task] = set()
+    numbered = enumerate(prompts)
+
+    def submit():
+        for n, item in numbered:
+            pending.add(asyncio.create_task(generate(n, item)))
+            if len(pending) >= window:
+                return
+
+    label = "" if total is None else f"/{total}"
+    reporter = asyncio.create_task(progress.report(limiter))
+    try:
+        submit()
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending -= done
+            for task in done:
+                item, key, outcome, attempts = task.result()
+                filepath, success, message = outcome
+                journal.record(item, key, outcome, attempts)
+                progress.done += 1
+                progress.clear()
+                print(f"[{progress.done}{label}] Processing: {item['filename']}")
+                if success:
+                    note = f" ({message.lower()})" if message in ("Cached", "Resumed") else ""
+                    print(f"  ✓ Saved: {filepath}{note}")
+                else:
+                    print(f"  ✗ Failed: {message}")
+            submit()
+    finally:
+        # On an interrupt, cancel whatever is still waiting or in flight.
+        reporter.cancel()
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(reporter, *pending, return_exceptions=True)
+        progress.clear()
+        print(progress.status(limiter), file=sys.stderr)
+        for client in clients:
+            await client.aio.aclose()
+        cache.flush()
+        journal.close()
+
+
 def batch_generate(
     prompts_path: str,
     output_dir: str,
     model: str = "gemini-2.5-flash-image",
     default_aspect: str = "1:1",
     parallel: int = 1,
+    timeout: float = DEFAULT_TIMEOUT,
+    retries: int = DEFAULT_RETRIES,
+    cache: GenerationCache | None = None,
+    resume: bool = False,
+    details: bool = True,
 ) -> dict[str, Any]:
     """Generate multiple images from a prompts file.
 
     Args:
-        prompts_path: Path to the prompts file (JSON or text).
+        prompts_path: Path to the prompts file (JSON, JSONL or text).
         output_dir: Directory to save generated images.
         model: Model to use for generation.
         default_aspect: Default aspect ratio for prompts without one specified.
-        parallel: Number of parallel workers.
+        parallel: Maximum number of requests in flight; the actual number
+            adapts below it.
+        timeout: Seconds before a single request is cancelled.
+        retries: Retries of one item after transient failures.
+        cache: Generation cache; the default one if not given.
+        resume: Skip items an earlier run's journal records as finished.
+        details: Include a line per item in the summary, not just counts.
 
     Returns:
         Summary dict with success/failure counts and details.
     """
-    client = get_client()
-    prompts = load_prompts(prompts_path, default_aspect)
+    parallel = max(1, parallel)
+    clients = [
+        get_client(min(parallel, CONNECTIONS_PER_CLIENT))
+        for _ in range(-(-parallel // CONNECTIONS_PER_CLIENT))
+    ]
+    total = count_prompts(prompts_path, default_aspect)
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
-
-    results = {"total": len(prompts), "success": 0, "failed": 0, "details": []}
-
-    if parallel <= 1:
-        # Sequential processing.
-        for i, item in enumerate(prompts):
-            print(f"[{i + 1}/{len(prompts)}] Generating: {item['filename']}")
-            filepath, success, message = generate_single(
-                client,
-                item["prompt"],
-                output_path / item["filename"],
-                model,
-                item["aspect"],
-            )
-            if success:
-                results["success"] += 1
-                print(f"  ✓ Saved: {filepath}")
-            else:
-                results["failed"] += 1
-                print(f"  ✗ Failed: {message}")
-            results["details"].append({
-                "filename": item["filename"],
-                "success": success,
-                "message": message,
-            })
-    else:
-        # Parallel processing.
-        with concurrent.futures.ThreadPoolExecutor(max_workers=parallel) as executor:
-            futures = {}
-            for item in prompts:
-                future = executor.submit(
-                    generate_single,
-                    client,
-                    item["prompt"],
-                    output_path / item["filename"],
-                    model,
-                    item["aspect"],
-                )
-                futures[future] = item
-
-            for i, future in enumerate(concurrent.futures.as_completed(futures)):
-                item = futures[future]
-                print(f"[{i + 1}/{len(prompts)}] Processing: {item['filename']}")
-                filepath, success, message = future.result()
-                if success:
-                    results["success"] += 1
-                    print(f"  ✓ Saved: {filepath}")
-                else:
-                    results["failed"] += 1
-                    print(f"  ✗ Failed: {message}")
-                results["details"].append({
-                    "filename": item["filename"],
-                    "success": success,
-                    "message": message,
-                })
-
-    return results
+    journal = RunJournal(journal_path(output_path), resume)
+
+    asyncio.run(run_batch(
+        clients,
+        iter_prompts(prompts_path, default_aspect),
+        output_path,
+        model,
+        parallel,
+        timeout,
+        retries,
+        cache=cache or GenerationCache(),
+        journal=journal,
+        total=total,
+    ))
+    # Read the prompts once more rather than holding them through the run.
+    return journal.summary(iter_prompts(prompts_path, default_aspect, warn=False), details)
 
 
 def main():
@@ -235,7 +784,7 @@ def main():
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog=__doc__,
     )
-    parser.add_argument("prompts", help="Path to prompts file (JSON or newline-delimited text)")
+    parser.add_argument("prompts", help="Path to prompts file (JSON, JSONL or newline-delimited text)")
     parser.add_argument("output_dir", help="Directory to save generated images")
     parser.add_argument(
         "--model", "-m",
@@ -253,8 +802,26 @@ def main():
         "--parallel", "-p",
         type=int,
         default=1,
-        help="Number of parallel workers. Default: 1 (sequential)",
+        help="Maximum requests in flight; adapts below this to rate limits. Default: 1 (sequential)",
+    )
+    parser.add_argument(
+        "--timeout", "-t",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help=f"Seconds before a single request is cancelled. Default: {DEFAULT_TIMEOUT:g}",
+    )
+    parser.add_argument(
+        "--retries", "-r",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help=f"Retries per item after rate limiting or transient errors. Default: {DEFAULT_RETRIES}",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip items the run journal records as finished (after checking their files)",
     )
+    add_cache_arguments(parser)
     parser.add_argument(
         "--json",
         action="store_true",
@@ -273,6 +840,11 @@ def main():
             model=model,
             default_aspect=args.aspect,
             parallel=args.parallel,
+            timeout=args.timeout,
+            retries=args.retries,
+            cache=GenerationCache.from_args(args),
+            resume=args.resume,
+            details=args.json,
         )
 
         print()
@@ -282,12 +854,21 @@ def main():
             print(f"Batch complete: {results['success']}/{results['total']} succeeded")
             if results["failed"] > 0:
                 print(f"Failed: {results['failed']}")
+            if results["resumed"] > 0:
+                print(f"Resumed: {results['resumed']}")
+            if results["cached"] > 0:
+                print(f"Cached: {results['cached']}")
+            if results["retries"] > 0:
+                print(f"Retries: {results['retries']}")
 
         sys.exit(0 if results["failed"] == 0 else 1)
 
     except FileNotFoundError as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
+    except KeyboardInterrupt:
+        print("\nInterrupted; in-flight requests cancelled", file=sys.stderr)
+        sys.exit(130)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
@@ -8,6 +8,10 @@ the previously generated one.
 Session state is saved to a JSON file, allowing sessions to be paused
 and resumed later.
 
+Each turn is cached by request, including the image being refined (see
+generation_cache.py), so replaying a session's messages is free;
+--refresh calls the API anyway and --no-cache bypasses the cache.
+
 Usage:
     # Start a new interactive session
     python chat_session.py
@@ -52,6 +56,8 @@ except ImportError:
     print("Install with: pip install google-genai", file=sys.stderr)
     sys.exit(1)
 
+from generation_cache import GenerationCache, add_cache_arguments, request_key
+
 
 # Available models.
 MODELS = {
@@ -66,7 +72,8 @@ def get_client():
     if not api_key:
         print("Error: GOOGLE_API_KEY or GEMINI_API_KEY environment variable not set.", file=sys.stderr)
         sys.exit(1)
-    return genai.Client(api_key=api_key)
+    http_options = types.HttpOptions(base_url=os.environ.get("GEMINI_BASE_URL"))
+    return genai.Client(api_key=api_key, http_options=http_options)
 
 
 class ChatSession:
@@ -77,12 +84,14 @@ class ChatSession:
         session_file: str | None = None,
         model: str = "gemini-2.5-flash-image",
         output_dir: str = ".",
+        cache: GenerationCache | None = None,
     ):
         self.model = model
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.session_file = session_file
-        self.client = get_client()
+        self.cache = cache or GenerationCache(read=False, write=False)
+        self._client = None
 
         # Session state.
         self.history: list[dict[str, Any]] = []
@@ -93,6 +102,13 @@ class ChatSession:
         if session_file and Path(session_file).exists():
             self._load_session(session_file)
 
+    @property
+    def client(self) -> genai.Client:
+        """The Gemini client, created on the first request that misses the cache."""
+        if self._client is None:
+            self._client = get_client()
+        return self._client
+
     def _load_session(self, path: str) -> None:
         """Load session state from a JSON file."""
         with open(path) as f:
@@ -156,6 +172,11 @@ class ChatSession:
 
         contents.append(prompt)
 
+        key = request_key(self.model, contents, {"response_modalities": ["IMAGE"]})
+        output_path = self.output_dir / f"output_{self.image_count + 1:03d}.png"
+        if self.cache.fetch(key, output_path):
+            return self._record(message, output_path)
+
         # Generate config.
         config = types.GenerateContentConfig(
             response_modalities=["IMAGE"],
@@ -171,22 +192,8 @@ class ChatSession:
             # Extract the image.
             for part in response.parts:
                 if part.inline_data is not None:
-                    self.image_count += 1
-                    output_path = self.output_dir / f"output_{self.image_count:03d}.png"
-                    image = part.as_image()
-                    image.save(str(output_path))
-
-                    # Update state.
-                    self.last_image_path = str(output_path)
-                    self.history.append({
-                        "role": "user",
-                        "message": message,
-                        "image_path": str(output_path),
-                        "timestamp": datetime.now().isoformat(),
-                    })
-                    self._save_session()
-
-                    return str(output_path)
+                    self.cache.store(key, part.inline_data.data, output_path, part.inline_data.mime_type)
+                    return self._record(message, output_path)
 
             print("Warning: No image in response", file=sys.stderr)
             return None
@@ -195,6 +202,19 @@ class ChatSession:
             print(f"Error: {e}", file=sys.stderr)
             return None
 
+    def _record(self, message: str, output_path: Path) -> str:
+        """Make `output_path` the latest image of the session."""
+        self.image_count += 1
+        self.last_image_path = str(output_path)
+        self.history.append({
+            "role": "user",
+            "message": message,
+            "image_path": str(output_path),
+            "timestamp": datetime.now().isoformat(),
+        })
+        self._save_session()
+        return str(output_path)
+
     def run_interactive(self) -> None:
         """Run an interactive session."""
         print("Multi-turn image generation session")
@@ -265,6 +285,7 @@ def main():
         "--message",
         help="Send a single message (non-interactive mode)",
     )
+    add_cache_arguments(parser)
 
     args = parser.parse_args()
 
@@ -276,6 +297,7 @@ def main():
         session_file=args.session_file,
         model=model,
         output_dir=args.output_dir,
+        cache=GenerationCache.from_args(args),
     )
 
     # Handle initial prompt.
@@ -1,6 +1,10 @@
 #!/Users/roasbeef/.claude/skills/nano-banana/.venv/bin/python
 """Edit an existing image using Gemini's image generation API.
 
+Results are cached by request, including the input image bytes (see
+generation_cache.py); --refresh calls the API anyway and --no-cache
+bypasses the cache.
+
 Usage:
     python edit_image.py input.png "edit instructions" output.png
     python edit_image.py input.png "remove the background" output.png --model pro
@@ -25,6 +29,8 @@ except ImportError:
     print("Install with: pip install google-genai", file=sys.stderr)
     sys.exit(1)
 
+from generation_cache import GenerationCache, add_cache_arguments, request_key
+
 
 # Available models.
 MODELS = {
@@ -39,7 +45,8 @@ def get_client():
     if not api_key:
         print("Error: GOOGLE_API_KEY or GEMINI_API_KEY environment variable not set.", file=sys.stderr)
         sys.exit(1)
-    return genai.Client(api_key=api_key)
+    http_options = types.HttpOptions(base_url=os.environ.get("GEMINI_BASE_URL"))
+    return genai.Client(api_key=api_key, http_options=http_options)
 
 
 def load_image_as_part(image_path: str) -> types.Part:
@@ -71,6 +78,7 @@ def edit_image(
     instructions: str,
     output_path: str,
     model: str = "gemini-2.5-flash-image",
+    cache: GenerationCache | None = None,
 ) -> str:
     """Edit an existing image based on text instructions.
 
@@ -79,6 +87,7 @@ def edit_image(
         instructions: Text instructions describing the edit.
         output_path: Path where the edited image will be saved.
         model: Model to use for editing.
+        cache: Generation cache to serve and store the image; none by default.
 
     Returns:
         Path to the saved edited image.
@@ -86,7 +95,7 @@ def edit_image(
     Raises:
         RuntimeError: If no image is generated.
     """
-    client = get_client()
+    cache = cache or GenerationCache(read=False, write=False)
 
     # Load the input image.
     image_part = load_image_as_part(input_path)
@@ -94,6 +103,13 @@ def edit_image(
     # Construct the edit prompt.
     edit_prompt = f"Using the provided image, {instructions}"
 
+    key = request_key(model, [image_part, edit_prompt], {"response_modalities": ["IMAGE"]})
+    if cache.fetch(key, output_path):
+        print(f"Edited image saved to: {output_path} (cached)")
+        return str(output_path)
+
+    client = get_client()
+
     # Build generation config.
     config = types.GenerateContentConfig(
         response_modalities=["IMAGE"],
@@ -108,10 +124,8 @@ def edit_image(
     # Extract and save the edited image.
     for part in response.parts:
         if part.inline_data is not None:
-            image = part.as_image()
             output = Path(output_path)
-            output.parent.mkdir(parents=True, exist_ok=True)
-            image.save(str(output))
+            cache.store(key, part.inline_data.data, output, part.inline_data.mime_type)
             print(f"Edited image saved to: {output}")
             return str(output)
 
@@ -133,6 +147,7 @@ def main():
         default="flash",
         help="Model to use: 'flash' (fast) or 'pro' (high quality). Default: flash",
     )
+    add_cache_arguments(parser)
 
     args = parser.parse_args()
 
@@ -145,6 +160,7 @@ def main():
             instructions=args.instructions,
             output_path=args.output,
             model=model,
+            cache=GenerationCache.from_args(args),
         )
     except FileNotFoundError as e:
         print(f"Error: {e}", file=sys.stderr)
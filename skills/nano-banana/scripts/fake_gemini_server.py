@@ -0,0 +1,259 @@
+#!/Users/roasbeef/.claude/skills/nano-banana/.venv/bin/python
+"""Local stand-in for the Gemini generateContent endpoint.
+
+Answers every `POST .../models/<model>:generateContent` with a small PNG
+derived from the request, after a configurable delay, so the batch engine
+can be exercised end-to-end at high concurrency without an API key or
+quota. It records how many requests were in flight at once.
+
+Usage:
+    # Serve, then point the scripts at it
+    python fake_gemini_server.py serve --port 8089 --latency 0.5
+    GEMINI_BASE_URL=http://127.0.0.1:8089 GEMINI_API_KEY=fake \\
+        python batch_generate.py prompts.txt ./out/ --parallel 200
+
+    # Self-contained end-to-end check of batch_generate.py: a full run,
+    # then a second run that must be served from the generation cache
+    python fake_gemini_server.py check --count 500 --parallel 250
+
+Options:
+    --latency     Seconds each response takes. Default: 0.2
+    --fail-rate   Fraction of requests answered with a 500. Default: 0
+    --rate-limit  Requests per second allowed; the rest get a 429 with a
+                  Retry-After header and RetryInfo detail. Default: none
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+def make_png(seed: bytes) -> bytes:
+    """An 8x8 single-colour PNG whose colour is derived from `seed`."""
+    r, g, b = hashlib.sha256(seed).digest()[:3]
+    row = b"\x00" + bytes((r, g, b)) * 8
+    raw = row * 8
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    header = struct.pack(">IIBBBBB", 8, 8, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections in a burst of hundreds.
+    request_queue_size = 1024
+
+    def __init__(
+        self,
+        address,
+        latency: float = 0.2,
+        fail_rate: float = 0.0,
+        rate_limit: float | None = None,
+    ):
+        super().__init__(address, FakeGeminiHandler)
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.rate_limit = rate_limit
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        # Token bucket holding one second's worth of requests.
+        self._tokens = rate_limit or 0.0
+        self._refilled = time.monotonic()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def admit(self) -> bool:
+        """Take a token from the rate limit bucket; call with the lock held."""
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit)
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "rate_limited": self.rate_limited,
+                "peak_in_flight": self.peak_in_flight,
+            }
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeGeminiServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, data: dict, headers: dict | None = None):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = self.rfile.read(length)
+        if not self.path.split("?")[0].endswith(":generateContent"):
+            self._send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+            return
+
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            admitted = server.admit()
+            if not admitted:
+                server.rate_limited += 1
+        if not admitted:
+            self._send_json(429, {"error": {
+                "code": 429,
+                "message": "Resource has been exhausted (e.g. check quota).",
+                "status": "RESOURCE_EXHAUSTED",
+                "details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "1s"}],
+            }}, {"Retry-After": "1"})
+            return
+
+        with server.lock:
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        try:
+            time.sleep(server.latency)
+            if random.random() < server.fail_rate:
+                self._send_json(500, {"error": {"code": 500, "message": "Injected failure", "status": "INTERNAL"}})
+                return
+            image = base64.b64encode(make_png(request)).decode()
+            self._send_json(200, {
+                "candidates": [{
+                    "content": {
+                        "role": "model",
+                        "parts": [{"inlineData": {"mimeType": "image/png", "data": image}}],
+                    },
+                    "finishReason": "STOP",
+                }],
+            })
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+def serve(args):
+    server = FakeGeminiServer(("127.0.0.1", args.port), args.latency, args.fail_rate, args.rate_limit)
+    print(f"Fake Gemini API at {server.url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(server.stats()), file=sys.stderr)
+
+
+def check(args):
+    """Run batch_generate.py against an in-process server and verify the output."""
+    server = FakeGeminiServer(("127.0.0.1", 0), args.latency, args.fail_rate, args.rate_limit)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["GEMINI_BASE_URL"] = server.url
+    os.environ.setdefault("GEMINI_API_KEY", "fake")
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import batch_generate
+    from generation_cache import GenerationCache
+
+    with tempfile.TemporaryDirectory(prefix="fake-gemini-") as tmp:
+        prompts = Path(tmp) / "prompts.jsonl"
+        prompts.write_text("".join(
+            json.dumps({"prompt": f"test prompt {i}", "filename": f"image_{i + 1:05d}.png"}) + "\n"
+            for i in range(args.count)
+        ))
+        output_dir = Path(tmp) / "out"
+
+        def run():
+            start = time.monotonic()
+            results = batch_generate.batch_generate(
+                str(prompts), str(output_dir), parallel=args.parallel, timeout=args.timeout,
+                retries=args.retries, cache=GenerationCache(Path(tmp) / "cache"),
+            )
+            return results, time.monotonic() - start
+
+        results, elapsed = run()
+        written = sum(1 for p in output_dir.glob("*.png") if p.read_bytes().startswith(b"\x89PNG"))
+        stats = server.stats()
+        rerun, rerun_elapsed = run()
+
+    server.shutdown()
+    print(
+        f"\n{results['success']}/{args.count} succeeded, {written} PNG(s) written, "
+        f"{stats['requests']} request(s) ({stats['rate_limited']} rate limited), "
+        f"peak {stats['peak_in_flight']} in flight, {elapsed:.2f}s"
+    )
+    new_requests = server.stats()["requests"] - stats["requests"]
+    print(f"Re-run: {rerun['cached']} cached, {new_requests} new request(s), {rerun_elapsed:.2f}s")
+
+    expected = args.count if args.fail_rate == 0 else results["success"]
+    ok = (
+        written == expected
+        and stats["peak_in_flight"] <= args.parallel
+        and rerun["cached"] == results["success"]
+        and new_requests == args.count - results["success"]
+    )
+    sys.exit(0 if ok else 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local fake of the Gemini image generation API.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("command", choices=["serve", "check"])
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--count", type=int, default=300, help="Prompts to generate (check)")
+    parser.add_argument("--parallel", type=int, default=200, help="Requests in flight (check)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout (check)")
+    parser.add_argument("--retries", type=int, default=5, help="Retries per item (check)")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args)
+    else:
+        check(args)
+
+
+if __name__ == "__main__":
+    main()
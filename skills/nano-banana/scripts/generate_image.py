@@ -1,6 +1,9 @@
 #!/Users/roasbeef/.claude/skills/nano-banana/.venv/bin/python
 """Generate a single image from a text prompt using Gemini's image generation API.
 
+Results are cached by request (see generation_cache.py); --refresh calls
+the API anyway and --no-cache bypasses the cache.
+
 Usage:
     python generate_image.py "prompt" output.png
     python generate_image.py "prompt" output.png --model gemini-3-pro-image-preview
@@ -25,6 +28,8 @@ except ImportError:
     print("Install with: pip install google-genai", file=sys.stderr)
     sys.exit(1)
 
+from generation_cache import GenerationCache, add_cache_arguments, request_key
+
 
 # Available models.
 MODELS = {
@@ -45,7 +50,8 @@ def get_client():
     if not api_key:
         print("Error: GOOGLE_API_KEY or GEMINI_API_KEY environment variable not set.", file=sys.stderr)
         sys.exit(1)
-    return genai.Client(api_key=api_key)
+    http_options = types.HttpOptions(base_url=os.environ.get("GEMINI_BASE_URL"))
+    return genai.Client(api_key=api_key, http_options=http_options)
 
 
 def generate_image(
@@ -54,6 +60,7 @@ def generate_image(
     model: str = "gemini-2.5-flash-image",
     aspect_ratio: str = "1:1",
     resolution: str | None = None,
+    cache: GenerationCache | None = None,
 ) -> str:
     """Generate an image from a text prompt.
 
@@ -63,6 +70,7 @@ def generate_image(
         model: Model to use for generation.
         aspect_ratio: Aspect ratio for the output image.
         resolution: Output resolution (1K, 2K, 4K). Only for Gemini 3 Pro.
+        cache: Generation cache to serve and store the image; none by default.
 
     Returns:
         Path to the saved image.
@@ -70,13 +78,20 @@ def generate_image(
     Raises:
         RuntimeError: If no image is generated.
     """
-    client = get_client()
+    cache = cache or GenerationCache(read=False, write=False)
 
     # Build image config for aspect ratio and resolution.
     image_config_args = {"aspect_ratio": aspect_ratio}
     if resolution and "pro" in model.lower():
         image_config_args["image_size"] = resolution
 
+    key = request_key(model, [prompt], {"response_modalities": ["IMAGE"], **image_config_args})
+    if cache.fetch(key, output_path):
+        print(f"Image saved to: {output_path} (cached)")
+        return str(output_path)
+
+    client = get_client()
+
     # Build generation config with image_config.
     config = types.GenerateContentConfig(
         response_modalities=["IMAGE"],
@@ -92,10 +107,8 @@ def generate_image(
     # Extract and save the image.
     for part in response.parts:
         if part.inline_data is not None:
-            image = part.as_image()
             output = Path(output_path)
-            output.parent.mkdir(parents=True, exist_ok=True)
-            image.save(str(output))
+            cache.store(key, part.inline_data.data, output, part.inline_data.mime_type)
             print(f"Image saved to: {output}")
             return str(output)
 
@@ -128,6 +141,7 @@ def main():
         default=None,
         help="Output resolution (Gemini 3 Pro only). Options: 1K, 2K, 4K",
     )
+    add_cache_arguments(parser)
 
     args = parser.parse_args()
 
@@ -146,6 +160,7 @@ def main():
             model=model,
             aspect_ratio=args.aspect,
             resolution=args.size,
+            cache=GenerationCache.from_args(args),
         )
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
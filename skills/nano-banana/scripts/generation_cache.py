@@ -0,0 +1,304 @@
+#!/Users/roasbeef/.claude/skills/nano-banana/.venv/bin/python
+"""Content-addressed cache of generated images, shared by the nano-banana scripts.
+
+Each request is keyed by a hash of everything that determines its result:
+model, prompt text, generation config (aspect ratio, resolution) and the
+bytes of any input images. A repeated request is served from the cache by
+hardlinking (or copying, across filesystems) the stored image to the
+output path instead of calling the API, so re-running a tweaked prompts
+file only pays for the lines that changed.
+
+Layout, under ~/.cache/nano-banana (NANO_BANANA_CACHE_DIR):
+    objects/ab/abcdef....png    one file per request key
+    index.json                  key -> size, content hash, last use
+
+The index is kept in memory by each process and merged into index.json
+under a lock on flush, which also evicts least recently used images until
+the cache fits NANO_BANANA_CACHE_MAX_MB (default 2048). An image is checked
+against its content hash before it is served, so an output file edited in
+place (sharing the cached inode) is dropped instead of handed out again.
+
+Scripts take --no-cache (neither read nor write the cache) and --refresh
+(call the API, then replace the cached image).
+
+Usage:
+    python generation_cache.py stats
+    python generation_cache.py prune     # Evict down to the size limit
+    python generation_cache.py clear
+"""
+
+import argparse
+import atexit
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+# Bump to invalidate every key, e.g. when the request encoding changes.
+KEY_VERSION = 1
+
+DEFAULT_MAX_MB = 2048
+
+# Index changes buffered in memory before they are merged to disk.
+FLUSH_EVERY = 100
+
+EXTENSIONS = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+}
+
+
+def request_key(model: str, contents: list[Any], config: dict[str, Any]) -> str:
+    """Hash of a generation request.
+
+    Args:
+        model: Model ID.
+        contents: Request contents: prompt strings, and image parts as
+            Gemini Parts (anything with `inline_data.data`) or (mime, bytes).
+        config: Generation settings that affect the output.
+    """
+    digest = hashlib.sha256()
+    header = {"version": KEY_VERSION, "model": model, "config": config}
+    digest.update(json.dumps(header, sort_keys=True).encode() + b"\0")
+    for part in contents:
+        if isinstance(part, str):
+            digest.update(b"text\0" + part.encode() + b"\0")
+            continue
+        inline = getattr(part, "inline_data", None)
+        mime, data = (inline.mime_type, inline.data) if inline is not None else part
+        digest.update(b"image\0" + (mime or "").encode() + b"\0")
+        digest.update(hashlib.sha256(data).digest())
+    return digest.hexdigest()
+
+
+def add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the --no-cache and --refresh switches to a script's parser."""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Don't read or write the generation cache",
+    )
+    group.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Call the API even if the request is cached, then update the cache",
+    )
+
+
+class GenerationCache:
+    """On-disk cache of generated images, keyed by request_key()."""
+
+    def __init__(
+        self,
+        root: str | Path | None = None,
+        max_bytes: int | None = None,
+        read: bool = True,
+        write: bool = True,
+    ):
+        self.root = Path(root or os.environ.get("NANO_BANANA_CACHE_DIR")
+                         or Path.home() / ".cache" / "nano-banana")
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("NANO_BANANA_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self.read = read
+        self.write = write
+        self.index_file = self.root / "index.json"
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._index: dict[str, dict[str, Any]] | None = None
+        # Entries changed or removed here since the last flush.
+        self._dirty: set[str] = set()
+        self._removed: set[str] = set()
+        atexit.register(self.flush)
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> "GenerationCache":
+        """Cache configured by add_cache_arguments() switches."""
+        return cls(read=not (args.no_cache or args.refresh), write=not args.no_cache)
+
+    def _object(self, key: str, mime: str | None) -> Path:
+        return self.root / "objects" / key[:2] / (key + EXTENSIONS.get(mime or "", ".png"))
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        if self._index is None:
+            try:
+                self._index = json.loads(self.index_file.read_text())
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def fetch(self, key: str, output_path: str | Path) -> bool:
+        """Place the cached image for `key` at `output_path`, if there is one."""
+        if not self.read:
+            return False
+        with self._lock:
+            entry = self._load().get(key)
+        if entry is None:
+            self.misses += 1
+            return False
+
+        source = self._object(key, entry.get("mime"))
+        try:
+            data = source.read_bytes()
+        except OSError:
+            data = None
+        if data is None or hashlib.sha256(data).hexdigest() != entry.get("sha256"):
+            # Evicted by another process, or modified through a hardlink.
+            self._forget(key, source)
+            self.misses += 1
+            return False
+
+        _link_or_copy(source, Path(output_path))
+        with self._lock:
+            entry["last_used"] = time.time()
+            self._dirty.add(key)
+        self.hits += 1
+        self._maybe_flush()
+        return True
+
+    def store(self, key: str, data: bytes, output_path: str | Path, mime: str | None = None) -> None:
+        """Write `data` to `output_path`, keeping a copy under `key`."""
+        output = Path(output_path)
+        if not self.write:
+            # Replace rather than overwrite: the old output may be a
+            # hardlink to a cached image.
+            _write_atomic(output, data)
+            return
+
+        target = self._object(key, mime)
+        _write_atomic(target, data)
+        _link_or_copy(target, output)
+
+        now = time.time()
+        with self._lock:
+            self._load()[key] = {
+                "size": len(data),
+                "sha256": hashlib.sha256(data).hexdigest(),
+                "mime": mime,
+                "created": now,
+                "last_used": now,
+            }
+            self._dirty.add(key)
+            self._removed.discard(key)
+        self._maybe_flush()
+
+    def _forget(self, key: str, path: Path | None = None):
+        with self._lock:
+            self._load().pop(key, None)
+            self._dirty.discard(key)
+            self._removed.add(key)
+        if path is not None:
+            path.unlink(missing_ok=True)
+
+    def _maybe_flush(self):
+        if len(self._dirty) + len(self._removed) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self, force: bool = False) -> None:
+        """Merge this process's changes into index.json and evict to the size limit."""
+        with self._lock:
+            if not (self._dirty or self._removed or force):
+                return
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.root / "index.lock", "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    disk = json.loads(self.index_file.read_text())
+                except (OSError, ValueError):
+                    disk = {}
+                mine = self._load()
+                for key in self._removed:
+                    disk.pop(key, None)
+                for key in self._dirty:
+                    if key in mine:
+                        theirs = disk.get(key)
+                        if theirs is None or theirs.get("sha256") != mine[key]["sha256"]:
+                            disk[key] = mine[key]
+                        else:
+                            theirs["last_used"] = max(theirs["last_used"], mine[key]["last_used"])
+                self._evict(disk)
+
+                tmp = self.index_file.with_name(f".index.{os.getpid()}.tmp")
+                tmp.write_text(json.dumps(disk))
+                os.replace(tmp, self.index_file)
+            self._index = disk
+            self._dirty.clear()
+            self._removed.clear()
+
+    def _evict(self, index: dict[str, dict[str, Any]]) -> None:
+        total = sum(entry["size"] for entry in index.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(index.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            self._object(key, entry.get("mime")).unlink(missing_ok=True)
+            del index[key]
+            total -= entry["size"]
+
+    def stats(self) -> dict[str, Any]:
+        index = self._load()
+        return {
+            "root": str(self.root),
+            "entries": len(index),
+            "bytes": sum(entry["size"] for entry in index.values()),
+            "max_bytes": self.max_bytes,
+        }
+
+
+def _tmp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _tmp_path(path)
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _link_or_copy(source: Path, output: Path) -> None:
+    """Hardlink `source` to `output`, or copy it across filesystems."""
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _tmp_path(output)
+    try:
+        os.link(source, tmp)
+    except OSError:
+        shutil.copyfile(source, tmp)
+    os.replace(tmp, output)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Inspect or clear the nano-banana generation cache.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("command", choices=["stats", "prune", "clear"])
+    args = parser.parse_args()
+
+    cache = GenerationCache()
+    if args.command == "clear":
+        shutil.rmtree(cache.root, ignore_errors=True)
+        print(f"Cleared {cache.root}")
+        return
+    if args.command == "prune":
+        cache.flush(force=True)
+
+    stats = cache.stats()
+    print(f"{stats['entries']} image(s), {stats['bytes'] / 1024 / 1024:.1f} of "
+          f"{stats['max_bytes'] / 1024 / 1024:.0f} MB in {stats['root']}")
+
+
+if __name__ == "__main__":
+    main()